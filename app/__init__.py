@@ -5,7 +5,6 @@ from logging import getLogger
 from fastapi import HTTPException
 
 from app.exceptions.message import ExceptionMessage
-from app.models import session
 
 app_logger = getLogger('app')
 
@@ -26,7 +25,5 @@ def handle_errors(func):
             app_logger.error(exc)
             app_logger.error(traceback.format_exc())
             raise HTTPException(detail=ExceptionMessage.INTERNAL_SERVER_ERROR, status_code=500) from exc
-        finally:
-            session.close()
 
     return wrapper
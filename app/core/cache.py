@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    """
+    LRUCache
+
+    Thread-safe least recently used cache whose entries expire after their own TTL.
+
+    Attributes
+    ----------
+    maxsize : int
+        maximum number of entries, the least recently used entry is evicted beyond it
+    maxbytes : Optional[int]
+        maximum total of the sizes given to set, None for no limit
+    hits : int
+        number of lookups which found an entry
+    misses : int
+        number of lookups which found no entry or an expired entry
+    evictions : int
+        number of entries evicted because the cache was full
+    """
+
+    def __init__(self, maxsize: int, maxbytes: Optional[int] = None) -> None:
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: OrderedDict[Hashable, Tuple[float, Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Get the value of the key
+
+        Parameters
+        ----------
+        key : Hashable
+            key of the entry
+
+        Returns
+        -------
+        Tuple[bool, Any]
+            (True, value) if the entry exists and is not expired, otherwise (False, None)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: float, nbytes: int = 0) -> None:
+        """Set the value of the key
+
+        Parameters
+        ----------
+        key : Hashable
+            key of the entry
+        value : Any
+            value of the entry, None is cached as well
+        ttl : float
+            seconds until the entry expires
+        nbytes : int
+            size of the value counted against maxbytes, a value larger than maxbytes is not cached
+        """
+        if self.maxsize <= 0 or (self.maxbytes is not None and nbytes > self.maxbytes):
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value, nbytes)
+            self._bytes += nbytes
+            while len(self._entries) > self.maxsize or (self.maxbytes is not None and self._bytes > self.maxbytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: Hashable) -> Tuple[float, Any, int]:
+        entry = self._entries.pop(key)
+        self._bytes -= entry[2]
+        return entry
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Remove the entry of the key and return its value"""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            return self._remove(key)[1]
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistics of the cache
+
+        Returns
+        -------
+        Dict[str, Any]
+            size, maxsize, hits, misses, evictions and hit_ratio, and bytes and maxbytes if maxbytes is set
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {'size': len(self._entries),
+                     'maxsize': self.maxsize,
+                     'hits': self.hits,
+                     'misses': self.misses,
+                     'evictions': self.evictions,
+                     'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0}
+            if self.maxbytes is not None:
+                stats.update(bytes=self._bytes, maxbytes=self.maxbytes)
+            return stats
@@ -0,0 +1,28 @@
+import os
+import tempfile
+from typing import IO, Any, Callable
+
+
+def write_atomic(path: str, write: Callable[[IO[bytes]], Any]) -> None:
+    """Write a file by renaming a complete temporary file over it
+
+    Readers see either the previous file or the new one, never a partially written file.
+
+    Parameters
+    ----------
+    path : str
+        path of the file
+    write : Callable[[IO[bytes]], Any]
+        function writing the content to the temporary file
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        # mkstemp creates the file readable only by the owner
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
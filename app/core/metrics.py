@@ -0,0 +1,33 @@
+from typing import Any, Callable, Dict
+
+
+class Metrics:
+    """
+    Class to collect metrics of the application.
+    Each component registers a collector which returns a snapshot of its metrics as a dict.
+    """
+    _collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    @classmethod
+    def register(cls, name: str, collector: Callable[[], Dict[str, Any]]) -> None:
+        """Register metrics collector
+
+        Parameters
+        ----------
+        name : str
+            name of the metrics group
+        collector : Callable[[], Dict[str, Any]]
+            function which returns a snapshot of the metrics
+        """
+        cls._collectors[name] = collector
+
+    @classmethod
+    def collect(cls) -> Dict[str, Dict[str, Any]]:
+        """Collect metrics of all registered collectors
+
+        Returns
+        -------
+        Dict[str, Dict[str, Any]]
+            metrics keyed by name of the metrics group
+        """
+        return {name: collector() for name, collector in cls._collectors.items()}
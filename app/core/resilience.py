@@ -0,0 +1,202 @@
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+
+class TokenBucket:
+    """
+    TokenBucket
+
+    Rate limiter allowing `rate` calls per second on average and bursts of `capacity` calls.
+    Callers beyond the burst wait for their token in arrival order.
+
+    Attributes
+    ----------
+    rate : float
+        tokens added per second
+    capacity : float
+        maximum number of tokens
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token, possibly in advance
+
+        Returns
+        -------
+        float
+            seconds to wait until the token is available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            if wait > 0:
+                self.waits += 1
+                self.wait_seconds_total += wait
+            return wait
+
+    async def acquire(self) -> None:
+        """Wait until a token is available"""
+        if self.rate <= 0:
+            return
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'rate': self.rate,
+                'capacity': self.capacity,
+                'waits': self.waits,
+                'wait_seconds_total': round(self.wait_seconds_total, 6)}
+
+
+class CircuitState:
+    """
+    Class to define the states of CircuitBreaker.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    CircuitBreaker
+
+    Fails fast after `failure_threshold` consecutive failures.
+    After `reset_timeout` seconds one trial call is allowed, which closes the circuit on success
+    and opens it again on failure.
+
+    Attributes
+    ----------
+    failure_threshold : int
+        consecutive failures which open the circuit
+    reset_timeout : float
+        seconds the circuit stays open
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Close the circuit and reset the statistics"""
+        with self._lock:
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+            self._opened_at = 0.0
+            self.opened = 0
+            self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = CircuitState.HALF_OPEN
+            return CircuitState.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Check if a call is allowed
+
+        Returns
+        -------
+        bool
+            False while the circuit is open or a trial call is in flight
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CircuitState.CLOSED:
+                return True
+            if state == CircuitState.HALF_OPEN:
+                # the trial call keeps the others out until its result is recorded
+                self._state = CircuitState.OPEN
+                self._opened_at = time.monotonic()
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state != CircuitState.CLOSED or self._failures >= self.failure_threshold:
+                if self._state == CircuitState.CLOSED:
+                    self.opened += 1
+                self._state = CircuitState.OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'state': self._current_state(),
+                    'consecutive_failures': self._failures,
+                    'opened': self.opened,
+                    'rejected': self.rejected}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse Retry-After header
+
+    Parameters
+    ----------
+    value : Optional[str]
+        delay in seconds or HTTP date
+
+    Returns
+    -------
+    Optional[float]
+        seconds to wait, None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter
+
+    Parameters
+    ----------
+    attempt : int
+        number of the failed attempt, starting from 0
+    base : float
+        seconds of the first backoff
+    cap : float
+        maximum seconds of backoff
+
+    Returns
+    -------
+    float
+        seconds to wait before the next attempt
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -18,4 +18,9 @@ class AppRoutePermissions:
 
     class Books:
         POST_GOOGLE_BOOKS = [AppRoles.ADMIN]
+        POST_GOOGLE_BOOKS_BATCH = [AppRoles.ADMIN]
+        POST_JOBS = [AppRoles.ADMIN]
+        GET_JOB = [AppRoles.ADMIN]
 
+    class Metrics:
+        GET = [AppRoles.ADMIN]
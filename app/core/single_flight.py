@@ -0,0 +1,56 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+    """
+    SingleFlight
+
+    Coalesces concurrent calls for the same key into one in-flight call whose result,
+    or exception, is shared by all callers. The key is forgotten as soon as the call finishes.
+
+    Attributes
+    ----------
+    calls : int
+        number of calls actually executed
+    shared : int
+        number of callers which joined a call in flight
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.shared = 0
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Call fn unless a call for the key is in flight, and wait for its result
+
+        Parameters
+        ----------
+        key : Hashable
+            key identifying the call
+        fn : Callable[[], Awaitable[T]]
+            function to call
+
+        Returns
+        -------
+        T
+            result of the call in flight
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            self.calls += 1
+        else:
+            self.shared += 1
+        # a cancelled caller must not cancel the call shared with the others
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'calls': self.calls,
+                'shared': self.shared,
+                'in_flight': len(self._in_flight)}
@@ -0,0 +1,240 @@
+import hashlib
+import os
+from abc import ABC, abstractmethod
+from typing import Iterator
+
+from app.core.files import write_atomic
+
+# boto3 is the optional s3 extra, required only by the s3 backend
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+
+def blob_key(content: bytes, extension: str) -> str:
+    """Key of a blob, derived from its content
+
+    The key is sharded by the first bytes of the hash, so no directory holds more than
+    1/65536 of the blobs.
+
+    Parameters
+    ----------
+    content : bytes
+        content of the blob
+    extension : str
+        file extension without dot
+
+    Returns
+    -------
+    str
+        key such as ab/cd/abcd...ef.jpg
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{extension}"
+
+
+class BlobStorage(ABC):
+    """
+    BlobStorage
+
+    Storage of immutable blobs addressed by blob_key.
+    Storing the same content twice stores it once.
+    """
+
+    def put(self, content: bytes, extension: str) -> str:
+        """Store a blob unless it is already stored
+
+        Parameters
+        ----------
+        content : bytes
+            content of the blob
+        extension : str
+            file extension without dot
+
+        Returns
+        -------
+        str
+            key of the blob
+        """
+        key = blob_key(content, extension)
+        if not self.exists(key):
+            self._write(key, content)
+        return key
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    def read(self, key: str) -> bytes:
+        """Read a blob
+
+        Raises
+        ------
+        FileNotFoundError
+            if the blob is not stored
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def keys(self, modified_before: float) -> Iterator[str]:
+        """Keys of the blobs written before the time
+
+        Parameters
+        ----------
+        modified_before : float
+            POSIX timestamp
+
+        Returns
+        -------
+        Iterator[str]
+            keys of the blobs
+        """
+
+    @abstractmethod
+    def _write(self, key: str, content: bytes) -> None:
+        pass
+
+
+class LocalBlobStorage(BlobStorage):
+    """
+    LocalBlobStorage
+
+    Blobs are files under the root directory, written atomically.
+
+    Attributes
+    ----------
+    root : str
+        absolute path of the root directory
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = os.path.abspath(root)
+
+    def path(self, key: str) -> str:
+        """Absolute path of the file of a blob"""
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise FileNotFoundError(key)
+        return path
+
+    def exists(self, key: str) -> bool:
+        try:
+            return os.path.isfile(self.path(key))
+        except FileNotFoundError:
+            return False
+
+    def read(self, key: str) -> bytes:
+        with open(self.path(key), 'rb') as f:
+            return f.read()
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def keys(self, modified_before: float) -> Iterator[str]:
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                # temporary files of write_atomic
+                if name.startswith('.'):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(path) >= modified_before:
+                        continue
+                except FileNotFoundError:
+                    continue
+                yield os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    def _write(self, key: str, content: bytes) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, lambda f: f.write(content))
+
+
+class S3BlobStorage(BlobStorage):
+    """
+    S3BlobStorage
+
+    Blobs are objects of a bucket of S3 or an S3 compatible storage such as MinIO.
+
+    Attributes
+    ----------
+    bucket : str
+        bucket name
+    client
+        boto3 S3 client, or an object with the same methods
+    """
+
+    NOT_FOUND_CODES = {'404', 'NoSuchKey', 'NotFound'}
+
+    def __init__(self, bucket: str, client=None, endpoint_url: str = None) -> None:
+        if client is None:
+            if boto3 is None:
+                raise RuntimeError('boto3 is required to store cover images in S3, install the s3 extra')
+            client = boto3.client('s3', endpoint_url=endpoint_url)
+        self.bucket = bucket
+        self.client = client
+
+    @classmethod
+    def _is_not_found(cls, exc: Exception) -> bool:
+        return str(getattr(exc, 'response', {}).get('Error', {}).get('Code')) in cls.NOT_FOUND_CODES
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+        except Exception as exc:
+            if self._is_not_found(exc):
+                return False
+            raise
+        return True
+
+    def read(self, key: str) -> bytes:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+        except Exception as exc:
+            if self._is_not_found(exc):
+                raise FileNotFoundError(key) from exc
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def keys(self, modified_before: float) -> Iterator[str]:
+        for page in self.client.get_paginator('list_objects_v2').paginate(Bucket=self.bucket):
+            for obj in page.get('Contents', []):
+                if obj['LastModified'].timestamp() < modified_before:
+                    yield obj['Key']
+
+    def _write(self, key: str, content: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=content)
+
+
+def create_storage(backend: str, root: str, bucket: str = None, endpoint_url: str = None) -> BlobStorage:
+    """Create the storage of a backend
+
+    Parameters
+    ----------
+    backend : str
+        local or s3
+    root : str
+        root directory of the local storage
+    bucket : str
+        bucket of the s3 storage
+    endpoint_url : str
+        endpoint of an S3 compatible storage, None for S3
+
+    Returns
+    -------
+    BlobStorage
+        storage
+    """
+    if backend == 's3':
+        return S3BlobStorage(bucket=bucket, endpoint_url=endpoint_url)
+    return LocalBlobStorage(root=root)
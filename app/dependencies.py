@@ -1,11 +1,21 @@
-from typing import List
+from typing import AsyncIterator, List
 
 from fastapi import Depends
 
 from app.exceptions.exceptions import NotEnoughPermissionsException
+from app.models import session_scope
 from app.services.login_service import LoginService, TokenData
 
 
+async def get_db_session() -> AsyncIterator[None]:
+    """
+    get_db_session opens one session scope per request.
+    The request's sessions are committed when the route returns and rolled back when it raises.
+    """
+    async with session_scope():
+        yield
+
+
 def has_permission(required_roles: List[str]):
     def _has_permission(current_user: TokenData = Depends(LoginService.verify_token)) -> TokenData:
         if current_user.role not in required_roles:
@@ -122,3 +122,25 @@ class VerificationTokenNotFoundException(HTTPException):
         self.status_code = status_code
         self.message = message
         super().__init__(status_code=self.status_code, detail=self.message)
+
+
+class IngestionJobNotFoundException(HTTPException):
+    """Exception for Ingestion Job Not Found"""
+
+    def __init__(self,
+                 status_code: int = status.HTTP_404_NOT_FOUND,
+                 message: str = ExceptionMessage.INGESTION_JOB_NOT_FOUND):
+        self.status_code = status_code
+        self.message = message
+        super().__init__(status_code=self.status_code, detail=self.message)
+
+
+class BookNotFoundException(HTTPException):
+    """Exception for Book Not Found"""
+
+    def __init__(self,
+                 status_code: int = status.HTTP_404_NOT_FOUND,
+                 message: str = ExceptionMessage.BOOK_NOT_FOUND):
+        self.status_code = status_code
+        self.message = message
+        super().__init__(status_code=self.status_code, detail=self.message)
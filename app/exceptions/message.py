@@ -5,6 +5,8 @@ class ExceptionMessage():
     GOOGLE_BOOKS_API_UNEXPECTED_ERROR = 'Unexpected error occurred'
     GOOGLE_BOOKS_API_INVALID_RESPONSE = 'Invalid response received from the API'
     GOOGLE_BOOKS_API_IMAGE_DOWNLOAD_ERROR = 'Error downloading image from the API'
+    GOOGLE_BOOKS_API_IMAGE_TOO_LARGE = 'Image from the API is too large'
+    GOOGLE_BOOKS_API_UNAVAILABLE = 'Google Books API is temporarily unavailable'
     DUPLICATE_USER = 'User already exists'
     INVALID_USER_EMAIL_FORMAT = 'Invalid user email format'
     USER_NOT_FOUND = 'User not found'
@@ -14,5 +16,7 @@ class ExceptionMessage():
     BOOK_ISBN_DIGITS = 'ISBN must be 10 or 13 digits'
     BOOK_ISBN_FORMAT = 'ISBN must be numeric'
     DUPLICATE_BOOK_ISBN = 'Book already exists'
+    BOOK_NOT_FOUND = 'Book not found'
     USER_IS_NOT_VERIFIED = 'User is not verified'
     VERIFICATION_TOKEN_NOT_FOUND = 'Verification token not found'
+    INGESTION_JOB_NOT_FOUND = 'Ingestion job not found'
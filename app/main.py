@@ -1,9 +1,49 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
 
-from app.routers import book_router, login_router, user_router
+from fastapi import Depends, FastAPI
 
-app = FastAPI(title="FastAPI Template")
+from app.dependencies import get_db_session
+from app.middlewares import query_profiler_middleware
+from app.models import AsyncEngine, AsyncReplicaEngine
+from app.routers import book_router, login_router, metrics_router, user_router
+from app.services.cover_image_service import CoverImageService
+from app.services.google_books_api_service import GoogleBooksApiService
+from app.services.image_service import ImageBase64Service
+from app.services.isbn_filter_service import IsbnFilterService
+from app.services.password_service import PasswordService
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    lifespan is a function that handles startup and shutdown of the application.
+    """
+    # open keep-alive connections to Google Books API shared by all requests
+    GoogleBooksApiService.start()
+    # processes rendering the smaller cover images
+    CoverImageService.start()
+    # threads hashing passwords, and the work factor of bcrypt on this hardware
+    PasswordService.start()
+    PasswordService.calibrate()
+    # base64 of the no image image returned for books without cover image
+    ImageBase64Service.load()
+    # isbns of saved books, to reject duplicates before calling Google Books API
+    await IsbnFilterService.load_async()
+    yield
+    await GoogleBooksApiService.stop()
+    CoverImageService.stop()
+    PasswordService.stop()
+    # close pooled asyncpg connections
+    await AsyncEngine.dispose()
+    if AsyncReplicaEngine is not None:
+        await AsyncReplicaEngine.dispose()
+
+
+app = FastAPI(title="FastAPI Template", lifespan=lifespan, dependencies=[Depends(get_db_session)])
+
+app.middleware("http")(query_profiler_middleware)
 
 app.include_router(user_router)
 app.include_router(login_router)
 app.include_router(book_router)
+app.include_router(metrics_router)
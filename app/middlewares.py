@@ -0,0 +1,35 @@
+import os
+
+from fastapi import Request
+
+from app.models.profiler import QueryProfile, QueryProfiler, current_profile
+
+DEBUG = os.getenv('APP_DEBUG', 'false').lower() == 'true'
+
+# key of requests matching no route, so that arbitrary paths do not add entries to the metrics
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+async def query_profiler_middleware(request: Request, call_next):
+    """
+    query_profiler_middleware records the statements executed by each request.
+    The profile is returned as X-DB-* response headers in debug mode
+    and aggregated per route for the metrics endpoint.
+    """
+    profile = QueryProfile()
+    token = current_profile.set(profile)
+    try:
+        response = await call_next(request)
+    finally:
+        current_profile.reset(token)
+
+    route = request.scope.get('route')
+    QueryProfiler.collect(route.path if route is not None else UNMATCHED_ROUTE, profile)
+
+    if DEBUG:
+        response.headers['X-DB-Statement-Count'] = str(profile.statement_count)
+        response.headers['X-DB-Time-Ms'] = f'{profile.total_seconds * 1000:.3f}'
+        if profile.slowest:
+            response.headers['X-DB-Slowest-Ms'] = f'{profile.slowest[0][0] * 1000:.3f}'
+        response.headers['X-DB-N-Plus-One'] = str(len(profile.n_plus_one))
+    return response
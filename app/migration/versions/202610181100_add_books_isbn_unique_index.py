@@ -0,0 +1,27 @@
+"""add books isbn unique index
+
+Revision ID: 4f6b0d92e8a1
+Revises: 8d2a5b7e0c13
+Create Date: 2026-10-18 11:00:27.551830
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '4f6b0d92e8a1'
+down_revision = '8d2a5b7e0c13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY does not block writes to books, but cannot run inside a transaction.
+    # The build fails if books already has duplicated isbns, they must be removed beforehand.
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_books_isbn'), 'books', ['isbn'], unique=True,
+                        postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_books_isbn'), table_name='books', postgresql_concurrently=True)
@@ -0,0 +1,27 @@
+"""add book authors indexes
+
+Revision ID: 7b1e4c9d3f52
+Revises: 4f6b0d92e8a1
+Create Date: 2026-10-18 12:00:13.208746
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '7b1e4c9d3f52'
+down_revision = '4f6b0d92e8a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # keep the first link of duplicated book authors, so that the unique index can be built
+    op.execute('DELETE FROM book_authors AS a USING book_authors AS b '
+               'WHERE a.book_id = b.book_id AND a.author_id = b.author_id AND a.id > b.id')
+    op.create_index('ix_book_authors_book_id_author_id', 'book_authors', ['book_id', 'author_id'], unique=True)
+    op.create_index(op.f('ix_book_authors_author_id'), 'book_authors', ['author_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_book_authors_author_id'), table_name='book_authors')
+    op.drop_index('ix_book_authors_book_id_author_id', table_name='book_authors')
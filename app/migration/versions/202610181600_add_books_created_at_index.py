@@ -0,0 +1,26 @@
+"""add books created at index
+
+Revision ID: 6e1f4a9c2b38
+Revises: 5c3d8e2a7f14
+Create Date: 2026-10-18 16:00:41.207315
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '6e1f4a9c2b38'
+down_revision = '5c3d8e2a7f14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY does not block writes to books, but cannot run inside a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_books_created_at', 'books', ['created_at'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_books_created_at', table_name='books', postgresql_concurrently=True)
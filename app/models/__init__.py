@@ -1,6 +1,19 @@
 # isort: skip_file
-from app.models.setting import BaseModel, Engine, session
+from app.models.setting import (
+    AsyncEngine,
+    AsyncReplicaEngine,
+    BaseModel,
+    Engine,
+    ReplicaEngine,
+    async_session,
+    async_session_factory,
+    session,
+    session_scope,
+)
 from app.models.author_model import AuthorModel
 from app.models.book_model import BookModel
 from app.models.book_author_model import BookAuthorModel
-from app.models.user_model import UserModel
+from app.models.user_model import UserAuthentication, UserModel
+from app.models.book_metadata_model import BookMetadataModel
+from app.models.ingestion_job_model import IngestionJobItemModel, IngestionJobModel, IngestionJobStatus
+from app.models.cover_blob_model import CoverBlobModel
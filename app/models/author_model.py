@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from sqlalchemy import Column, Integer, String, select
+from sqlalchemy.dialects.postgresql import insert
 
-from app.models.setting import BaseModel, Engine, session
+from app.models.setting import BaseModel, Engine, async_session, session
 
 
 class AuthorModel(BaseModel):
@@ -91,6 +92,88 @@ class AuthorModel(BaseModel):
         result = session.execute(stmt).scalars().all()
         return result
 
+    @classmethod
+    async def fetch_by_names_async(cls, names: List[str]) -> List[AuthorModel]:
+        """
+        Fetch authors by names with AsyncSession
+
+        Parameters
+        ----------
+        names : List[str]
+            author names
+
+        Returns
+        -------
+        List[AuthorModel]
+            list of AuthorModel object
+        """
+        stmt = select(AuthorModel).where(AuthorModel.name.in_(names))
+        result = (await async_session.execute(stmt)).scalars().all()
+        return result
+
+    @classmethod
+    def _upsert_statement(cls, names: List[str]):
+        return insert(AuthorModel)\
+            .values([{'name': name} for name in names])\
+            .on_conflict_do_nothing(index_elements=[AuthorModel.name])\
+            .returning(AuthorModel.name, AuthorModel.id)
+
+    @classmethod
+    def upsert_many(cls, names: List[str]) -> Dict[str, int]:
+        """
+        Save authors which are not saved yet
+
+        Runs one INSERT ... ON CONFLICT DO NOTHING RETURNING for all names
+        and one SELECT for the names which were already saved.
+        Names are inserted in sorted order, so concurrent upserts do not deadlock.
+
+        Parameters
+        ----------
+        names : List[str]
+            author names
+
+        Returns
+        -------
+        Dict[str, int]
+            author id for each name
+        """
+        names = sorted(set(names))
+        if not names:
+            return {}
+        author_ids = dict(session.execute(cls._upsert_statement(names)).all())
+
+        existing_names = [name for name in names if name not in author_ids]
+        if existing_names:
+            stmt = select(AuthorModel.name, AuthorModel.id).where(AuthorModel.name.in_(existing_names))
+            author_ids.update(session.execute(stmt).all())
+        return author_ids
+
+    @classmethod
+    async def upsert_many_async(cls, names: List[str]) -> Dict[str, int]:
+        """
+        Save authors which are not saved yet with AsyncSession
+
+        Parameters
+        ----------
+        names : List[str]
+            author names
+
+        Returns
+        -------
+        Dict[str, int]
+            author id for each name
+        """
+        names = sorted(set(names))
+        if not names:
+            return {}
+        author_ids = dict((await async_session.execute(cls._upsert_statement(names))).all())
+
+        existing_names = [name for name in names if name not in author_ids]
+        if existing_names:
+            stmt = select(AuthorModel.name, AuthorModel.id).where(AuthorModel.name.in_(existing_names))
+            author_ids.update((await async_session.execute(stmt)).all())
+        return author_ids
+
 
 if __name__ == "__main__":
     BaseModel.metadata.create_all(bind=Engine)
@@ -1,7 +1,10 @@
-from sqlalchemy import Column, ForeignKey, Integer
+from typing import List, Tuple
+
+from sqlalchemy import Column, ForeignKey, Index, Integer
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import relationship
 
-from app.models import AuthorModel, BookModel, session
+from app.models import AuthorModel, BookModel, async_session, session
 from app.models.setting import BaseModel, Engine
 
 
@@ -22,7 +25,13 @@ class BookAuthorModel(BaseModel):
     __tablename__ = 'book_authors'
     id = Column(Integer, primary_key=True, autoincrement=True)
     book_id = Column(Integer, ForeignKey(BookModel.id))
-    author_id = Column(Integer, ForeignKey(AuthorModel.id))
+    author_id = Column(Integer, ForeignKey(AuthorModel.id), index=True)
+
+    __table_args__ = (
+        # a book is linked to an author only once, also used for the lookup of the authors of a book
+        Index('ix_book_authors_book_id_author_id', 'book_id', 'author_id', unique=True),
+        BaseModel.__table_args__,
+    )
 
     book = relationship("BookModel", backref="book_authors")
     author = relationship("AuthorModel", backref="book_authors")
@@ -60,6 +69,61 @@ class BookAuthorModel(BaseModel):
         session.add(book_author)
         session.flush()
 
+    @classmethod
+    def _insert_statement(cls):
+        # links which already exist are skipped
+        return insert(BookAuthorModel).on_conflict_do_nothing(
+            index_elements=[BookAuthorModel.book_id, BookAuthorModel.author_id])
+
+    @classmethod
+    def save_many(cls, book_id: int, author_ids: List[int]) -> None:
+        """
+        Save book authors of a book
+
+        All links are inserted by one INSERT with many VALUES (insertmanyvalues).
+
+        Parameters
+        ----------
+        book_id : int
+            book id
+        author_ids : List[int]
+            author ids
+        """
+        if not author_ids:
+            return
+        session.execute(cls._insert_statement(),
+                        [{'book_id': book_id, 'author_id': author_id} for author_id in dict.fromkeys(author_ids)])
+
+    @classmethod
+    async def save_many_async(cls, book_id: int, author_ids: List[int]) -> None:
+        """
+        Save book authors of a book with AsyncSession
+
+        Parameters
+        ----------
+        book_id : int
+            book id
+        author_ids : List[int]
+            author ids
+        """
+        await cls.save_pairs_async(pairs=[(book_id, author_id) for author_id in author_ids])
+
+    @classmethod
+    async def save_pairs_async(cls, pairs: List[Tuple[int, int]]) -> None:
+        """
+        Save book authors in a single statement with AsyncSession
+
+        Parameters
+        ----------
+        pairs : List[Tuple[int, int]]
+            pairs of book id and author id
+        """
+        if not pairs:
+            return
+        await async_session.execute(cls._insert_statement(),
+                                    [{'book_id': book_id, 'author_id': author_id}
+                                     for book_id, author_id in dict.fromkeys(pairs)])
+
 
 if __name__ == "__main__":
     BaseModel.metadata.create_all(bind=Engine)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Column, DateTime, String, select
+from sqlalchemy.dialects.postgresql import JSONB, insert
+
+from app.models.setting import BaseModel, Engine, async_session_factory
+
+
+class BookMetadataModel(BaseModel):
+    """
+    BookMetadataModel
+
+    Persistent cache of the responses of Google Books API.
+
+    Attributes
+    ----------
+    isbn : str
+        normalized ISBN-13
+    volume_info : dict
+        raw volumeInfo of the ISBN
+        None if Google Books API does not know the ISBN
+    expires_at : datetime
+        the entry is ignored after this time
+    """
+    __tablename__ = 'book_metadata'
+    isbn = Column(String(13), primary_key=True)
+    volume_info = Column(JSONB, nullable=True)
+    expires_at = Column(DateTime, nullable=False)
+
+    def __init__(self,
+                 isbn: str,
+                 volume_info: Optional[Dict[str, Any]],
+                 expires_at: datetime,
+                 created_at: Optional[datetime] = None,
+                 updated_at: Optional[datetime] = None) -> None:
+        self.isbn = isbn
+        self.volume_info = volume_info
+        self.expires_at = expires_at
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    @classmethod
+    async def fetch_async(cls, isbn: str) -> Optional[BookMetadataModel]:
+        """
+        Fetch the cached response of the ISBN which is not expired
+
+        A short session of its own is used, so the lookup does not join the transaction of the request.
+
+        Parameters
+        ----------
+        isbn : str
+            normalized ISBN-13
+
+        Returns
+        -------
+        Optional[BookMetadataModel]
+            BookMetadataModel object, None if not cached or expired
+        """
+        stmt = select(BookMetadataModel).where(BookMetadataModel.isbn == isbn,
+                                               BookMetadataModel.expires_at > datetime.now())
+        async with async_session_factory() as cache_session:
+            return (await cache_session.execute(stmt)).scalars().one_or_none()
+
+    @classmethod
+    async def save_async(cls, isbn: str, volume_info: Optional[Dict[str, Any]], ttl: float) -> None:
+        """
+        Save the response of the ISBN, replacing the cached one
+
+        The entry is committed in a short session of its own, so it is kept
+        even if the transaction of the request is rolled back.
+
+        Parameters
+        ----------
+        isbn : str
+            normalized ISBN-13
+        volume_info : Optional[Dict[str, Any]]
+            raw volumeInfo, None if Google Books API does not know the ISBN
+        ttl : float
+            seconds until the entry expires
+        """
+        now = datetime.now()
+        values = {'isbn': isbn,
+                  'volume_info': volume_info,
+                  'expires_at': now + timedelta(seconds=ttl),
+                  'created_at': now,
+                  'updated_at': now}
+        stmt = insert(BookMetadataModel).values(**values)
+        stmt = stmt.on_conflict_do_update(index_elements=[BookMetadataModel.isbn],
+                                          set_={'volume_info': stmt.excluded.volume_info,
+                                                'expires_at': stmt.excluded.expires_at,
+                                                'updated_at': stmt.excluded.updated_at})
+        async with async_session_factory() as cache_session:
+            await cache_session.execute(stmt)
+            await cache_session.commit()
+
+
+if __name__ == "__main__":
+    BaseModel.metadata.create_all(bind=Engine)
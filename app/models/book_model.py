@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-from sqlalchemy import Column, Date, Integer, String, select
+from sqlalchemy import BigInteger, Column, Date, DateTime, Index, Integer, String, func, or_, select, update
+from sqlalchemy.dialects.postgresql import JSONB, array, insert
 
 from app.exceptions.exceptions import DuplicateBookIsbnException
-from app.models.setting import BaseModel, Engine, session
+from app.models.setting import BaseModel, Engine, async_session, async_session_factory, session
 
 
 class BookModel(BaseModel):
@@ -23,13 +24,31 @@ class BookModel(BaseModel):
         book isbn
     cover_path : str
         book cover path
+    cover_renditions : dict
+        paths of the smaller cover images by size and format
+    cover_url : str
+        URL of the cover image on Google Books, the cover is fetched on first access while cover_path is None
+    cover_claimed_at : datetime
+        time the cover worker claimed the book to fetch its cover
     """
     __tablename__ = 'books'
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String(256))
-    isbn = Column(String(13))
+    isbn = Column(String(13), index=True, unique=True)
     published_at = Column(Date, nullable=False)
     cover_path = Column(String(256))
+    cover_renditions = Column(JSONB, nullable=True)
+    cover_url = Column(String(1024), nullable=True)
+    cover_claimed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # books saved since a time, read by the refresh of the isbn filter
+        Index('ix_books_created_at', 'created_at'),
+        # books whose cover is not fetched yet, scanned by the cover worker
+        Index('ix_books_deferred_cover', 'id',
+              postgresql_where=(cover_path.is_(None) & cover_url.isnot(None))),
+        BaseModel.__table_args__,
+    )
 
     def __init__(self,
                  title,
@@ -37,49 +56,288 @@ class BookModel(BaseModel):
                  cover_path,
                  published_at,
                  created_at: Optional[datetime] = None,
-                 updated_at: Optional[datetime] = None) -> None:
+                 updated_at: Optional[datetime] = None,
+                 cover_renditions: Optional[Dict[str, Dict[str, str]]] = None,
+                 cover_url: Optional[str] = None) -> None:
         self.title = title
         self.isbn = isbn
         self.cover_path = cover_path
+        self.cover_renditions = cover_renditions
+        self.cover_url = cover_url
+        # asyncpg does not accept date strings such as '2021-01-01'
+        if isinstance(published_at, str):
+            published_at = date.fromisoformat(published_at)
         self.published_at = published_at
         self.created_at = created_at
         self.updated_at = updated_at
 
-    def _is_duplicated(self) -> bool:
-        """
-        Check if book's isbn is duplicated
+    def _insert_statement(self):
+        """INSERT of the book which does nothing if the isbn is already saved
 
         Returns
         -------
-        bool
-            True if book's isbn is duplicated
+        Insert
+            statement returning the saved BookModel object, no row if the isbn is duplicated
         """
-        stmt = select(BookModel).where(BookModel.isbn == self.isbn)
-        result = session.execute(stmt).scalars().one_or_none()
-        if result is None:
-            return False
-        else:
-            return True
+        values = {'title': self.title,
+                  'isbn': self.isbn,
+                  'cover_path': self.cover_path,
+                  'cover_renditions': self.cover_renditions,
+                  'cover_url': self.cover_url,
+                  'published_at': self.published_at}
+        if self.created_at is not None:
+            values['created_at'] = self.created_at
+        if self.updated_at is not None:
+            values['updated_at'] = self.updated_at
+        return insert(BookModel)\
+            .values(**values)\
+            .on_conflict_do_nothing(index_elements=[BookModel.isbn])\
+            .returning(BookModel)
 
     def save_google_books_api(self) -> BookModel:
         """Save book from Google Books API
 
+        The unique index of isbn detects the duplication, no SELECT is executed beforehand.
+
+        Returns
+        -------
+        BookModel
+            saved BookModel object
+
+        Raises
+        ------
+        DuplicateBookIsbnException
+            If book's isbn is duplicated
+        """
+        saved_book = session.scalars(self._insert_statement()).one_or_none()
+        if saved_book is None:
+            raise DuplicateBookIsbnException()
+        return saved_book
+
+    async def save_google_books_api_async(self) -> BookModel:
+        """Save book from Google Books API with AsyncSession
+
+        The unique index of isbn detects the duplication, no SELECT is executed beforehand.
+
         Returns
         -------
         BookModel
-            BookModel object
+            saved BookModel object
 
         Raises
         ------
         DuplicateBookIsbnException
             If book's isbn is duplicated
         """
-        if self._is_duplicated():
+        saved_book = (await async_session.scalars(self._insert_statement())).one_or_none()
+        if saved_book is None:
             raise DuplicateBookIsbnException()
-        else:
-            session.add(self)
-            session.flush()
-            return self
+        return saved_book
+
+    @classmethod
+    async def lock_isbns_async(cls, isbns: List[str]) -> None:
+        """Lock the isbns until the end of the transaction with AsyncSession
+
+        Uses transaction level advisory locks of PostgreSQL keyed on the isbn,
+        so ingestion of the same isbn is serialized across workers.
+        The locks are taken in ascending order to avoid deadlocks between batches.
+
+        Parameters
+        ----------
+        isbns : List[str]
+            normalized ISBN-13
+        """
+        if not isbns:
+            return
+        key = func.unnest(array(sorted({int(isbn) for isbn in isbns}), type_=BigInteger)).column_valued('key')
+        stmt = select(func.pg_advisory_xact_lock(key)).order_by(key)
+        await async_session.execute(stmt.execution_options(use_primary=True))
+
+    @classmethod
+    async def exists_async(cls, isbn: str) -> bool:
+        """Check if the isbn is saved with AsyncSession
+
+        Reads only the unique index of isbn on the primary.
+
+        Parameters
+        ----------
+        isbn : str
+            normalized ISBN-13
+
+        Returns
+        -------
+        bool
+            True if the isbn is saved
+        """
+        stmt = select(BookModel.isbn).where(BookModel.isbn == isbn).limit(1).execution_options(use_primary=True)
+        return (await async_session.execute(stmt)).first() is not None
+
+    @classmethod
+    async def fetch_isbns_since_async(cls, created_at: Optional[datetime]) -> List[str]:
+        """Fetch isbns of the books saved at or after the time
+
+        A short session of its own is used, so it can be called outside of the request scope.
+
+        Parameters
+        ----------
+        created_at : Optional[datetime]
+            time the books were saved at or after, None for all books
+
+        Returns
+        -------
+        List[str]
+            isbns
+        """
+        stmt = select(BookModel.isbn)
+        if created_at is not None:
+            stmt = stmt.where(BookModel.created_at >= created_at)
+        async with async_session_factory() as isbn_session:
+            return (await isbn_session.execute(stmt)).scalars().all()
+
+    @classmethod
+    async def fetch_cover_async(cls, isbn: str) -> Optional[Tuple[Optional[str],
+                                                                  Optional[Dict[str, Dict[str, str]]],
+                                                                  Optional[str]]]:
+        """Fetch the cover of the book with AsyncSession
+
+        Parameters
+        ----------
+        isbn : str
+            normalized ISBN-13
+
+        Returns
+        -------
+        Optional[Tuple[Optional[str], Optional[Dict[str, Dict[str, str]]], Optional[str]]]
+            cover_path, cover_renditions and cover_url, None if the book is not found
+        """
+        stmt = select(BookModel.cover_path, BookModel.cover_renditions, BookModel.cover_url)\
+            .where(BookModel.isbn == isbn)
+        return (await async_session.execute(stmt)).first()
+
+    @classmethod
+    async def save_cover_async(cls,
+                               isbn: str,
+                               cover_path: str,
+                               cover_renditions: Optional[Dict[str, Dict[str, str]]]) -> bool:
+        """Save the fetched cover of a book whose cover was deferred with AsyncSession
+
+        Parameters
+        ----------
+        isbn : str
+            normalized ISBN-13
+        cover_path : str
+            key of the cover image
+        cover_renditions : Optional[Dict[str, Dict[str, str]]]
+            keys of the renditions by size and format
+
+        Returns
+        -------
+        bool
+            True if saved, False if the book already has a cover
+        """
+        stmt = update(BookModel)\
+            .where(BookModel.isbn == isbn, BookModel.cover_path.is_(None))\
+            .values(cover_path=cover_path, cover_renditions=cover_renditions, updated_at=datetime.now())\
+            .returning(BookModel.id)
+        return (await async_session.execute(stmt)).first() is not None
+
+    @classmethod
+    async def clear_cover_url_async(cls, isbn: str) -> None:
+        """Stop fetching the cover of a book whose cover can not be fetched with AsyncSession
+
+        Parameters
+        ----------
+        isbn : str
+            normalized ISBN-13
+        """
+        stmt = update(BookModel)\
+            .where(BookModel.isbn == isbn, BookModel.cover_path.is_(None))\
+            .values(cover_url=None, updated_at=datetime.now())
+        await async_session.execute(stmt)
+
+    @classmethod
+    async def claim_deferred_covers_async(cls, limit: int, lease_seconds: float) -> List[Tuple[str, str]]:
+        """Claim books whose cover is not fetched yet and not claimed by other workers with AsyncSession
+
+        The claim is a lease recorded on the books, the caller commits it right away
+        so that no lock is held while the covers are fetched. Books whose lease expired,
+        because the cover could not be fetched or the worker stopped, are claimed again.
+
+        Parameters
+        ----------
+        limit : int
+            maximum number of books
+        lease_seconds : float
+            seconds until other workers may claim the books
+
+        Returns
+        -------
+        List[Tuple[str, str]]
+            isbn and cover_url
+        """
+        now = datetime.now()
+        claimable = select(BookModel.id)\
+            .where(BookModel.cover_path.is_(None),
+                   BookModel.cover_url.isnot(None),
+                   or_(BookModel.cover_claimed_at.is_(None),
+                       BookModel.cover_claimed_at < now - timedelta(seconds=lease_seconds)))\
+            .order_by(BookModel.id)\
+            .limit(limit)\
+            .with_for_update(skip_locked=True)
+        stmt = update(BookModel)\
+            .where(BookModel.id.in_(claimable))\
+            .values(cover_claimed_at=now)\
+            .returning(BookModel.isbn, BookModel.cover_url)
+        return (await async_session.execute(stmt)).all()
+
+    @classmethod
+    async def fetch_existing_isbns_async(cls, isbns: List[str]) -> Set[str]:
+        """Fetch isbns which are already saved with AsyncSession
+
+        Always reads the primary, the result decides what to insert.
+
+        Parameters
+        ----------
+        isbns : List[str]
+            book isbns
+
+        Returns
+        -------
+        Set[str]
+            saved isbns among the given isbns
+        """
+        if not isbns:
+            return set()
+        stmt = select(BookModel.isbn).where(BookModel.isbn.in_(isbns)).execution_options(use_primary=True)
+        result = (await async_session.execute(stmt)).scalars().all()
+        return set(result)
+
+    @classmethod
+    async def save_many_async(cls, books: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Save books in a single statement with AsyncSession
+
+        Parameters
+        ----------
+        books : List[Dict[str, Any]]
+            books with title, isbn, cover_path, cover_renditions, cover_url and published_at
+
+        Returns
+        -------
+        Dict[str, int]
+            book id for each isbn, isbns which are already saved are not included
+        """
+        if not books:
+            return {}
+        # asyncpg does not accept date strings such as '2021-01-01'
+        values = [dict(book, published_at=date.fromisoformat(book['published_at']))
+                  if isinstance(book['published_at'], str) else book
+                  for book in books]
+        stmt = insert(BookModel)\
+            .values(values)\
+            .on_conflict_do_nothing(index_elements=[BookModel.isbn])\
+            .returning(BookModel.id, BookModel.isbn)
+        result = await async_session.execute(stmt)
+        return {isbn: book_id for book_id, isbn in result.all()}
 
 
 if __name__ == "__main__":
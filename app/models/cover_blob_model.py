@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional, Set
+
+from sqlalchemy import Column, Integer, String, delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.setting import BaseModel, Engine, async_session, async_session_factory
+
+
+class CoverBlobModel(BaseModel):
+    """
+    CoverBlobModel
+
+    Reference count of a cover image blob, the number of books using it as cover or rendition.
+    The row is written before the blob, blobs whose row is unreferenced for a while are deleted with it.
+
+    Attributes
+    ----------
+    key : str
+        key of the blob in the cover storage
+    refcount : int
+        number of references
+    """
+    __tablename__ = 'cover_blobs'
+    key = Column(String(128), primary_key=True)
+    refcount = Column(Integer, nullable=False, default=0)
+
+    def __init__(self,
+                 key: str,
+                 refcount: int = 0,
+                 created_at: Optional[datetime] = None,
+                 updated_at: Optional[datetime] = None) -> None:
+        self.key = key
+        self.refcount = refcount
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    @classmethod
+    async def acquire_async(cls, keys: List[str]) -> None:
+        """
+        Add references to blobs in a single statement with AsyncSession
+
+        Parameters
+        ----------
+        keys : List[str]
+            keys of the blobs, a key given twice gets two references
+        """
+        if not keys:
+            return
+        stmt = insert(CoverBlobModel).values([{'key': key, 'refcount': count}
+                                              for key, count in sorted(Counter(keys).items())])
+        stmt = stmt.on_conflict_do_update(index_elements=[CoverBlobModel.key],
+                                          set_={'refcount': CoverBlobModel.refcount + stmt.excluded.refcount,
+                                                'updated_at': datetime.now()})
+        await async_session.execute(stmt)
+
+    @classmethod
+    async def touch_async(cls, key: str) -> None:
+        """
+        Record that a blob is being stored, committed before the blob is written
+
+        A short session of its own is used, so the row is visible to the garbage collection
+        before the transaction referencing the blob commits.
+        If the garbage collection is deleting the blob, this waits until it is deleted,
+        so the caller writes the blob again. Referenced blobs are left as they are,
+        without waiting for the locks of transactions referencing them.
+
+        Parameters
+        ----------
+        key : str
+            key of the blob
+        """
+        stmt = insert(CoverBlobModel).values(key=key, refcount=0)
+        stmt = stmt.on_conflict_do_update(index_elements=[CoverBlobModel.key],
+                                          set_={'updated_at': datetime.now()})
+        async with async_session_factory() as touch_session:
+            refcount = await touch_session.scalar(select(CoverBlobModel.refcount)
+                                                  .where(CoverBlobModel.key == key)
+                                                  .execution_options(use_primary=True))
+            if refcount is not None and refcount > 0:
+                return
+            await touch_session.execute(stmt)
+            await touch_session.commit()
+
+    @classmethod
+    async def fetch_untracked_keys_async(cls, keys: List[str]) -> List[str]:
+        """
+        Fetch keys of blobs which have no row with AsyncSession
+
+        Parameters
+        ----------
+        keys : List[str]
+            keys of the blobs
+
+        Returns
+        -------
+        List[str]
+            keys without row
+        """
+        if not keys:
+            return []
+        stmt = select(CoverBlobModel.key).where(CoverBlobModel.key.in_(keys)).execution_options(use_primary=True)
+        tracked: Set[str] = set((await async_session.execute(stmt)).scalars().all())
+        return [key for key in keys if key not in tracked]
+
+    @classmethod
+    async def track_async(cls, keys: List[str]) -> None:
+        """
+        Add unreferenced rows of blobs which have no row with AsyncSession
+
+        Parameters
+        ----------
+        keys : List[str]
+            keys of the blobs
+        """
+        if not keys:
+            return
+        stmt = insert(CoverBlobModel)\
+            .values([{'key': key, 'refcount': 0} for key in sorted(set(keys))])\
+            .on_conflict_do_nothing(index_elements=[CoverBlobModel.key])
+        await async_session.execute(stmt)
+
+    @classmethod
+    async def delete_unreferenced_async(cls, updated_before: datetime, limit: int) -> List[str]:
+        """
+        Delete rows of blobs which are unreferenced since the time with AsyncSession
+
+        The rows stay locked until the end of the transaction, the caller deletes the blobs before it commits.
+
+        Parameters
+        ----------
+        updated_before : datetime
+            rows updated before the time are deleted
+        limit : int
+            maximum number of rows
+
+        Returns
+        -------
+        List[str]
+            keys of the deleted rows
+        """
+        keys = select(CoverBlobModel.key)\
+            .where(CoverBlobModel.refcount <= 0, CoverBlobModel.updated_at < updated_before)\
+            .order_by(CoverBlobModel.key)\
+            .limit(limit)\
+            .with_for_update(skip_locked=True)
+        stmt = delete(CoverBlobModel)\
+            .where(CoverBlobModel.key.in_(keys), CoverBlobModel.refcount <= 0)\
+            .returning(CoverBlobModel.key)
+        return list((await async_session.execute(stmt)).scalars().all())
+
+
+if __name__ == "__main__":
+    BaseModel.metadata.create_all(bind=Engine)
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, insert, select, update
+
+from app.models.setting import BaseModel, Engine, async_session
+from app.schemas.responses.book import BookIngestionStatus
+
+
+class IngestionJobStatus:
+    """
+    Class to define the status of an ingestion job.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+
+
+class IngestionJobModel(BaseModel):
+    """
+    IngestionJobModel
+
+    A request to ingest books from Google Books API in the background.
+
+    Attributes
+    ----------
+    id : int
+        job id
+    total : int
+        number of isbns of the job
+    """
+    __tablename__ = 'ingestion_jobs'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    total = Column(Integer, nullable=False)
+
+    def __init__(self,
+                 total: int,
+                 created_at: Optional[datetime] = None,
+                 updated_at: Optional[datetime] = None) -> None:
+        self.total = total
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    @classmethod
+    async def enqueue_async(cls, isbns: List[str]) -> IngestionJobModel:
+        """
+        Save a job and its items with AsyncSession
+
+        Parameters
+        ----------
+        isbns : List[str]
+            normalized ISBN-13 without duplicates
+
+        Returns
+        -------
+        IngestionJobModel
+            IngestionJobModel object
+        """
+        job = cls(total=len(isbns))
+        async_session.add(job)
+        await async_session.flush()
+        await async_session.execute(insert(IngestionJobItemModel),
+                                    [{'job_id': job.id, 'isbn': isbn, 'status': BookIngestionStatus.QUEUED}
+                                     for isbn in isbns])
+        return job
+
+    @classmethod
+    async def fetch_async(cls, job_id: int) -> Optional[IngestionJobModel]:
+        """
+        Fetch job by id with AsyncSession
+
+        Parameters
+        ----------
+        job_id : int
+            job id
+
+        Returns
+        -------
+        Optional[IngestionJobModel]
+            IngestionJobModel object, None if not found
+        """
+        return await async_session.get(IngestionJobModel, job_id)
+
+
+class IngestionJobItemModel(BaseModel):
+    """
+    IngestionJobItemModel
+
+    One isbn of an ingestion job, the queue consumed by the ingestion workers.
+
+    Attributes
+    ----------
+    id : int
+        item id
+    job_id : int
+        job id is foreign key from ingestion_jobs table
+    isbn : str
+        normalized ISBN-13
+    status : str
+        queued until a worker ingests it, then one of BookIngestionStatus
+    detail : str
+        detail of the result
+    """
+    __tablename__ = 'ingestion_job_items'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(Integer, ForeignKey(IngestionJobModel.id), nullable=False, index=True)
+    isbn = Column(String(13), nullable=False)
+    status = Column(String(32), nullable=False)
+    detail = Column(String(256), nullable=True)
+
+    __table_args__ = (
+        # only queued items are scanned by the workers
+        Index('ix_ingestion_job_items_queued', 'id',
+              postgresql_where=status == BookIngestionStatus.QUEUED),
+        BaseModel.__table_args__,
+    )
+
+    def __init__(self,
+                 job_id: int,
+                 isbn: str,
+                 status: str = BookIngestionStatus.QUEUED,
+                 detail: Optional[str] = None,
+                 created_at: Optional[datetime] = None,
+                 updated_at: Optional[datetime] = None) -> None:
+        self.job_id = job_id
+        self.isbn = isbn
+        self.status = status
+        self.detail = detail
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    @classmethod
+    async def claim_async(cls, limit: int) -> List[IngestionJobItemModel]:
+        """
+        Lock queued items which are not locked by other workers with AsyncSession
+
+        The items stay locked until the end of the transaction,
+        they are queued again if the transaction is rolled back.
+
+        Parameters
+        ----------
+        limit : int
+            maximum number of items
+
+        Returns
+        -------
+        List[IngestionJobItemModel]
+            locked items, oldest first
+        """
+        stmt = select(IngestionJobItemModel)\
+            .where(IngestionJobItemModel.status == BookIngestionStatus.QUEUED)\
+            .order_by(IngestionJobItemModel.id)\
+            .limit(limit)\
+            .with_for_update(skip_locked=True)
+        return (await async_session.execute(stmt)).scalars().all()
+
+    @classmethod
+    async def fail_async(cls, item_ids: List[int], detail: str) -> None:
+        """
+        Mark queued items as failed with AsyncSession
+
+        Parameters
+        ----------
+        item_ids : List[int]
+            item ids
+        detail : str
+            reason of the failure
+        """
+        stmt = update(IngestionJobItemModel)\
+            .where(IngestionJobItemModel.id.in_(item_ids),
+                   IngestionJobItemModel.status == BookIngestionStatus.QUEUED)\
+            .values(status=BookIngestionStatus.FAILED, detail=detail[:256], updated_at=datetime.now())
+        await async_session.execute(stmt)
+
+    @classmethod
+    async def fetch_by_job_id_async(cls, job_id: int) -> List[IngestionJobItemModel]:
+        """
+        Fetch items of the job with AsyncSession
+
+        Parameters
+        ----------
+        job_id : int
+            job id
+
+        Returns
+        -------
+        List[IngestionJobItemModel]
+            items in the order of the isbns of the job
+        """
+        stmt = select(IngestionJobItemModel)\
+            .where(IngestionJobItemModel.job_id == job_id)\
+            .order_by(IngestionJobItemModel.id)
+        return (await async_session.execute(stmt)).scalars().all()
+
+
+if __name__ == "__main__":
+    BaseModel.metadata.create_all(bind=Engine)
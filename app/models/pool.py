@@ -0,0 +1,100 @@
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class CheckoutWaitStats:
+    """
+    CheckoutWaitStats
+
+    Attributes
+    ----------
+    checkouts : int
+        number of connections checked out of the pool
+    timeouts : int
+        number of checkouts which gave up after pool_timeout
+    wait_seconds_total : float
+        total time spent waiting for a connection
+    wait_seconds_max : float
+        longest time spent waiting for a connection
+    """
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, wait_seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+
+class _InstrumentedPoolMixin:
+    """Measures how long each checkout waits for a connection"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_stats = CheckoutWaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # Engine.dispose() replaces the pool, keep the stats of the worker
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """QueuePool with checkout wait statistics"""
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool with checkout wait statistics"""
+
+
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    """Snapshot of the connection pool of the engine
+
+    Parameters
+    ----------
+    engine : Engine
+        engine whose pool is reported
+
+    Returns
+    -------
+    Dict[str, Any]
+        size, checked_out, idle and overflow connections and checkout wait statistics
+    """
+    pool = engine.pool
+    stats: CheckoutWaitStats = pool.wait_stats
+    return {
+        'size': pool.size(),
+        'checked_out': pool.checkedout(),
+        'idle': pool.checkedin(),
+        'overflow': max(pool.overflow(), 0),
+        'max_overflow': pool._max_overflow,
+        'checkouts': stats.checkouts,
+        'timeouts': stats.timeouts,
+        'wait_seconds_total': round(stats.wait_seconds_total, 6),
+        'wait_seconds_max': round(stats.wait_seconds_max, 6),
+    }
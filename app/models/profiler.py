@@ -0,0 +1,186 @@
+import heapq
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Tuple
+
+import greenlet
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+profiler_logger = getLogger('app.sql')
+
+# a statement executed this many times within one request is reported as N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv('SQL_N_PLUS_ONE_THRESHOLD', '5'))
+# number of slowest statements kept per request and per worker
+SLOWEST_STATEMENTS = int(os.getenv('SQL_SLOWEST_STATEMENTS', '3'))
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class QueryProfile:
+    """
+    QueryProfile
+
+    Statements executed while the profile is active, usually during one request.
+
+    Attributes
+    ----------
+    statement_count : int
+        number of executed statements
+    total_seconds : float
+        total time spent executing statements
+    slowest : List[Tuple[float, str]]
+        slowest statements as (seconds, statement), slowest first
+    n_plus_one : Dict[str, str]
+        repeated statements mapped to the call site which repeated them
+    """
+
+    def __init__(self) -> None:
+        self.statement_count = 0
+        self.total_seconds = 0.0
+        self.shapes: Counter = Counter()
+        self.n_plus_one: Dict[str, str] = {}
+        self._slowest: List[Tuple[float, str]] = []
+
+    @property
+    def slowest(self) -> List[Tuple[float, str]]:
+        return sorted(self._slowest, reverse=True)
+
+    def record(self, statement: str, seconds: float) -> None:
+        """Record executed statement
+
+        Parameters
+        ----------
+        statement : str
+            statement with bound parameter placeholders, i.e. the shape of the query
+        seconds : float
+            execution time
+        """
+        self.statement_count += 1
+        self.total_seconds += seconds
+        if len(self._slowest) < SLOWEST_STATEMENTS:
+            heapq.heappush(self._slowest, (seconds, statement))
+        else:
+            heapq.heappushpop(self._slowest, (seconds, statement))
+
+        self.shapes[statement] += 1
+        if self.shapes[statement] == N_PLUS_ONE_THRESHOLD:
+            self.n_plus_one[statement] = _call_site()
+
+
+current_profile: ContextVar[Optional[QueryProfile]] = ContextVar('current_profile', default=None)
+
+
+def _call_site() -> str:
+    """Find the application frames which executed the current statement
+
+    Statements of AsyncSession run in a greenlet, so the frames of the awaiting
+    coroutines are found by continuing with the parent greenlet.
+
+    Returns
+    -------
+    str
+        application frames, innermost first
+    """
+    frames = []
+    frame = sys._getframe(1)
+    current = greenlet.getcurrent()
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_ROOT) and filename != __file__:
+            frames.append(f"{os.path.relpath(filename, os.path.dirname(APP_ROOT))}:{frame.f_lineno}"
+                          f" in {frame.f_code.co_name}")
+        frame = frame.f_back
+        if frame is None and current.parent is not None:
+            current = current.parent
+            frame = current.gr_frame
+    return ' <- '.join(frames)
+
+
+class QueryProfiler:
+    """
+    QueryProfiler
+
+    Aggregates the query profiles of finished requests per route for the metrics endpoint.
+    """
+    _lock = threading.Lock()
+    _routes: Dict[str, Dict[str, Any]] = {}
+    _slowest: List[Tuple[float, str]] = []
+    _n_plus_one: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def collect(cls, route: str, profile: QueryProfile) -> None:
+        """Aggregate the profile of a finished request
+
+        Parameters
+        ----------
+        route : str
+            route path of the request
+        profile : QueryProfile
+            profile of the request
+        """
+        with cls._lock:
+            stats = cls._routes.setdefault(route, {'requests': 0,
+                                                   'statements': 0,
+                                                   'db_seconds': 0.0,
+                                                   'max_statements': 0})
+            stats['requests'] += 1
+            stats['statements'] += profile.statement_count
+            stats['db_seconds'] += profile.total_seconds
+            stats['max_statements'] = max(stats['max_statements'], profile.statement_count)
+
+            for seconds, statement in profile.slowest:
+                if len(cls._slowest) < SLOWEST_STATEMENTS:
+                    heapq.heappush(cls._slowest, (seconds, statement))
+                else:
+                    heapq.heappushpop(cls._slowest, (seconds, statement))
+
+            for statement, call_site in profile.n_plus_one.items():
+                offender = cls._n_plus_one.setdefault(statement, {'route': route,
+                                                                  'call_site': call_site,
+                                                                  'requests': 0})
+                offender['requests'] += 1
+
+        for statement, call_site in profile.n_plus_one.items():
+            profiler_logger.warning('N+1 query on %s: %d times %r at %s',
+                                    route, profile.shapes[statement], statement, call_site)
+
+    @classmethod
+    def metrics(cls) -> Dict[str, Any]:
+        with cls._lock:
+            return {
+                'routes': {route: dict(stats, db_seconds=round(stats['db_seconds'], 6))
+                           for route, stats in cls._routes.items()},
+                'slowest': [{'seconds': round(seconds, 6), 'statement': statement}
+                            for seconds, statement in sorted(cls._slowest, reverse=True)],
+                'n_plus_one': [dict(offender, statement=statement)
+                               for statement, offender in cls._n_plus_one.items()],
+            }
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.query_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    if profile is not None and context is not None:
+        profile.record(statement, time.perf_counter() - context.query_start_time)
+
+
+def instrument(engine: Engine) -> None:
+    """Record statements executed by the engine in the current QueryProfile
+
+    Parameters
+    ----------
+    engine : Engine
+        engine to instrument, use AsyncEngine.sync_engine for AsyncEngine
+    """
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
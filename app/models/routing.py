@@ -0,0 +1,68 @@
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, SessionTransaction
+from sqlalchemy.sql import Select
+
+
+class RoutingSession(Session):
+    """
+    RoutingSession
+
+    Session which sends read-only statements to the replica engine.
+    Once the transaction has written, every statement goes to the primary engine
+    until the transaction ends, so that the transaction reads its own writes.
+
+    A statement can be pinned to the primary engine with
+    ``stmt.execution_options(use_primary=True)``.
+
+    Attributes
+    ----------
+    primary : Engine
+        engine for writes
+    replica : Engine, optional
+        engine for reads, every statement goes to primary when it is None
+    has_written : bool
+        True if the current transaction has written
+    """
+
+    def __init__(self, *args, primary: Engine, replica: Optional[Engine] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.primary = primary
+        self.replica = replica
+        self.has_written = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs) -> Engine:
+        if self.replica is None:
+            return self.primary
+        if self._flushing or (clause is not None and not self._is_read_only(clause)):
+            self.has_written = True
+            return self.primary
+        if clause is None:
+            return self.primary
+        if self.has_written or clause.get_execution_options().get('use_primary', False):
+            return self.primary
+        return self.replica
+
+    @staticmethod
+    def _is_read_only(clause) -> bool:
+        """Check if clause is a plain SELECT
+
+        Parameters
+        ----------
+        clause : ClauseElement
+            statement to execute
+
+        Returns
+        -------
+        bool
+            True if the statement can be served by the replica
+        """
+        return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _reset_has_written(session: RoutingSession, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.has_written = False
@@ -1,11 +1,22 @@
 import os
+import threading
+from asyncio import current_task
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from datetime import datetime
+from typing import AsyncIterator, Optional
 from urllib.parse import quote_plus
 
 from sqlalchemy import Column, DateTime, MetaData, create_engine
+from sqlalchemy.ext.asyncio import async_scoped_session, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
 
+from app.core.metrics import Metrics
+from app.models.pool import InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool, pool_status
+from app.models.profiler import QueryProfiler, instrument
+from app.models.routing import RoutingSession
+
 # Engine
 SERVER = os.getenv('POSTGRES_SERVER')
 USER = os.getenv('POSTGRES_USER')
@@ -13,18 +24,142 @@ PASSWORD = os.getenv('POSTGRES_PASSWORD')
 DB = os.getenv('POSTGRES_DB')
 PORT = os.getenv('POSTGRES_PORT')
 
+# Replica (optional)
+REPLICA_SERVER = os.getenv('POSTGRES_REPLICA_SERVER')
+REPLICA_PORT = os.getenv('POSTGRES_REPLICA_PORT', PORT)
+
+# Pool
+# the pool is per process, so size it per gunicorn worker
+POOL_SIZE = int(os.getenv('POSTGRES_POOL_SIZE', '5'))
+POOL_MAX_OVERFLOW = int(os.getenv('POSTGRES_POOL_MAX_OVERFLOW', '10'))
+POOL_TIMEOUT = float(os.getenv('POSTGRES_POOL_TIMEOUT', '30'))
+POOL_RECYCLE = int(os.getenv('POSTGRES_POOL_RECYCLE', '1800'))
+POOL_PRE_PING = os.getenv('POSTGRES_POOL_PRE_PING', 'true').lower() == 'true'
+
+POOL_OPTIONS = {
+    'pool_size': POOL_SIZE,
+    'max_overflow': POOL_MAX_OVERFLOW,
+    'pool_timeout': POOL_TIMEOUT,
+    'pool_recycle': POOL_RECYCLE,
+    'pool_pre_ping': POOL_PRE_PING,
+}
+
 Engine = create_engine(
     "postgresql://{}:{}@{}:{}/{}?client_encoding=utf8".format(USER, quote_plus(PASSWORD), SERVER, PORT, DB),
-    echo=False
+    echo=False,
+    poolclass=InstrumentedQueuePool,
+    **POOL_OPTIONS
+)
+
+# AsyncEngine
+# asyncpg backed engine for coroutines, so that queries do not block the event loop
+AsyncEngine = create_async_engine(
+    "postgresql+asyncpg://{}:{}@{}:{}/{}".format(USER, quote_plus(PASSWORD), SERVER, PORT, DB),
+    echo=False,
+    poolclass=InstrumentedAsyncAdaptedQueuePool,
+    **POOL_OPTIONS
 )
 
+# ReplicaEngine
+# read-only statements are routed here by RoutingSession when POSTGRES_REPLICA_SERVER is set
+ReplicaEngine = None
+AsyncReplicaEngine = None
+if REPLICA_SERVER:
+    ReplicaEngine = create_engine(
+        "postgresql://{}:{}@{}:{}/{}?client_encoding=utf8".format(USER, quote_plus(PASSWORD),
+                                                                  REPLICA_SERVER, REPLICA_PORT, DB),
+        echo=False,
+        poolclass=InstrumentedQueuePool,
+        **POOL_OPTIONS
+    )
+    AsyncReplicaEngine = create_async_engine(
+        "postgresql+asyncpg://{}:{}@{}:{}/{}".format(USER, quote_plus(PASSWORD), REPLICA_SERVER, REPLICA_PORT, DB),
+        echo=False,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        **POOL_OPTIONS
+    )
+
+
+def _collect_pool_metrics():
+    metrics = {
+        'primary': pool_status(Engine),
+        'primary_async': pool_status(AsyncEngine.sync_engine),
+    }
+    if REPLICA_SERVER:
+        metrics['replica'] = pool_status(ReplicaEngine)
+        metrics['replica_async'] = pool_status(AsyncReplicaEngine.sync_engine)
+    return metrics
+
+
+Metrics.register('db_pool', _collect_pool_metrics)
+
+# Profiler
+for _engine in (Engine, AsyncEngine.sync_engine, ReplicaEngine, AsyncReplicaEngine and AsyncReplicaEngine.sync_engine):
+    if _engine is not None:
+        instrument(_engine)
+
+Metrics.register('sql', QueryProfiler.metrics)
+
+# Scope
+# set by session_scope() so that every request gets its own session,
+# uvicorn runs all coroutines of a worker in one thread so the thread can not be used as a key
+request_scope: ContextVar[Optional[object]] = ContextVar('request_scope', default=None)
+
+
+def _session_scopefunc():
+    scope = request_scope.get()
+    return threading.get_ident() if scope is None else scope
+
+
+def _async_session_scopefunc():
+    scope = request_scope.get()
+    return current_task() if scope is None else scope
+
+
 # Session
 session = scoped_session(
     sessionmaker(Engine,
+                 class_=RoutingSession,
+                 primary=Engine,
+                 replica=ReplicaEngine,
                  autoflush=False,
-                 autocommit=False)
+                 autocommit=False),
+    scopefunc=_session_scopefunc
 )
 
+# AsyncSession
+async_session_factory = async_sessionmaker(AsyncEngine,
+                                           sync_session_class=RoutingSession,
+                                           primary=AsyncEngine.sync_engine,
+                                           replica=AsyncReplicaEngine.sync_engine if AsyncReplicaEngine else None,
+                                           autoflush=False,
+                                           expire_on_commit=False)
+async_session = async_scoped_session(async_session_factory, scopefunc=_async_session_scopefunc)
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[None]:
+    """Open a new session scope
+
+    session and async_session resolve to sessions owned by this scope.
+    Both are committed when the block exits normally, rolled back when it raises
+    and always removed so that their connections go back to the pool.
+    Use it for work outside of requests, e.g. background workers.
+    """
+    token = request_scope.set(object())
+    try:
+        yield
+        await async_session.commit()
+        session.commit()
+    except Exception:
+        await async_session.rollback()
+        session.rollback()
+        raise
+    finally:
+        await async_session.remove()
+        session.remove()
+        request_scope.reset(token)
+
 
 class BaseModel(object):
     """BaseModel
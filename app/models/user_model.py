@@ -1,14 +1,41 @@
+from __future__ import annotations
+
 import re
 import secrets
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
-import bcrypt
-from sqlalchemy import Boolean, Column, Integer, String, select
+from sqlalchemy import Boolean, Column, Integer, String, select, update
 
 from app.core.security import AppRoles
 from app.exceptions.exceptions import DuplicateUserException, InvalidUserEmailFormatException, UserNotFoundException
-from app.models.setting import BaseModel, Engine, session
+from app.models.setting import BaseModel, Engine, async_session, session
+from app.services.password_service import PasswordService
+
+
+@dataclass(frozen=True)
+class UserAuthentication:
+    """Result of UserModel.authenticate_user_async
+
+    Attributes
+    ----------
+    id : int
+        user id
+    name : str
+        user name
+    role : str
+        user role
+    is_verified : bool
+        True if the user is verified
+    is_authenticated : bool
+        True if the password is valid, always False for users who are not verified
+    """
+    id: int
+    name: str
+    role: str
+    is_verified: bool
+    is_authenticated: bool
 
 
 class UserModel(BaseModel):
@@ -42,15 +69,21 @@ class UserModel(BaseModel):
     def __init__(self,
                  name: str,
                  email: str,
-                 password: str,
+                 password: Optional[str] = None,
                  role: str = AppRoles.USER,
                  is_verified: bool = False,
                  verification_token: str = secrets.token_urlsafe(16),
                  created_at: Optional[datetime] = None,
-                 updated_at: Optional[datetime] = None) -> None:
+                 updated_at: Optional[datetime] = None,
+                 password_hash: Optional[str] = None) -> None:
 
-        self.salt = bcrypt.gensalt().decode()
-        self.password = self._hash_password(password, self.salt)
+        if password_hash is None:
+            self.salt = PasswordService.gensalt()
+            self.password = self._hash_password(password, self.salt)
+        else:
+            # hashed beforehand, the salt is the first 29 characters of a bcrypt hash
+            self.salt = password_hash[:29]
+            self.password = password_hash
         self.name = name
         self.email = self._validate_email(email)
         self.role = role
@@ -59,7 +92,8 @@ class UserModel(BaseModel):
         self.created_at = created_at
         self.updated_at = updated_at
 
-    def _validate_email(self, email: str) -> str:
+    @staticmethod
+    def _validate_email(email: str) -> str:
 
         pattern = r'^[\w\.-]+@[\w\.-]+\.\w+$'
 
@@ -83,7 +117,36 @@ class UserModel(BaseModel):
         str
             hashed password
         """
-        return bcrypt.hashpw(password.encode(), salt.encode()).decode()
+        return PasswordService.hash(password, salt)
+
+    @classmethod
+    async def create_async(cls, name: str, email: str, password: str, **kwargs) -> UserModel:
+        """Create user model hashing the password in the pool of PasswordService
+
+        Parameters
+        ----------
+        name : str
+            user name
+        email : str
+            user email
+        password : str
+            user password
+        **kwargs
+            other arguments of UserModel
+
+        Returns
+        -------
+        UserModel
+            user model, not saved yet
+
+        Raises
+        ------
+        InvalidUserEmailFormatException
+            if email is invalid
+        """
+        # reject invalid emails before spending a hash on them
+        cls._validate_email(email)
+        return cls(name=name, email=email, password_hash=await PasswordService.hash_async(password), **kwargs)
 
     def _is_duplicate(self, email: str) -> bool:
         """Check if user is duplicate
@@ -150,10 +213,89 @@ class UserModel(BaseModel):
         user = session.execute(stmt).scalars().one_or_none()
         if user is None:
             raise UserNotFoundException()
-        hashed_password = user.password
-        if bcrypt.checkpw(password.encode(), hashed_password.encode()):
-            return True
-        return False
+        return PasswordService.verify(password, user.password)
+
+    @classmethod
+    async def authenticate_async(cls, password: str, email: str) -> bool:
+        """Authenticate user with AsyncSession
+
+        The password is verified in the pool of PasswordService.
+        If the stored hash has a lower work factor than new hashes, it is replaced with a new hash.
+
+        Parameters
+        ----------
+        password : str
+            user password
+        email : str
+            user email
+
+        Returns
+        -------
+        bool
+            True if authentication is successful, False otherwise
+        """
+        stmt = select(UserModel.password).where(UserModel.email == email)
+        hashed_password = (await async_session.execute(stmt)).scalars().one_or_none()
+        if hashed_password is None:
+            raise UserNotFoundException()
+        return await cls._verify_password_async(password=password, email=email, hashed_password=hashed_password)
+
+    @classmethod
+    async def authenticate_user_async(cls, password: str, email: str) -> UserAuthentication:
+        """Fetch the user and authenticate them in a single query with AsyncSession
+
+        The password of a user who is not verified is not checked.
+
+        Parameters
+        ----------
+        password : str
+            user password
+        email : str
+            user email
+
+        Returns
+        -------
+        UserAuthentication
+            user and the result of the authentication
+
+        Raises
+        ------
+        UserNotFoundException
+            if user is not found
+        """
+        stmt = select(UserModel.id,
+                      UserModel.name,
+                      UserModel.role,
+                      UserModel.is_verified,
+                      UserModel.password,
+                      ).where(UserModel.email == email)
+        user = (await async_session.execute(stmt)).one_or_none()
+        if user is None:
+            raise UserNotFoundException()
+        is_authenticated = user.is_verified and \
+            await cls._verify_password_async(password=password, email=email, hashed_password=user.password)
+        return UserAuthentication(id=user.id,
+                                  name=user.name,
+                                  role=user.role,
+                                  is_verified=user.is_verified,
+                                  is_authenticated=is_authenticated)
+
+    @classmethod
+    async def _verify_password_async(cls, password: str, email: str, hashed_password: str) -> bool:
+        """Verify the password in the pool of PasswordService, replacing an outdated hash
+
+        If the stored hash has a lower work factor than new hashes, it is replaced with a new hash.
+        """
+        if not await PasswordService.verify_async(password, hashed_password):
+            return False
+        new_hashed_password = await PasswordService.rehash_async(password, hashed_password)
+        if new_hashed_password is not None:
+            # unless the password was changed meanwhile
+            stmt = update(UserModel)\
+                .where(UserModel.email == email, UserModel.password == hashed_password)\
+                .values(password=new_hashed_password, updated_at=datetime.now())
+            await async_session.execute(stmt)
+        return True
 
     @classmethod
     def fetch_user_by_email(cls, email: str) -> tuple:
@@ -183,6 +325,32 @@ class UserModel(BaseModel):
             raise UserNotFoundException()
         return user
 
+    @classmethod
+    async def fetch_user_by_email_async(cls, email: str) -> tuple:
+        """Fetch user by email with AsyncSession
+
+        Parameters
+        ----------
+        email : str
+            user email
+
+        Returns
+        -------
+        tuple
+            user tuple
+            (id, name, email, role, is_verified)
+        """
+        stmt = select(UserModel.id,
+                      UserModel.name,
+                      UserModel.email,
+                      UserModel.role,
+                      UserModel.is_verified,
+                      ).where(UserModel.email == email)
+        user = (await async_session.execute(stmt)).one_or_none()
+        if user is None:
+            raise UserNotFoundException()
+        return user
+
     @classmethod
     def exist_verification_token(cls, token) -> bool:
         stmt = select(UserModel).where(UserModel.verification_token == token)
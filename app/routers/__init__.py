@@ -2,3 +2,4 @@
 from app.routers.user_router import router as user_router
 from app.routers.login_router import router as login_router
 from app.routers.book_router import router as book_router
+from app.routers.metrics_router import router as metrics_router
@@ -1,18 +1,48 @@
-from fastapi import APIRouter, Depends
+import os
+from collections import Counter
+from typing import List, Literal, Optional
 
-from app.models import AuthorModel, BookAuthorModel, BookModel, session
+from fastapi import APIRouter, Depends, Header, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+
+from app import handle_errors
+from app.models import (
+    AuthorModel,
+    BookAuthorModel,
+    BookModel,
+    IngestionJobItemModel,
+    IngestionJobModel,
+    IngestionJobStatus,
+)
 from app.routers.setting import AppRoutes
 from app.core.security import AppRoutePermissions
+from app.exceptions.exceptions import BookNotFoundException, DuplicateBookIsbnException, IngestionJobNotFoundException
 from app.schemas.exceptions import (
     BookIsbnInvalidFormatExceptionOut,
+    BookNotFoundExceptionOut,
     DuplicateBookISBNExceptionOut,
     GoogleBooksApiExceptionOut,
+    GoogleBooksApiUnavailableExceptionOut,
+    IngestionJobNotFoundExceptionOut,
     NotEnoughPermissionsExceptionOut,
 )
-from app.schemas.requests import BooksGoogleBooksApiSaveIn
-from app.schemas.responses import GoogleBooksApiSaveOut
+from app.schemas.requests import BooksGoogleBooksApiBatchSaveIn, BooksGoogleBooksApiSaveIn
+from app.schemas.requests.book import normalize_isbn
+from app.schemas.responses import (
+    BookIngestionStatus,
+    GoogleBooksApiBatchSaveOut,
+    GoogleBooksApiSaveOut,
+    IngestionJobItemOut,
+    IngestionJobOut,
+)
+from app.services.book_cover_service import BookCoverService
+from app.services.book_ingestion_service import BookIngestionService
+from app.services.cover_image_service import CoverImageService
+from app.services.cover_storage_service import COVER_CACHE_MAX_AGE, NO_IMAGE_PATH, CoverStorageService
 from app.services.google_books_api_service import GoogleBooksApiService
-from app.services.image_service import ImageBase64Service
+from app.services.image_service import MIME_TYPES, ImageBase64Service
+from app.services.isbn_filter_service import IsbnFilterService
 from app.services.login_service import LoginService, TokenData
 from app.dependencies import has_permission
 
@@ -34,10 +64,14 @@ ROUTER_PERMISSIONS = AppRoutePermissions.Books
                  409: {"model": DuplicateBookISBNExceptionOut,
                        "description": "Duplicate Book ISBN"},
                  500: {"model": GoogleBooksApiExceptionOut,
-                       "description": "Google Books API Error"}
+                       "description": "Google Books API Error"},
+                 503: {"model": GoogleBooksApiUnavailableExceptionOut,
+                       "description": "Google Books API Unavailable"}
              },
              status_code=200)
+@handle_errors
 async def save_google_books(books_google_books_api_save_in: BooksGoogleBooksApiSaveIn,
+                            cover: Literal['base64', 'url'] = 'base64',
                             current_user: TokenData = Depends(has_permission(ROUTER_PERMISSIONS.POST_GOOGLE_BOOKS)))\
         -> GoogleBooksApiSaveOut:
     """
@@ -48,6 +82,9 @@ async def save_google_books(books_google_books_api_save_in: BooksGoogleBooksApiS
     ----------
     books_google_books_api_save_in: BooksGoogleBooksApiSaveIn
         BooksGoogleBooksApiSaveIn schema
+    cover: str
+        base64 to inline the cover image, url to return the URL of the cover image
+        if cover images are fetched lazily, base64 inlines the no image image until the cover is fetched
     current_user: TokenData
         TokenData schema
 
@@ -66,35 +103,315 @@ async def save_google_books(books_google_books_api_save_in: BooksGoogleBooksApiS
         if book isbn already exists
     GoogleBooksApiException
         if google books api error occurred
+        or google books api is unavailable (503)
     ```
     """
 
-    # fetch book data from google books api
-    book_data = GoogleBooksApiService.fetch_book_data(isbn=books_google_books_api_save_in.isbn)
+    # skip the upstream calls if it is already saved, a miss of the filter is final
+    # and only isbns in the filter are probed in the database
+    if await IsbnFilterService.is_saved_async(isbn=books_google_books_api_save_in.isbn):
+        raise DuplicateBookIsbnException()
 
-    # save author
-    for author in book_data.authors:
-        AuthorModel.save(name=author)
+    # serialize saving the same isbn across workers, a request which waited for a request of this worker
+    # finds the isbn in the filter, isbns saved by other workers since the last refresh are rejected
+    # by the unique index of isbn when the book is saved
+    await BookModel.lock_isbns_async(isbns=[books_google_books_api_save_in.isbn])
+    if IsbnFilterService.might_contain(isbn=books_google_books_api_save_in.isbn) and \
+            await BookModel.exists_async(isbn=books_google_books_api_save_in.isbn):
+        raise DuplicateBookIsbnException()
 
-    # save cover image
-    cover_image_path = GoogleBooksApiService.save_cover_image(google_book_schema=book_data,
-                                                              isbn=books_google_books_api_save_in.isbn)
+    # fetch book data from google books api
+    book_data = await GoogleBooksApiService.fetch_book_data(isbn=books_google_books_api_save_in.isbn)
+
+    # save cover image, or only its URL to fetch it on first access
+    cover_image_path, cover_renditions, cover_url = None, None, None
+    if BookCoverService.is_lazy():
+        cover_url = BookCoverService.deferred_url(google_book_schema=book_data)
+    else:
+        cover_image_path = await GoogleBooksApiService.save_cover_image(google_book_schema=book_data,
+                                                                        isbn=books_google_books_api_save_in.isbn)
+        if cover_image_path is not None:
+            cover_renditions = await CoverImageService.render_async(image_path=cover_image_path)
     # save book
     book_model = BookModel(title=book_data.title,
                            isbn=books_google_books_api_save_in.isbn,
                            cover_path=cover_image_path,
-                           published_at=book_data.published_at)
-    new_book_model = book_model.save_google_books_api()
-
-    # save book author
-    author_models = AuthorModel.fetch_by_names(names=book_data.authors)
+                           published_at=book_data.published_at,
+                           cover_renditions=cover_renditions,
+                           cover_url=cover_url)
+    try:
+        new_book_model = await book_model.save_google_books_api_async()
+    except DuplicateBookIsbnException:
+        IsbnFilterService.add(isbn=books_google_books_api_save_in.isbn)
+        raise
+    IsbnFilterService.add(isbn=new_book_model.isbn)
+    await CoverStorageService.acquire_async(keys=CoverStorageService.keys(cover_path=cover_image_path,
+                                                                          cover_renditions=cover_renditions))
 
-    for author_model in author_models:
-        BookAuthorModel.save(book_id=new_book_model.id, author_id=author_model.id)
-
-    session.commit()
+    # save author and book author
+    author_ids = await AuthorModel.upsert_many_async(names=book_data.authors)
+    await BookAuthorModel.save_many_async(book_id=new_book_model.id, author_ids=list(author_ids.values()))
 
+    cover_image_path = cover_image_path or NO_IMAGE_PATH
+    if cover == 'url':
+        return GoogleBooksApiSaveOut(title=book_data.title,
+                                     authors=book_data.authors,
+                                     published_at=book_data.published_at,
+                                     cover_image_mime_type=ImageBase64Service.mime_type(image_path=cover_image_path),
+                                     cover_image_url=router.url_path_for('get_book_cover', isbn=new_book_model.isbn))
     return GoogleBooksApiSaveOut(title=book_data.title,
                                  authors=book_data.authors,
                                  published_at=book_data.published_at,
-                                 cover_image_base64=ImageBase64Service.encode(image_path=cover_image_path))
+                                 cover_image_base64=await ImageBase64Service.encode_async(image_path=cover_image_path),
+                                 cover_image_mime_type=ImageBase64Service.mime_type(image_path=cover_image_path))
+
+
+@router.post(BOOK_ROUTERS.POST_GOOGLE_BOOKS_BATCH_URL,
+             response_model=GoogleBooksApiBatchSaveOut,
+             responses={
+                 400: {"model": BookIsbnInvalidFormatExceptionOut,
+                       "description": "Book ISBN Invalid Format"},
+                 403: {"model": NotEnoughPermissionsExceptionOut,
+                       "description": "Not Enough Permissions"}
+             },
+             status_code=200)
+@handle_errors
+async def save_google_books_batch(books_google_books_api_batch_save_in: BooksGoogleBooksApiBatchSaveIn,
+                                  current_user: TokenData = Depends(
+                                      has_permission(ROUTER_PERMISSIONS.POST_GOOGLE_BOOKS_BATCH)))\
+        -> GoogleBooksApiBatchSaveOut:
+    """
+    Save books from Google Books API
+
+    ```
+    Parameters
+    ----------
+    books_google_books_api_batch_save_in: BooksGoogleBooksApiBatchSaveIn
+        BooksGoogleBooksApiBatchSaveIn schema
+    current_user: TokenData
+        TokenData schema
+
+    Returns
+    -------
+    GoogleBooksApiBatchSaveOut
+        GoogleBooksApiBatchSaveOut schema
+        status of each isbn is one of created, duplicate, not_found and upstream_error
+
+    Raises
+    ------
+    BookIsbnInvalidFormatException
+        if any book isbn format is invalid
+    NotEnoughPermissionsException
+        if user does not have enough permissions
+    ```
+    """
+
+    results = await BookIngestionService.ingest(isbns=books_google_books_api_batch_save_in.isbns)
+
+    return GoogleBooksApiBatchSaveOut(results=results)
+
+
+def _ingestion_job_out(job: IngestionJobModel, items: List[IngestionJobItemModel]) -> IngestionJobOut:
+    counts = Counter(item.status for item in items)
+    if counts[BookIngestionStatus.QUEUED] == job.total:
+        job_status = IngestionJobStatus.QUEUED
+    elif counts[BookIngestionStatus.QUEUED] == 0:
+        job_status = IngestionJobStatus.COMPLETED
+    else:
+        job_status = IngestionJobStatus.RUNNING
+    return IngestionJobOut(job_id=job.id,
+                           status=job_status,
+                           total=job.total,
+                           counts=dict(counts),
+                           items=[IngestionJobItemOut(isbn=item.isbn, status=item.status, detail=item.detail)
+                                  for item in items])
+
+
+@router.post(BOOK_ROUTERS.POST_JOBS_URL,
+             response_model=IngestionJobOut,
+             responses={
+                 400: {"model": BookIsbnInvalidFormatExceptionOut,
+                       "description": "Book ISBN Invalid Format"},
+                 403: {"model": NotEnoughPermissionsExceptionOut,
+                       "description": "Not Enough Permissions"}
+             },
+             status_code=202)
+@handle_errors
+async def create_ingestion_job(books_google_books_api_batch_save_in: BooksGoogleBooksApiBatchSaveIn,
+                               current_user: TokenData = Depends(has_permission(ROUTER_PERMISSIONS.POST_JOBS)))\
+        -> IngestionJobOut:
+    """
+    Queue books to be saved from Google Books API by the ingestion workers
+
+    ```
+    Parameters
+    ----------
+    books_google_books_api_batch_save_in: BooksGoogleBooksApiBatchSaveIn
+        BooksGoogleBooksApiBatchSaveIn schema
+    current_user: TokenData
+        TokenData schema
+
+    Returns
+    -------
+    IngestionJobOut
+        IngestionJobOut schema, the progress is fetched with the job id
+
+    Raises
+    ------
+    BookIsbnInvalidFormatException
+        if any book isbn format is invalid
+    NotEnoughPermissionsException
+        if user does not have enough permissions
+    ```
+    """
+
+    job = await IngestionJobModel.enqueue_async(isbns=books_google_books_api_batch_save_in.isbns)
+    items = [IngestionJobItemModel(job_id=job.id, isbn=isbn) for isbn in books_google_books_api_batch_save_in.isbns]
+
+    return _ingestion_job_out(job=job, items=items)
+
+
+@router.get(BOOK_ROUTERS.GET_JOB_URL,
+            response_model=IngestionJobOut,
+            responses={
+                403: {"model": NotEnoughPermissionsExceptionOut,
+                      "description": "Not Enough Permissions"},
+                404: {"model": IngestionJobNotFoundExceptionOut,
+                      "description": "Ingestion Job Not Found"}
+            },
+            status_code=200)
+@handle_errors
+async def get_ingestion_job(job_id: int,
+                            current_user: TokenData = Depends(has_permission(ROUTER_PERMISSIONS.GET_JOB)))\
+        -> IngestionJobOut:
+    """
+    Get progress of the ingestion job
+
+    ```
+    Parameters
+    ----------
+    job_id: int
+        job id
+    current_user: TokenData
+        TokenData schema
+
+    Returns
+    -------
+    IngestionJobOut
+        IngestionJobOut schema
+
+    Raises
+    ------
+    NotEnoughPermissionsException
+        if user does not have enough permissions
+    IngestionJobNotFoundException
+        if job is not found
+    ```
+    """
+
+    job = await IngestionJobModel.fetch_async(job_id=job_id)
+    if job is None:
+        raise IngestionJobNotFoundException()
+    items = await IngestionJobItemModel.fetch_by_job_id_async(job_id=job_id)
+
+    return _ingestion_job_out(job=job, items=items)
+
+
+def _cover_response(key: str, if_none_match: Optional[str], max_age: int = COVER_CACHE_MAX_AGE) -> Response:
+    """Response of a cover image, 304 if the client has the same image"""
+    content = None
+    path = CoverStorageService.local_path(key)
+    if path is None:
+        try:
+            content = CoverStorageService.read(key)
+        except FileNotFoundError:
+            key = path = NO_IMAGE_PATH
+            # the cover may be saved later
+            max_age = 0
+    etag = CoverStorageService.etag(key, content=content)
+    headers = {'ETag': etag, 'Cache-Control': f'public, max-age={max_age}', 'Vary': 'Accept'}
+
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        if '*' in tags or etag in tags:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    media_type = MIME_TYPES.get(os.path.splitext(key)[1].lower(), 'application/octet-stream')
+    if path is not None:
+        # streamed from the file in chunks, never read whole into memory
+        return FileResponse(path, media_type=media_type, headers=headers)
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+@router.get(BOOK_ROUTERS.GET_COVER_URL,
+            response_class=Response,
+            responses={
+                200: {"content": {"image/jpeg": {}, "image/png": {}, "image/webp": {}},
+                      "description": "Cover Image"},
+                304: {"description": "Not Modified"},
+                400: {"model": BookIsbnInvalidFormatExceptionOut,
+                      "description": "Book ISBN Invalid Format"},
+                404: {"model": BookNotFoundExceptionOut,
+                      "description": "Book Not Found"}
+            },
+            status_code=200)
+@handle_errors
+async def get_book_cover(isbn: str,
+                         size: Optional[int] = Query(default=None, gt=0),
+                         accept: Optional[str] = Header(default=None),
+                         if_none_match: Optional[str] = Header(default=None)) -> Response:
+    """
+    Get cover image of the book
+
+    Cover images are public, so that they can be used by img elements.
+
+    ```
+    Parameters
+    ----------
+    isbn: str
+        ISBN-10 or ISBN-13 of the book
+    size: int
+        minimum longest side in pixels, the smallest rendition at least this large is served
+        WebP if accepted by the client, otherwise JPEG
+        the original cover image if not given or no rendition is large enough
+    accept: str
+        Accept header
+    if_none_match: str
+        entity tags of the cover images the client has
+
+    Returns
+    -------
+    Response
+        cover image with ETag and Cache-Control, 304 without body if the tag matches
+        the no image image if the book has no cover image
+        a cover which is not fetched yet is fetched first
+
+    Raises
+    ------
+    BookIsbnInvalidFormatException
+        if book isbn format is invalid
+    BookNotFoundException
+        if book is not found
+    ```
+    """
+
+    isbn = normalize_isbn(isbn)
+    cover = await BookModel.fetch_cover_async(isbn=isbn)
+    if cover is None:
+        raise BookNotFoundException()
+    cover_path, cover_renditions, cover_url = cover
+    max_age = COVER_CACHE_MAX_AGE
+    if cover_path is None and cover_url is not None:
+        fetched = await BookCoverService.fetch_deferred_async(isbn=isbn, cover_url=cover_url)
+        if fetched is None:
+            # the cover may be fetched by a later request
+            max_age = 0
+        else:
+            cover_path, cover_renditions = fetched
+
+    formats = ['webp', 'jpeg'] if accept is not None and 'image/webp' in accept else ['jpeg', 'webp']
+    key = CoverStorageService.select(cover_path=cover_path, cover_renditions=cover_renditions,
+                                     size=size, formats=formats)
+
+    return await run_in_threadpool(_cover_response, key=key or NO_IMAGE_PATH, if_none_match=if_none_match,
+                                   max_age=max_age)
@@ -56,17 +56,16 @@ async def login(user_login_in: UserLoginIn) -> UserLoginOut:
         if user is not verified
     ```
     """
-    # fetch user
-    user: UserModel = UserModel.fetch_user_by_email(user_login_in.email)
+    # fetch user and authenticate in one query
+    user = await UserModel.authenticate_user_async(password=user_login_in.password,
+                                                   email=user_login_in.email)
 
     # check if user is verified
     if not user.is_verified:
         raise UserIsNotVerifiedException()
 
     # user authentication
-    is_valid = UserModel.authenticate(password=user_login_in.password,
-                                      email=user_login_in.email)
-    if not is_valid:
+    if not user.is_authenticated:
         raise InvalidUserPasswordException()
 
     # generate token
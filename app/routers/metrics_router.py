@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, status
+
+from app import handle_errors
+from app.core.metrics import Metrics
+from app.core.security import AppRoutePermissions
+from app.dependencies import has_permission
+from app.routers.setting import AppRoutes
+from app.schemas.exceptions import NotEnoughPermissionsExceptionOut
+from app.schemas.responses import MetricsOut
+from app.services.login_service import TokenData
+
+router = APIRouter(
+    prefix=AppRoutes.Metrics.PREFIX,
+    tags=[AppRoutes.Metrics.TAG]
+)
+METRICS_ROUTER = AppRoutes.Metrics
+METRICS_ROUTER_PERMISSIONS = AppRoutePermissions.Metrics
+
+
+@router.get(METRICS_ROUTER.GET_URL,
+            response_model=MetricsOut,
+            responses={
+                403: {"model": NotEnoughPermissionsExceptionOut,
+                      "description": "Not Enough Permissions"}
+            },
+            status_code=status.HTTP_200_OK)
+@handle_errors
+async def get_metrics(current_user: TokenData = Depends(has_permission(METRICS_ROUTER_PERMISSIONS.GET))) -> MetricsOut:
+    """
+    Get metrics of the worker process
+
+    ```
+    Parameters
+    ----------
+    current_user: TokenData
+        TokenData schema
+
+    Returns
+    -------
+    MetricsOut
+        MetricsOut schema
+
+    Raises
+    ------
+    NotEnoughPermissionsException
+        if user role is not admin
+    ```
+    """
+    return MetricsOut(metrics=Metrics.collect())
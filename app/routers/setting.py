@@ -17,3 +17,12 @@ class AppRoutes:
         PREFIX: str = "/books"
         POST_URL: str = "/"
         POST_GOOGLE_BOOKS_URL: str = "/google-books"
+        POST_GOOGLE_BOOKS_BATCH_URL: str = "/google-books/batch"
+        POST_JOBS_URL: str = "/jobs"
+        GET_JOB_URL: str = "/jobs/{job_id}"
+        GET_COVER_URL: str = "/{isbn}/cover"
+
+    class Metrics:
+        TAG: str = "metrics"
+        PREFIX: str = "/metrics"
+        GET_URL: str = "/"
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, status
 
 from app import handle_errors
 from app.exceptions.exceptions import VerificationTokenNotFoundException
-from app.models import UserModel, session
+from app.models import UserModel
 from app.routers.setting import AppRoutes
 from app.core.security import AppRoutePermissions
 from app.schemas.exceptions import (
@@ -57,9 +57,9 @@ async def save_new_user(user_save_in: UserSaveIn) -> UserSaveOut:
         if user email is invalid
     ```
     """
-    user_model = UserModel(name=user_save_in.name,
-                           password=user_save_in.password,
-                           email=user_save_in.email)
+    user_model = await UserModel.create_async(name=user_save_in.name,
+                                              password=user_save_in.password,
+                                              email=user_save_in.email)
     user_model.save()
 
     verification_token = user_model.verification_token
@@ -76,7 +76,6 @@ async def save_new_user(user_save_in: UserSaveIn) -> UserSaveOut:
                                  f"http://localhost:8000/users/token/{verification_token}"
                             )
 
-    session.commit()
     return UserSaveOut()
 
 
@@ -146,8 +145,6 @@ async def verify_user(token: str):
         # update user
         UserModel.verify_user(token)
 
-        session.commit()
-
         return UserVerifyOut()
 
     raise VerificationTokenNotFoundException()
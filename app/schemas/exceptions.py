@@ -138,6 +138,21 @@ class GoogleBooksApiExceptionOut(BaseModel):
     )
 
 
+class GoogleBooksApiUnavailableExceptionOut(BaseModel):
+
+    detail: str = Field(
+        description='The detail of the exception',
+        default=ExceptionMessage.GOOGLE_BOOKS_API_UNAVAILABLE
+    )
+    model_config = ConfigDict(
+        json_schema_extra={
+            'example': {
+                'detail': ExceptionMessage.GOOGLE_BOOKS_API_UNAVAILABLE
+            }
+        }
+    )
+
+
 class UserIsNotVerifiedExceptionOut(BaseModel):
 
     detail: str = Field(
@@ -166,3 +181,33 @@ class VerificationTokenNotFoundExceptionOut(BaseModel):
             }
         }
     )
+
+
+class IngestionJobNotFoundExceptionOut(BaseModel):
+
+    detail: str = Field(
+        description='The detail of the exception',
+        default=ExceptionMessage.INGESTION_JOB_NOT_FOUND
+    )
+    model_config = ConfigDict(
+        json_schema_extra={
+            'example': {
+                'detail': ExceptionMessage.INGESTION_JOB_NOT_FOUND
+            }
+        }
+    )
+
+
+class BookNotFoundExceptionOut(BaseModel):
+
+    detail: str = Field(
+        description='The detail of the exception',
+        default=ExceptionMessage.BOOK_NOT_FOUND
+    )
+    model_config = ConfigDict(
+        json_schema_extra={
+            'example': {
+                'detail': ExceptionMessage.BOOK_NOT_FOUND
+            }
+        }
+    )
@@ -1,3 +1,3 @@
 # isort:skip_file
 from app.schemas.requests.user import UserSaveIn, UserLoginIn
-from app.schemas.requests.book import BooksGoogleBooksApiSaveIn
+from app.schemas.requests.book import BooksGoogleBooksApiSaveIn, BooksGoogleBooksApiBatchSaveIn
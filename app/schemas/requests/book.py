@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 from app.exceptions.exceptions import BookIsbnInvalidFormatException
@@ -35,6 +37,34 @@ def isbn10_to_isbn13(isbn10: str) -> str:
     return isbn13
 
 
+def normalize_isbn(isbn: str) -> str:
+    """normalize_isbn is a function that normalizes ISBN to ISBN-13 without hyphens
+
+    Parameters
+    ----------
+    isbn : str
+        ISBN-10 or ISBN-13, hyphens are allowed
+
+    Returns
+    -------
+    str
+        ISBN-13
+
+    Raises
+    ------
+    BookIsbnInvalidFormatException
+        if isbn is not numeric or not 10 or 13 digits
+    """
+    isbn = isbn.replace('-', '')
+    if not isbn.isdigit():
+        raise BookIsbnInvalidFormatException(message=ExceptionMessage.BOOK_ISBN_FORMAT)
+    if len(isbn) not in [10, 13]:
+        raise BookIsbnInvalidFormatException(message=ExceptionMessage.BOOK_ISBN_DIGITS)
+    if len(isbn) == 10:
+        isbn = isbn10_to_isbn13(isbn)
+    return isbn
+
+
 class BooksGoogleBooksApiSaveIn(BaseModel):
     """
     BooksGoogleBooksApiSaveIn is a class that defines the schema for book registration
@@ -49,14 +79,7 @@ class BooksGoogleBooksApiSaveIn(BaseModel):
 
     @field_validator('isbn')
     def isbn_validator(cls, v):
-        v = v.replace('-', '')
-        if not v.isdigit():
-            raise BookIsbnInvalidFormatException(message=ExceptionMessage.BOOK_ISBN_FORMAT)
-        if len(v) not in [10, 13]:
-            raise BookIsbnInvalidFormatException(message=ExceptionMessage.BOOK_ISBN_DIGITS)
-        if len(v) == 10:
-            v = isbn10_to_isbn13(v)
-        return v
+        return normalize_isbn(v)
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -65,3 +88,29 @@ class BooksGoogleBooksApiSaveIn(BaseModel):
             }
         }
     )
+
+
+class BooksGoogleBooksApiBatchSaveIn(BaseModel):
+    """
+    BooksGoogleBooksApiBatchSaveIn is a class that defines the schema for batch book registration
+
+    Attributes
+    ----------
+    isbns : list of str
+        isbn numbers of books which are 10 or 13 digits
+        duplicates are removed after normalization
+    """
+
+    isbns: List[str] = Field(title='isbns', min_length=1, max_length=100)
+
+    @field_validator('isbns')
+    def isbns_validator(cls, v):
+        return list(dict.fromkeys(normalize_isbn(isbn) for isbn in v))
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "isbns": ["9788576082675", "4774193682"]
+            }
+        }
+    )
@@ -1,3 +1,11 @@
 # isort:skip_file
 from app.schemas.responses.user import UserSaveOut, UserLoginOut, UserGetMeOut, UserVerifyOut
-from app.schemas.responses.book import GoogleBooksApiSaveOut
+from app.schemas.responses.book import (
+    BookIngestionStatus,
+    GoogleBooksApiSaveOut,
+    GoogleBooksApiBatchResultOut,
+    GoogleBooksApiBatchSaveOut,
+    IngestionJobItemOut,
+    IngestionJobOut,
+)
+from app.schemas.responses.metrics import MetricsOut
@@ -1,3 +1,5 @@
+from typing import Dict, List, Optional
+
 from pydantic import BaseModel, ConfigDict, Field
 
 
@@ -7,7 +9,9 @@ class GoogleBooksApiSaveOut(BaseModel):
     title: str = Field(title='title', min_length=1, max_length=255)
     authors: list = Field(title='authors', min_length=1, max_length=255)
     published_at: str = Field(title='published_at', min_length=1, max_length=255)
-    cover_image_base64: str = Field(title='cover_image_base64')
+    cover_image_base64: Optional[str] = Field(title='cover_image_base64', default=None)
+    cover_image_mime_type: str = Field(title='cover_image_mime_type', default='image/jpeg')
+    cover_image_url: Optional[str] = Field(title='cover_image_url', default=None)
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -16,7 +20,78 @@ class GoogleBooksApiSaveOut(BaseModel):
                 'title': 'sample title',
                 'authors': ['sample author'],
                 'published_at': '2021-01-01',
-                'cover_image_base64': 'sample base64'
+                'cover_image_base64': 'sample base64',
+                'cover_image_mime_type': 'image/jpeg'
+            }
+        }
+    )
+
+
+class BookIngestionStatus:
+    """
+    Class to define the result of ingesting one ISBN.
+    QUEUED and FAILED are used only by ingestion jobs.
+    """
+    QUEUED = "queued"
+    FAILED = "failed"
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    NOT_FOUND = "not_found"
+    UPSTREAM_ERROR = "upstream_error"
+
+
+class GoogleBooksApiBatchResultOut(BaseModel):
+
+    isbn: str = Field(title='isbn', min_length=13, max_length=13)
+    status: str = Field(title='status', min_length=1, max_length=255)
+    title: Optional[str] = Field(title='title', default=None)
+    detail: Optional[str] = Field(title='detail', default=None)
+
+
+class GoogleBooksApiBatchSaveOut(BaseModel):
+
+    results: List[GoogleBooksApiBatchResultOut] = Field(title='results')
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            'example': {
+                'results': [
+                    {'isbn': '9788576082675', 'status': BookIngestionStatus.CREATED,
+                     'title': 'sample title', 'detail': None},
+                    {'isbn': '9784774193687', 'status': BookIngestionStatus.DUPLICATE,
+                     'title': None, 'detail': 'Book already exists'}
+                ]
+            }
+        }
+    )
+
+
+class IngestionJobItemOut(BaseModel):
+
+    isbn: str = Field(title='isbn', min_length=13, max_length=13)
+    status: str = Field(title='status', min_length=1, max_length=255)
+    detail: Optional[str] = Field(title='detail', default=None)
+
+
+class IngestionJobOut(BaseModel):
+
+    job_id: int = Field(title='job_id')
+    status: str = Field(title='status', min_length=1, max_length=255)
+    total: int = Field(title='total')
+    counts: Dict[str, int] = Field(title='counts')
+    items: List[IngestionJobItemOut] = Field(title='items')
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            'example': {
+                'job_id': 1,
+                'status': 'running',
+                'total': 2,
+                'counts': {BookIngestionStatus.CREATED: 1, BookIngestionStatus.QUEUED: 1},
+                'items': [
+                    {'isbn': '9788576082675', 'status': BookIngestionStatus.CREATED, 'detail': None},
+                    {'isbn': '9784774193687', 'status': BookIngestionStatus.QUEUED, 'detail': None}
+                ]
             }
         }
     )
@@ -0,0 +1,30 @@
+from typing import Any, Dict
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class MetricsOut(BaseModel):
+
+    metrics: Dict[str, Dict[str, Any]] = Field(title='metrics')
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            'example': {
+                'metrics': {
+                    'db_pool': {
+                        'primary': {
+                            'size': 5,
+                            'checked_out': 1,
+                            'idle': 4,
+                            'overflow': 0,
+                            'max_overflow': 10,
+                            'checkouts': 120,
+                            'timeouts': 0,
+                            'wait_seconds_total': 0.0123,
+                            'wait_seconds_max': 0.0041
+                        }
+                    }
+                }
+            }
+        }
+    )
@@ -0,0 +1,124 @@
+import os
+from logging import getLogger
+from typing import Dict, Optional, Tuple
+
+import httpx
+from fastapi import status
+from PIL import Image, UnidentifiedImageError
+
+from app.exceptions.exceptions import GoogleBooksApiException
+from app.models import BookModel
+from app.schemas.api import GoogleBookSchema
+from app.services.cover_image_service import CoverImageService
+from app.services.cover_storage_service import CoverStorageService
+from app.services.google_books_api_service import (NON_RETRY_TRANSPORT_ERRORS, RETRY_STATUS_CODES,
+                                                   GoogleBooksApiService)
+
+book_cover_logger = getLogger('app.book_cover')
+
+# true to save books with the URL of the cover only, the cover is fetched on first access or by the cover worker
+COVER_IMAGE_LAZY = os.getenv('COVER_IMAGE_LAZY', 'false').lower() == 'true'
+
+
+class BookCoverService:
+    """Service for fetching the cover images of books
+
+    Covers are fetched while saving the book, or deferred until they are first requested
+    when COVER_IMAGE_LAZY is set, so saving a book does not wait for the image.
+    """
+
+    @staticmethod
+    def is_lazy() -> bool:
+        return COVER_IMAGE_LAZY
+
+    @staticmethod
+    def deferred_url(google_book_schema: GoogleBookSchema) -> Optional[str]:
+        """URL of the cover recorded on a book saved without its cover
+
+        Returns
+        -------
+        Optional[str]
+            URL of the cover, None if Google Books has no cover of the book
+        """
+        if google_book_schema.cover_url.startswith(('http://', 'https://')):
+            return google_book_schema.cover_url
+        return None
+
+    @classmethod
+    async def fetch_async(cls, cover_url: str, isbn: str) -> Tuple[str, Dict[str, Dict[str, str]]]:
+        """Download the cover image, store it and render its renditions
+
+        Parameters
+        ----------
+        cover_url : str
+            URL of book cover
+        isbn : str
+            ISBN of book
+
+        Returns
+        -------
+        Tuple[str, Dict[str, Dict[str, str]]]
+            key of the cover image and keys of the renditions by size and format
+
+        Raises
+        ------
+        GoogleBooksApiException
+            if the cover image can not be downloaded
+        """
+        cover_path = await GoogleBooksApiService.save_cover_url(cover_url=cover_url, isbn=isbn)
+        cover_renditions = await CoverImageService.render_async(image_path=cover_path)
+        return cover_path, cover_renditions
+
+    @classmethod
+    async def fetch_deferred_async(cls, isbn: str, cover_url: str) -> Optional[Tuple[Optional[str],
+                                                                                  Optional[Dict[str, Dict[str, str]]]]]:
+        """Fetch the deferred cover of a saved book and save it on the book
+
+        Covers which are rejected are not fetched again and the book is served without cover,
+        other failures such as an open circuit, a connection error or a 503 are retried later.
+
+        Parameters
+        ----------
+        isbn : str
+            normalized ISBN-13
+        cover_url : str
+            URL of book cover
+
+        Returns
+        -------
+        Optional[Tuple[Optional[str], Optional[Dict[str, Dict[str, str]]]]]
+            cover_path and cover_renditions of the book, None if fetching failed
+        """
+        try:
+            cover_path, cover_renditions = await cls.fetch_async(cover_url=cover_url, isbn=isbn)
+        except GoogleBooksApiException as e:
+            book_cover_logger.warning('failed to fetch the cover of %s: %s', isbn, e.message)
+            if not cls._is_transient(e):
+                await BookModel.clear_cover_url_async(isbn=isbn)
+            return None
+
+        if not await BookModel.save_cover_async(isbn=isbn, cover_path=cover_path, cover_renditions=cover_renditions):
+            # saved by another request or the cover worker meanwhile, the images are the same
+            return cover_path, cover_renditions
+        await CoverStorageService.acquire_async(keys=CoverStorageService.keys(cover_path=cover_path,
+                                                                              cover_renditions=cover_renditions))
+        return cover_path, cover_renditions
+
+    @staticmethod
+    def _is_transient(e: GoogleBooksApiException) -> bool:
+        """Check if fetching a cover may succeed later
+
+        Only 4xx responses other than 429 and images which are rejected by validation are permanent.
+        """
+        cause = e.__cause__
+        if cause is None:
+            # raised by the validation of the image, or by the open circuit
+            return e.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        if isinstance(cause, httpx.HTTPStatusError):
+            status_code = cause.response.status_code
+            return status_code in RETRY_STATUS_CODES or not 400 <= status_code < 500
+        # the content is not a valid image, or the URL can not be requested
+        if isinstance(cause, (UnidentifiedImageError, Image.DecompressionBombError) + NON_RETRY_TRANSPORT_ERRORS):
+            return False
+        # connection errors, and errors of the storage such as OSError
+        return True
@@ -0,0 +1,134 @@
+import asyncio
+import os
+from typing import Dict, List, Optional, Tuple
+
+from app.exceptions.exceptions import GoogleBooksApiException
+from app.exceptions.message import ExceptionMessage
+from app.models import AuthorModel, BookAuthorModel, BookModel
+from app.schemas.api import GoogleBookSchema
+from app.schemas.responses import BookIngestionStatus, GoogleBooksApiBatchResultOut
+from app.services.book_cover_service import BookCoverService
+from app.services.cover_image_service import CoverImageService
+from app.services.cover_storage_service import CoverStorageService
+from app.services.google_books_api_service import GoogleBooksApiService
+from app.services.isbn_filter_service import IsbnFilterService
+
+# maximum number of ISBNs fetched from Google Books API at the same time
+GOOGLE_BOOKS_API_CONCURRENCY = int(os.getenv('GOOGLE_BOOKS_API_CONCURRENCY', '8'))
+
+
+class BookIngestionService:
+    """Service for ingesting many books from Google Books API"""
+
+    @classmethod
+    async def _fetch(cls,
+                     isbn: str,
+                     semaphore: asyncio.Semaphore) -> Tuple[Optional[GoogleBookSchema], Optional[str],
+                                                            GoogleBooksApiBatchResultOut]:
+        """Fetch book data and cover image of one ISBN
+
+        Parameters
+        ----------
+        isbn : str
+            ISBN of book
+        semaphore : asyncio.Semaphore
+            semaphore limiting the concurrent requests to Google Books API
+
+        Returns
+        -------
+        Tuple[Optional[GoogleBookSchema], Optional[str], GoogleBooksApiBatchResultOut]
+            book data, cover image path and result of the ISBN
+            book data and cover image path are None if fetching failed
+            cover image path is None if cover images are fetched lazily
+        """
+        async with semaphore:
+            try:
+                book_data = await GoogleBooksApiService.fetch_book_data(isbn=isbn)
+                cover_image_path = None
+                if not BookCoverService.is_lazy():
+                    cover_image_path = await GoogleBooksApiService.save_cover_image(google_book_schema=book_data,
+                                                                                    isbn=isbn)
+            except GoogleBooksApiException as e:
+                if e.message == ExceptionMessage.GOOGLE_BOOKS_API_INVALID_RESPONSE:
+                    status = BookIngestionStatus.NOT_FOUND
+                else:
+                    status = BookIngestionStatus.UPSTREAM_ERROR
+                return None, None, GoogleBooksApiBatchResultOut(isbn=isbn, status=status, detail=e.message)
+
+        return book_data, cover_image_path, GoogleBooksApiBatchResultOut(isbn=isbn,
+                                                                         status=BookIngestionStatus.CREATED,
+                                                                         title=book_data.title)
+
+    @classmethod
+    async def ingest(cls, isbns: List[str]) -> List[GoogleBooksApiBatchResultOut]:
+        """Save books of the ISBNs from Google Books API
+
+        Book data is fetched concurrently, at most GOOGLE_BOOKS_API_CONCURRENCY ISBNs at a time,
+        then authors, books and book authors are saved with one statement each.
+
+        Parameters
+        ----------
+        isbns : List[str]
+            normalized ISBN-13 without duplicates
+
+        Returns
+        -------
+        List[GoogleBooksApiBatchResultOut]
+            result of each ISBN in the given order
+        """
+        results: Dict[str, GoogleBooksApiBatchResultOut] = {}
+
+        # held until the end of the transaction, so concurrent batches do not fetch the same isbn
+        await BookModel.lock_isbns_async(isbns=isbns)
+        existing_isbns = await BookModel.fetch_existing_isbns_async(isbns=isbns)
+        for isbn in existing_isbns:
+            results[isbn] = GoogleBooksApiBatchResultOut(isbn=isbn,
+                                                         status=BookIngestionStatus.DUPLICATE,
+                                                         detail=ExceptionMessage.DUPLICATE_BOOK_ISBN)
+
+        semaphore = asyncio.Semaphore(GOOGLE_BOOKS_API_CONCURRENCY)
+        fetched = await asyncio.gather(*[cls._fetch(isbn=isbn, semaphore=semaphore)
+                                         for isbn in isbns if isbn not in existing_isbns])
+
+        books = []
+        for book_data, cover_image_path, result in fetched:
+            results[result.isbn] = result
+            if book_data is not None:
+                books.append((result.isbn, book_data, cover_image_path))
+
+        if books:
+            # covers fetched lazily are rendered when they are fetched
+            rendered = iter(await asyncio.gather(*[CoverImageService.render_async(image_path=cover_image_path)
+                                                   for _, _, cover_image_path in books
+                                                   if cover_image_path is not None]))
+            cover_renditions = [next(rendered) if cover_image_path is not None else None
+                                for _, _, cover_image_path in books]
+            author_ids = await AuthorModel.upsert_many_async(
+                names=[author for _, book_data, _ in books for author in book_data.authors])
+            book_ids = await BookModel.save_many_async(
+                books=[{'title': book_data.title,
+                        'isbn': isbn,
+                        'cover_path': cover_image_path,
+                        'cover_renditions': renditions,
+                        'cover_url': BookCoverService.deferred_url(google_book_schema=book_data)
+                        if cover_image_path is None else None,
+                        'published_at': book_data.published_at}
+                       for (isbn, book_data, cover_image_path), renditions in zip(books, cover_renditions)])
+            # saved since the existence check by a caller which did not take the advisory lock
+            for isbn, _, _ in books:
+                if isbn in book_ids:
+                    IsbnFilterService.add(isbn=isbn)
+                else:
+                    results[isbn] = GoogleBooksApiBatchResultOut(isbn=isbn,
+                                                                 status=BookIngestionStatus.DUPLICATE,
+                                                                 detail=ExceptionMessage.DUPLICATE_BOOK_ISBN)
+            await CoverStorageService.acquire_async(
+                keys=[key
+                      for (isbn, _, cover_image_path), renditions in zip(books, cover_renditions) if isbn in book_ids
+                      for key in CoverStorageService.keys(cover_path=cover_image_path, cover_renditions=renditions)])
+            await BookAuthorModel.save_pairs_async(
+                pairs=[(book_ids[isbn], author_ids[author])
+                       for isbn, book_data, _ in books if isbn in book_ids
+                       for author in dict.fromkeys(book_data.authors)])
+
+        return [results[isbn] for isbn in isbns]
@@ -0,0 +1,86 @@
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.cache import LRUCache
+from app.core.metrics import Metrics
+from app.models import BookMetadataModel
+
+# number of ISBNs kept in memory of each worker
+CACHE_SIZE = int(os.getenv('GOOGLE_BOOKS_CACHE_SIZE', '1024'))
+# seconds a response of Google Books API is reused
+CACHE_TTL = float(os.getenv('GOOGLE_BOOKS_CACHE_TTL', str(30 * 24 * 60 * 60)))
+# seconds an ISBN unknown to Google Books API is not queried again
+CACHE_NEGATIVE_TTL = float(os.getenv('GOOGLE_BOOKS_CACHE_NEGATIVE_TTL', str(24 * 60 * 60)))
+
+
+class BookMetadataCacheService:
+    """
+    Cache of the raw volumeInfo of Google Books API keyed by normalized ISBN-13.
+
+    Entries are looked up in memory first, then in the book_metadata table shared by all workers.
+    ISBNs unknown to Google Books API are cached as None with CACHE_NEGATIVE_TTL.
+    """
+    memory = LRUCache(maxsize=CACHE_SIZE)
+    persistent_hits = 0
+    persistent_misses = 0
+
+    @classmethod
+    async def get(cls, isbn: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Get the cached volumeInfo of the ISBN
+
+        Parameters
+        ----------
+        isbn : str
+            normalized ISBN-13
+
+        Returns
+        -------
+        Tuple[bool, Optional[Dict[str, Any]]]
+            (True, volumeInfo) if cached, volumeInfo is None for an unknown ISBN
+            (False, None) if not cached
+        """
+        found, volume_info = cls.memory.get(isbn)
+        if found:
+            return True, volume_info
+
+        book_metadata = await BookMetadataModel.fetch_async(isbn=isbn)
+        if book_metadata is None:
+            cls.persistent_misses += 1
+            return False, None
+
+        cls.persistent_hits += 1
+        ttl = (book_metadata.expires_at - datetime.now()).total_seconds()
+        cls.memory.set(isbn, book_metadata.volume_info, ttl=ttl)
+        return True, book_metadata.volume_info
+
+    @classmethod
+    async def set(cls, isbn: str, volume_info: Optional[Dict[str, Any]]) -> None:
+        """Cache the volumeInfo of the ISBN in memory and in the book_metadata table
+
+        Parameters
+        ----------
+        isbn : str
+            normalized ISBN-13
+        volume_info : Optional[Dict[str, Any]]
+            raw volumeInfo, None if Google Books API does not know the ISBN
+        """
+        ttl = CACHE_TTL if volume_info is not None else CACHE_NEGATIVE_TTL
+        await BookMetadataModel.save_async(isbn=isbn, volume_info=volume_info, ttl=ttl)
+        cls.memory.set(isbn, volume_info, ttl=ttl)
+
+    @classmethod
+    def clear(cls) -> None:
+        """Clear the entries in memory and the statistics"""
+        cls.memory.clear()
+        cls.persistent_hits = 0
+        cls.persistent_misses = 0
+
+    @classmethod
+    def metrics(cls) -> Dict[str, Any]:
+        return {'memory': cls.memory.stats(),
+                'persistent': {'hits': cls.persistent_hits,
+                               'misses': cls.persistent_misses}}
+
+
+Metrics.register('google_books_cache', BookMetadataCacheService.metrics)
@@ -0,0 +1,119 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from logging import getLogger
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+from app.services.cover_storage_service import CoverStorageService
+
+cover_image_logger = getLogger('app.cover_image')
+
+# longest side in pixels and formats of the renditions made from each cover image
+RENDITION_SIZES = [int(size) for size in os.getenv('COVER_IMAGE_RENDITION_SIZES', '64,128,256').split(',') if size]
+RENDITION_FORMATS = [image_format.strip().upper()
+                     for image_format in os.getenv('COVER_IMAGE_RENDITION_FORMATS', 'WEBP,JPEG').split(',')
+                     if image_format.strip()]
+# processes rendering the images
+WORKERS = int(os.getenv('COVER_IMAGE_WORKERS', '2'))
+
+RENDITION_EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg', 'PNG': 'png'}
+
+
+def render_renditions(content: bytes, sizes: List[int], formats: List[str]) -> Dict[str, Dict[str, bytes]]:
+    """Render the renditions of an image, runs in a worker process
+
+    Images are only scaled down, keeping the aspect ratio.
+
+    Parameters
+    ----------
+    content : bytes
+        content of the original image
+    sizes : List[int]
+        longest side of the renditions in pixels
+    formats : List[str]
+        PIL formats of the renditions
+
+    Returns
+    -------
+    Dict[str, Dict[str, bytes]]
+        content of the rendition for each size and lowercase format
+    """
+    renditions: Dict[str, Dict[str, bytes]] = {}
+    with Image.open(BytesIO(content)) as img:
+        # JPEG is decoded directly at a reduced scale when the largest rendition is small enough
+        img.draft('RGB', (max(sizes), max(sizes)))
+        img.load()
+        # each size is scaled from the previous larger one
+        for size in sorted(sizes, reverse=True):
+            img = img.copy()
+            img.thumbnail((size, size), Image.LANCZOS)
+            for image_format in formats:
+                # JPEG has no alpha channel and no palette
+                rendition = img.convert('RGB') if image_format == 'JPEG' and img.mode != 'RGB' else img
+                output = BytesIO()
+                rendition.save(output, format=image_format)
+                renditions.setdefault(str(size), {})[image_format.lower()] = output.getvalue()
+    return renditions
+
+
+class CoverImageService:
+    """Service for renditions of cover images
+
+    Decoding and scaling images is CPU bound, so it runs in a pool of processes
+    which spreads the work across cores and keeps it off the event loop.
+    """
+
+    _executor: Optional[ProcessPoolExecutor] = None
+
+    @classmethod
+    def start(cls) -> None:
+        """Start the pool of processes, called on startup of the application"""
+        if cls._executor is None:
+            # spawn does not copy the threads and connections of the application into the processes
+            cls._executor = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context('spawn'))
+
+    @classmethod
+    def stop(cls) -> None:
+        """Stop the pool of processes, called on shutdown of the application"""
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=True)
+            cls._executor = None
+
+    @classmethod
+    async def render_async(cls, image_path: str) -> Dict[str, Dict[str, str]]:
+        """Render the configured renditions of a cover image and store them
+
+        The book is saved without renditions if rendering fails, the original cover is still served.
+
+        Parameters
+        ----------
+        image_path : str
+            key of the cover image in CoverStorageService
+
+        Returns
+        -------
+        Dict[str, Dict[str, str]]
+            key of the rendition for each size and lowercase format, empty if rendering failed
+        """
+        if not RENDITION_SIZES or not RENDITION_FORMATS:
+            return {}
+        cls.start()
+        try:
+            content = await CoverStorageService.read_async(key=image_path)
+            renditions = await asyncio.get_running_loop().run_in_executor(
+                cls._executor, render_renditions, content, RENDITION_SIZES, RENDITION_FORMATS)
+            keys: Dict[str, Dict[str, str]] = {}
+            for size, formats in renditions.items():
+                for image_format, rendition in formats.items():
+                    keys.setdefault(size, {})[image_format] = await CoverStorageService.save_async(
+                        content=rendition, extension=RENDITION_EXTENSIONS[image_format.upper()])
+            return keys
+        except FileNotFoundError:
+            return {}
+        except Exception:
+            cover_image_logger.exception('failed to render renditions of %s', image_path)
+            return {}
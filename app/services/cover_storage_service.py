@@ -0,0 +1,249 @@
+import hashlib
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.storage import BlobStorage, LocalBlobStorage, blob_key, create_storage
+from app.models import CoverBlobModel
+
+# local or s3
+COVER_STORAGE_BACKEND = os.getenv('COVER_STORAGE_BACKEND', 'local')
+# root directory of the local storage, independent of the working directory
+COVER_STORAGE_ROOT = os.getenv('COVER_STORAGE_ROOT',
+                               os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                            'static', 'images', 'covers'))
+# bucket and endpoint of the s3 storage, the endpoint is set for S3 compatible storages such as MinIO
+COVER_STORAGE_S3_BUCKET = os.getenv('COVER_STORAGE_S3_BUCKET')
+COVER_STORAGE_S3_ENDPOINT_URL = os.getenv('COVER_STORAGE_S3_ENDPOINT_URL')
+
+# seconds browsers and proxies may reuse a served cover image without revalidating it
+COVER_CACHE_MAX_AGE = int(os.getenv('COVER_CACHE_MAX_AGE', '604800'))
+# seconds an unreferenced image is kept, longer than saving a book takes from storing its images to committing
+COVER_GC_GRACE_SECONDS = float(os.getenv('COVER_GC_GRACE_SECONDS', str(24 * 60 * 60)))
+# images deleted in one transaction of the garbage collection
+COVER_GC_BATCH_SIZE = int(os.getenv('COVER_GC_BATCH_SIZE', '500'))
+# served when a book has no cover image
+NO_IMAGE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'static', 'images', 'no_image.jpg')
+
+BLOB_KEY_PATTERN = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})\.\w+$')
+
+
+class CoverStorageService:
+    """
+    Service for storing cover images and their renditions.
+
+    Images are stored once per content, books reference them by key.
+    The references are counted, images which are not referenced, including images of books
+    which failed to be saved, are deleted by the cover worker after COVER_GC_GRACE_SECONDS.
+    """
+
+    storage: BlobStorage = create_storage(backend=COVER_STORAGE_BACKEND,
+                                          root=COVER_STORAGE_ROOT,
+                                          bucket=COVER_STORAGE_S3_BUCKET,
+                                          endpoint_url=COVER_STORAGE_S3_ENDPOINT_URL)
+
+    @classmethod
+    async def save_async(cls, content: bytes, extension: str) -> str:
+        """Store an image unless the same image is already stored
+
+        Parameters
+        ----------
+        content : bytes
+            content of the image
+        extension : str
+            file extension of the format without dot
+
+        Returns
+        -------
+        str
+            key of the image
+        """
+        # the garbage collection does not delete an image touched within the grace period
+        await CoverBlobModel.touch_async(key=blob_key(content, extension))
+        return await run_in_threadpool(cls.storage.put, content, extension)
+
+    @classmethod
+    def read(cls, key: str) -> bytes:
+        """Read an image
+
+        Raises
+        ------
+        FileNotFoundError
+            if the image is not stored
+        """
+        return cls.storage.read(key)
+
+    @classmethod
+    async def read_async(cls, key: str) -> bytes:
+        return await run_in_threadpool(cls.storage.read, key)
+
+    @classmethod
+    def exists(cls, key: str) -> bool:
+        return cls.storage.exists(key)
+
+    @staticmethod
+    def is_key(key: str) -> bool:
+        """Check if the key is a key of the storage, not the path of a file saved before the storage"""
+        return BLOB_KEY_PATTERN.match(key) is not None
+
+    @classmethod
+    def local_path(cls, key: str) -> Optional[str]:
+        """Path of the file of an image, to send the file without reading it in the application
+
+        Returns
+        -------
+        Optional[str]
+            path of the file, None if the image is not a local file
+        """
+        if isinstance(cls.storage, LocalBlobStorage) and cls.storage.exists(key):
+            return cls.storage.path(key)
+        # covers saved before the cover storage are files
+        if not cls.is_key(key) and os.path.isfile(key):
+            return key
+        return None
+
+    @classmethod
+    def etag(cls, key: str, content: Optional[bytes] = None) -> str:
+        """Strong entity tag of an image
+
+        Keys contain the hash of the content, so the tag is free for images in the storage.
+
+        Parameters
+        ----------
+        key : str
+            key of the image
+        content : Optional[bytes]
+            content of an image which is not in the storage
+
+        Returns
+        -------
+        str
+            quoted entity tag
+        """
+        match = BLOB_KEY_PATTERN.match(key)
+        if match:
+            return f'"{match.group("digest")}"'
+        if content is None:
+            with open(key, 'rb') as f:
+                content = f.read()
+        return f'"{hashlib.sha256(content).hexdigest()}"'
+
+    @staticmethod
+    def select(cover_path: Optional[str],
+               cover_renditions: Optional[Dict[str, Dict[str, str]]],
+               size: Optional[int],
+               formats: List[str]) -> Optional[str]:
+        """Select the image of a book to serve
+
+        Parameters
+        ----------
+        cover_path : Optional[str]
+            key of the cover image
+        cover_renditions : Optional[Dict[str, Dict[str, str]]]
+            keys of the renditions by size and format
+        size : Optional[int]
+            minimum longest side in pixels, None for the cover image
+        formats : List[str]
+            lowercase formats of the renditions in order of preference
+
+        Returns
+        -------
+        Optional[str]
+            key of the smallest rendition at least as large as size, the cover image if there is none
+        """
+        if size is not None:
+            for rendition_size in sorted(int(s) for s in cover_renditions or {}):
+                if rendition_size < size:
+                    continue
+                renditions = cover_renditions[str(rendition_size)]
+                for image_format in formats:
+                    if image_format in renditions:
+                        return renditions[image_format]
+        return cover_path
+
+    @staticmethod
+    def keys(cover_path: Optional[str], cover_renditions: Optional[Dict[str, Dict[str, str]]]) -> List[str]:
+        """Keys of the images of a book
+
+        Parameters
+        ----------
+        cover_path : Optional[str]
+            key of the cover image
+        cover_renditions : Optional[Dict[str, Dict[str, str]]]
+            keys of the renditions by size and format
+
+        Returns
+        -------
+        List[str]
+            keys of the cover image and the renditions
+        """
+        keys = [cover_path] if cover_path else []
+        for renditions in (cover_renditions or {}).values():
+            keys.extend(renditions.values())
+        return keys
+
+    @classmethod
+    async def acquire_async(cls, keys: List[str]) -> None:
+        """Reference images from a saved book, in the transaction saving the book
+
+        Parameters
+        ----------
+        keys : List[str]
+            keys of the images
+        """
+        await CoverBlobModel.acquire_async(keys=keys)
+
+    @classmethod
+    async def track_untracked_async(cls, grace_seconds: float = COVER_GC_GRACE_SECONDS) -> int:
+        """Add unreferenced rows of images stored without a row, so that they are deleted later
+
+        Parameters
+        ----------
+        grace_seconds : float
+            seconds an unreferenced image is kept, newer images are skipped
+
+        Returns
+        -------
+        int
+            number of images which got a row
+        """
+        modified_before = (datetime.now() - timedelta(seconds=grace_seconds)).timestamp()
+        keys = await run_in_threadpool(lambda: [key for key in cls.storage.keys(modified_before=modified_before)
+                                                if cls.is_key(key)])
+        tracked = 0
+        for start in range(0, len(keys), COVER_GC_BATCH_SIZE):
+            untracked = await CoverBlobModel.fetch_untracked_keys_async(keys=keys[start:start + COVER_GC_BATCH_SIZE])
+            await CoverBlobModel.track_async(keys=untracked)
+            tracked += len(untracked)
+        return tracked
+
+    @classmethod
+    async def delete_unreferenced_async(cls,
+                                        grace_seconds: float = COVER_GC_GRACE_SECONDS,
+                                        batch_size: int = COVER_GC_BATCH_SIZE) -> int:
+        """Delete one batch of images which are not referenced for grace_seconds, within a transaction
+
+        The rows of the images stay locked until the images are deleted and the transaction commits,
+        an image stored meanwhile waits for it in save_async and is written again.
+
+        Parameters
+        ----------
+        grace_seconds : float
+            seconds an unreferenced image is kept
+        batch_size : int
+            maximum number of images deleted
+
+        Returns
+        -------
+        int
+            number of deleted images
+        """
+        keys = await CoverBlobModel.delete_unreferenced_async(
+            updated_before=datetime.now() - timedelta(seconds=grace_seconds), limit=batch_size)
+        for key in keys:
+            await run_in_threadpool(cls.storage.delete, key)
+        return len(keys)
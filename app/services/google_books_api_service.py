@@ -1,20 +1,169 @@
+import asyncio
+import os
 from io import BytesIO
+from typing import Any, Dict, Optional, Tuple
 
-import requests
+import httpx
+from fastapi import status
+from fastapi.concurrency import run_in_threadpool
 from PIL import Image
 
+from app.core.metrics import Metrics
+from app.core.resilience import CircuitBreaker, TokenBucket, backoff_delay, parse_retry_after
+from app.core.single_flight import SingleFlight
 from app.exceptions.exceptions import GoogleBooksApiException
 from app.exceptions.message import ExceptionMessage
 from app.schemas.api import GoogleBookSchema
+from app.services.book_metadata_cache_service import BookMetadataCacheService
+from app.services.cover_storage_service import CoverStorageService
+
+CONNECT_TIMEOUT = float(os.getenv('GOOGLE_BOOKS_API_CONNECT_TIMEOUT', '3'))
+READ_TIMEOUT = float(os.getenv('GOOGLE_BOOKS_API_READ_TIMEOUT', '10'))
+MAX_CONNECTIONS = int(os.getenv('GOOGLE_BOOKS_API_MAX_CONNECTIONS', '20'))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('GOOGLE_BOOKS_API_MAX_KEEPALIVE_CONNECTIONS', '10'))
+KEEPALIVE_EXPIRY = float(os.getenv('GOOGLE_BOOKS_API_KEEPALIVE_EXPIRY', '30'))
+# requests per second and burst shared by all callers in the worker
+RATE_LIMIT = float(os.getenv('GOOGLE_BOOKS_API_RATE_LIMIT', '10'))
+RATE_LIMIT_BURST = float(os.getenv('GOOGLE_BOOKS_API_RATE_LIMIT_BURST', '10'))
+# retries of 429, 5xx and transport errors
+RETRIES = int(os.getenv('GOOGLE_BOOKS_API_RETRIES', '3'))
+BACKOFF_BASE = float(os.getenv('GOOGLE_BOOKS_API_BACKOFF_BASE', '0.5'))
+BACKOFF_MAX = float(os.getenv('GOOGLE_BOOKS_API_BACKOFF_MAX', '8'))
+# consecutive failed requests which open the circuit, and seconds until a trial request
+CIRCUIT_BREAKER_THRESHOLD = int(os.getenv('GOOGLE_BOOKS_API_CIRCUIT_BREAKER_THRESHOLD', '5'))
+CIRCUIT_BREAKER_RESET_TIMEOUT = float(os.getenv('GOOGLE_BOOKS_API_CIRCUIT_BREAKER_RESET_TIMEOUT', '30'))
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# transport errors caused by the request itself, neither retried nor counted by the circuit breaker
+NON_RETRY_TRANSPORT_ERRORS = (httpx.UnsupportedProtocol, httpx.LocalProtocolError)
+
+# bytes of a downloaded cover image, and pixels decoded from it
+COVER_IMAGE_MAX_BYTES = int(os.getenv('GOOGLE_BOOKS_COVER_IMAGE_MAX_BYTES', str(2 * 1024 * 1024)))
+COVER_IMAGE_MAX_PIXELS = int(os.getenv('GOOGLE_BOOKS_COVER_IMAGE_MAX_PIXELS', str(4096 * 4096)))
+COVER_IMAGE_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP'}
+# formats stored as downloaded, others are transcoded to PNG
+COVER_IMAGE_EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+# PIL refuses to decode images far above the limit (decompression bombs)
+Image.MAX_IMAGE_PIXELS = COVER_IMAGE_MAX_PIXELS
+
+
+def create_client(**kwargs) -> httpx.AsyncClient:
+    """Create the HTTP client shared by the requests to Google Books API
+
+    Returns
+    -------
+    httpx.AsyncClient
+        client with keep-alive connection pool over HTTP/2
+    """
+    return httpx.AsyncClient(timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                             limits=httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                                 max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                                                 keepalive_expiry=KEEPALIVE_EXPIRY),
+                             http2=True,
+                             **kwargs)
 
 
 class GoogleBooksApiService:
     """Service for Google Books API"""
 
+    _client: Optional[httpx.AsyncClient] = None
+    # concurrent lookups of the same ISBN share one upstream call
+    _book_data_flights = SingleFlight()
+    _cover_image_flights = SingleFlight()
+    rate_limiter = TokenBucket(rate=RATE_LIMIT, capacity=RATE_LIMIT_BURST)
+    circuit_breaker = CircuitBreaker(failure_threshold=CIRCUIT_BREAKER_THRESHOLD,
+                                     reset_timeout=CIRCUIT_BREAKER_RESET_TIMEOUT)
+    retries = 0
+
     @classmethod
-    def fetch_book_data(cls, isbn: str):
+    def start(cls, client: Optional[httpx.AsyncClient] = None) -> None:
+        """Open the shared HTTP client, called on startup of the application
+
+        Parameters
+        ----------
+        client : httpx.AsyncClient, optional
+            client to use instead of the default one
+        """
+        cls._client = client or create_client()
+
+    @classmethod
+    async def stop(cls) -> None:
+        """Close the shared HTTP client, called on shutdown of the application"""
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+
+    @classmethod
+    def client(cls) -> httpx.AsyncClient:
+        """Shared HTTP client, opened on first use outside of the application"""
+        if cls._client is None:
+            cls.start()
+        return cls._client
+
+    @classmethod
+    async def _get(cls, url: str, stream: bool = False) -> httpx.Response:
+        """Send GET request to Google Books API
+
+        Requests are rate limited, 429, 5xx and transport errors are retried with jittered
+        exponential backoff honoring Retry-After, and fail fast while the circuit is open.
+        Errors of the request itself, such as an unsupported URL scheme, are raised at once.
+
+        Parameters
+        ----------
+        url : str
+            URL to request
+        stream : bool
+            if True, the body is not read and the caller must close the response
+
+        Returns
+        -------
+        httpx.Response
+            the last response
+
+        Raises
+        ------
+        GoogleBooksApiException
+            503 if the circuit is open
+        httpx.TransportError
+            if the last attempt failed without response
+        """
+        if not cls.circuit_breaker.allow():
+            raise GoogleBooksApiException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                          message=ExceptionMessage.GOOGLE_BOOKS_API_UNAVAILABLE)
+        for attempt in range(RETRIES + 1):
+            await cls.rate_limiter.acquire()
+            try:
+                client = cls.client()
+                response = await client.send(client.build_request('GET', url), stream=stream)
+            except NON_RETRY_TRANSPORT_ERRORS:
+                raise
+            except httpx.TransportError:
+                if attempt == RETRIES:
+                    cls.circuit_breaker.record_failure()
+                    raise
+                delay = backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX)
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    cls.circuit_breaker.record_success()
+                    return response
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if attempt == RETRIES or (retry_after is not None and retry_after > BACKOFF_MAX):
+                    cls.circuit_breaker.record_failure()
+                    return response
+                await response.aclose()
+                delay = retry_after if retry_after is not None else \
+                    backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX)
+            cls.retries += 1
+            await asyncio.sleep(delay)
+
+    @classmethod
+    async def fetch_book_data(cls, isbn: str):
         """Fetches book data from Google Books API
 
+        The response is cached by BookMetadataCacheService, including ISBNs unknown to the API.
+        Concurrent calls for the same ISBN wait for the first one and share its result.
+
         Parameters
         ----------
         isbn : str
@@ -30,19 +179,16 @@ class GoogleBooksApiService:
         cover_url : str
             URL of book cover
         """
+        return await cls._book_data_flights.do(isbn, lambda: cls._fetch_book_data(isbn))
+
+    @classmethod
+    async def _fetch_book_data(cls, isbn: str) -> GoogleBookSchema:
+        found, data = await BookMetadataCacheService.get(isbn)
+        if not found:
+            data = await cls._fetch_volume_info(isbn)
+            await BookMetadataCacheService.set(isbn, data)
 
-        url = f'https://www.googleapis.com/books/v1/volumes?q=isbn:{isbn}'
-        try:
-            response = requests.get(url, timeout=5)
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as http_err:
-            print(f'HTTP error occurred: {http_err}')
-            raise GoogleBooksApiException(message=ExceptionMessage.GOOGLE_BOOKS_API_HTTP_ERROR) from http_err
-        except Exception as err:
-            print(f'Unexpected error occurred: {err}')
-            raise GoogleBooksApiException(message=ExceptionMessage.GOOGLE_BOOKS_API_UNEXPECTED_ERROR) from err
         try:
-            data = response.json()['items'][0]['volumeInfo']
             title = data['title']
             authors = data['authors']
             published_at = data['publishedDate']
@@ -55,13 +201,49 @@ class GoogleBooksApiService:
             return google_book_schema
         except (KeyError, TypeError, IndexError) as err:
             print("Invalid response received from the API")
-            print("Response:", response.json())
+            print("Response:", data)
             raise GoogleBooksApiException(message=ExceptionMessage.GOOGLE_BOOKS_API_INVALID_RESPONSE) from err
 
     @classmethod
-    def save_cover_image(cls, google_book_schema: GoogleBookSchema, isbn: str):
+    async def _fetch_volume_info(cls, isbn: str) -> Optional[Dict[str, Any]]:
+        """Fetches raw volumeInfo from Google Books API
+
+        Parameters
+        ----------
+        isbn : str
+            ISBN of book
+        Returns
+        -------
+        Optional[Dict[str, Any]]
+            volumeInfo of the first item, None if no item is found
+        """
+        url = f'https://www.googleapis.com/books/v1/volumes?q=isbn:{isbn}'
+        try:
+            response = await cls._get(url)
+            response.raise_for_status()
+        except GoogleBooksApiException:
+            raise
+        except httpx.HTTPStatusError as http_err:
+            print(f'HTTP error occurred: {http_err}')
+            raise GoogleBooksApiException(message=ExceptionMessage.GOOGLE_BOOKS_API_HTTP_ERROR) from http_err
+        except Exception as err:
+            print(f'Unexpected error occurred: {err}')
+            raise GoogleBooksApiException(message=ExceptionMessage.GOOGLE_BOOKS_API_UNEXPECTED_ERROR) from err
+        try:
+            body = response.json()
+        except ValueError as err:
+            raise GoogleBooksApiException(message=ExceptionMessage.GOOGLE_BOOKS_API_UNEXPECTED_ERROR) from err
+        try:
+            return body['items'][0]['volumeInfo']
+        except (KeyError, TypeError, IndexError):
+            return None
+
+    @classmethod
+    async def save_cover_image(cls, google_book_schema: GoogleBookSchema, isbn: str) -> Optional[str]:
         """Get cover image of book from Google Books API
 
+        Concurrent calls for the same ISBN wait for the first one and share its result.
+
         Parameters
         ----------
         google_book_schema : GoogleBookSchema
@@ -70,24 +252,119 @@ class GoogleBooksApiService:
             ISBN of book
         Returns
         -------
-        cover_image : PIL.Image
-            Cover image of book
+        Optional[str]
+            key of the cover image in CoverStorageService, None if the book has no cover
         """
-        try:
-            res = requests.get(google_book_schema.cover_url, timeout=10)
-            res.raise_for_status()
+        return await cls.save_cover_url(cover_url=google_book_schema.cover_url, isbn=isbn)
+
+    @classmethod
+    async def save_cover_url(cls, cover_url: str, isbn: str) -> Optional[str]:
+        """Get cover image of book from its URL, used when the cover was not fetched with the book data
+
+        Concurrent calls for the same ISBN wait for the first one and share its result.
 
-            # check if image is valid
-            img = Image.open(BytesIO(res.content))
+        Parameters
+        ----------
+        cover_url : str
+            URL of book cover
+        isbn : str
+            ISBN of book
+        Returns
+        -------
+        Optional[str]
+            key of the cover image in CoverStorageService, None if the URL is the placeholder
+            of a book without cover
+        """
+        if not cover_url.startswith(('http://', 'https://')):
+            return None
+        return await cls._cover_image_flights.do(isbn, lambda: cls._save_cover_image(cover_url, isbn))
 
-            # save image
-            img.save(f"app/static/images/{isbn}.jpg")
+    @classmethod
+    async def _save_cover_image(cls, cover_url: str, isbn: str) -> str:
+        try:
+            res = await cls._get(cover_url, stream=True)
+            try:
+                res.raise_for_status()
+                content = await cls._read_image(res)
+            finally:
+                await res.aclose()
 
-            return f"app/static/images/{isbn}.jpg"
+            # decoding and encoding the image is CPU bound, keep it off the event loop
+            content, extension = await run_in_threadpool(cls._prepare_image, content=content)
+            return await CoverStorageService.save_async(content=content, extension=extension)
 
-        except requests.exceptions.RequestException as e:
+        except GoogleBooksApiException:
+            raise
+        except httpx.HTTPError as e:
             raise GoogleBooksApiException(message=ExceptionMessage.GOOGLE_BOOKS_API_IMAGE_DOWNLOAD_ERROR) from e
         except IOError as e:
             raise GoogleBooksApiException(message=ExceptionMessage.GOOGLE_BOOKS_API_IMAGE_DOWNLOAD_ERROR) from e
         except Exception as e:
-            raise GoogleBooksApiException(message=ExceptionMessage.GOOGLE_BOOKS_API_IMAGE_DOWNLOAD_ERROR) from e
\ No newline at end of file
+            raise GoogleBooksApiException(message=ExceptionMessage.GOOGLE_BOOKS_API_IMAGE_DOWNLOAD_ERROR) from e
+
+    @staticmethod
+    async def _read_image(res: httpx.Response) -> bytes:
+        """Read the streamed body of an image response
+
+        Reading stops as soon as the body exceeds COVER_IMAGE_MAX_BYTES, so a huge response
+        never has to fit in memory.
+
+        Parameters
+        ----------
+        res : httpx.Response
+            streamed response
+
+        Returns
+        -------
+        bytes
+            body of the response
+
+        Raises
+        ------
+        GoogleBooksApiException
+            if the response is not an image or is too large
+        """
+        content_type = res.headers.get('Content-Type')
+        if content_type is not None and not content_type.lower().startswith('image/'):
+            raise GoogleBooksApiException(message=ExceptionMessage.GOOGLE_BOOKS_API_IMAGE_DOWNLOAD_ERROR)
+        content_length = res.headers.get('Content-Length')
+        if content_length is not None and content_length.isdigit() and int(content_length) > COVER_IMAGE_MAX_BYTES:
+            raise GoogleBooksApiException(message=ExceptionMessage.GOOGLE_BOOKS_API_IMAGE_TOO_LARGE)
+
+        content = bytearray()
+        async for chunk in res.aiter_bytes():
+            content += chunk
+            if len(content) > COVER_IMAGE_MAX_BYTES:
+                raise GoogleBooksApiException(message=ExceptionMessage.GOOGLE_BOOKS_API_IMAGE_TOO_LARGE)
+        return bytes(content)
+
+    @staticmethod
+    def _prepare_image(content: bytes) -> Tuple[bytes, str]:
+        # only the header is read by open, check format and size before decoding the pixels
+        img = Image.open(BytesIO(content))
+        if img.format not in COVER_IMAGE_FORMATS:
+            raise GoogleBooksApiException(message=ExceptionMessage.GOOGLE_BOOKS_API_IMAGE_DOWNLOAD_ERROR)
+        if img.width * img.height > COVER_IMAGE_MAX_PIXELS:
+            raise GoogleBooksApiException(message=ExceptionMessage.GOOGLE_BOOKS_API_IMAGE_TOO_LARGE)
+
+        # the original bytes are kept unless the format has to be transcoded
+        if img.format in COVER_IMAGE_EXTENSIONS:
+            return content, COVER_IMAGE_EXTENSIONS[img.format]
+        png = BytesIO()
+        img.save(png, format='PNG')
+        return png.getvalue(), 'png'
+
+    @classmethod
+    def metrics(cls):
+        return {'book_data': cls._book_data_flights.stats(),
+                'cover_image': cls._cover_image_flights.stats()}
+
+    @classmethod
+    def upstream_metrics(cls):
+        return {'rate_limiter': cls.rate_limiter.stats(),
+                'circuit_breaker': cls.circuit_breaker.stats(),
+                'retries': cls.retries}
+
+
+Metrics.register('google_books_single_flight', GoogleBooksApiService.metrics)
+Metrics.register('google_books_upstream', GoogleBooksApiService.upstream_metrics)
@@ -1,37 +1,163 @@
 import base64
 import io
-from typing import Union
+import math
+import os
+from typing import Any, Dict, Hashable, Optional, Union
 
+from fastapi.concurrency import run_in_threadpool
 from PIL import Image
 
+from app.core.cache import LRUCache
+from app.core.metrics import Metrics
+from app.services.cover_storage_service import NO_IMAGE_PATH, CoverStorageService
+
+IMAGE_BASE64_CACHE_SIZE = int(os.getenv('IMAGE_BASE64_CACHE_SIZE', '1024'))
+IMAGE_BASE64_CACHE_MAX_BYTES = int(os.getenv('IMAGE_BASE64_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+# MIME types of the formats cover images are stored in
+MIME_TYPES = {'.jpg': 'image/jpeg',
+              '.jpeg': 'image/jpeg',
+              '.png': 'image/png',
+              '.webp': 'image/webp'}
+
 
 class ImageBase64Service():
 
+    # encoded images, limited by the number of images and by the total length of the encoded images
+    _cache = LRUCache(maxsize=IMAGE_BASE64_CACHE_SIZE, maxbytes=IMAGE_BASE64_CACHE_MAX_BYTES)
+    _no_image: Optional[bytes] = None
+
+    @classmethod
+    def load(cls) -> None:
+        """Encode the no image image once, called on startup of the application"""
+        with open(NO_IMAGE_PATH, 'rb') as f:
+            cls._no_image = base64.b64encode(f.read())
+
     @classmethod
     def encode(cls, image_path: str,
-               no_image_path: Union[str, None] = "static/images/no_image.png") -> bytes:
+               no_image_path: Union[str, None] = NO_IMAGE_PATH) -> bytes:
         """encode is a function that encodes an image to base64.
 
+        Encoded images are cached. Images in the storage never change, so their key is the cache key,
+        files saved before the cover storage are cached by path, modification time and size.
+
         Parameters
         ----------
         image_path : str
-            Path to the image
+            Key of the image in CoverStorageService, or path to the image
 
         no_image_path : str, optional
-            Path to the no image image, by default "static/images/no_image.png"
+            Path to the no image image, by default app/static/images/no_image.jpg
 
         Returns
         -------
         bytes
             Base64 encoded image
         """
+        cache_key = cls._cache_key(image_path)
+        if cache_key is not None:
+            found, encoded = cls._cache.get(cache_key)
+            if found:
+                return encoded
+            try:
+                encoded = base64.b64encode(cls._read(image_path))
+            except FileNotFoundError:
+                pass
+            else:
+                cls._cache.set(cache_key, encoded, ttl=math.inf, nbytes=len(encoded))
+                return encoded
+
+        return cls._encode_no_image(no_image_path)
+
+    @classmethod
+    def _encode_no_image(cls, no_image_path: Union[str, None]) -> bytes:
+        if no_image_path == NO_IMAGE_PATH:
+            if cls._no_image is None:
+                cls.load()
+            return cls._no_image
+        with open(no_image_path, 'rb') as f:
+            return base64.b64encode(f.read())
+
+    @classmethod
+    async def encode_async(cls, image_path: str,
+                           no_image_path: Union[str, None] = NO_IMAGE_PATH) -> bytes:
+        """Encode an image to base64 like encode, without blocking the event loop
+
+        Images in the storage are read with CoverStorageService.read_async,
+        files saved before the cover storage are encoded in the thread pool.
+
+        Parameters
+        ----------
+        image_path : str
+            Key of the image in CoverStorageService, or path to the image
+
+        no_image_path : str, optional
+            Path to the no image image, by default app/static/images/no_image.jpg
+
+        Returns
+        -------
+        bytes
+            Base64 encoded image
+        """
+        if not CoverStorageService.is_key(image_path):
+            return await run_in_threadpool(cls.encode, image_path, no_image_path)
+
+        found, encoded = cls._cache.get(image_path)
+        if found:
+            return encoded
         try:
-            with open(image_path, 'rb') as f:
-                img = f.read()
+            encoded = base64.b64encode(await CoverStorageService.read_async(key=image_path))
         except FileNotFoundError:
-            with open(no_image_path, 'rb') as f:
-                img = f.read()
-        return base64.b64encode(img)
+            return await run_in_threadpool(cls._encode_no_image, no_image_path)
+        cls._cache.set(image_path, encoded, ttl=math.inf, nbytes=len(encoded))
+        return encoded
+
+    @staticmethod
+    def _cache_key(image_path: str) -> Optional[Hashable]:
+        if CoverStorageService.is_key(image_path):
+            return image_path
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        return image_path, stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _read(image_path: str) -> bytes:
+        if CoverStorageService.is_key(image_path):
+            return CoverStorageService.read(image_path)
+        # covers saved before the cover storage are files
+        with open(image_path, 'rb') as f:
+            return f.read()
+
+    @classmethod
+    def metrics(cls) -> Dict[str, Any]:
+        return cls._cache.stats()
+
+    @classmethod
+    def mime_type(cls, image_path: str,
+                  no_image_path: Union[str, None] = NO_IMAGE_PATH) -> str:
+        """mime_type is a function that returns the MIME type of the image encoded by encode.
+
+        Parameters
+        ----------
+        image_path : str
+            Key of the image in CoverStorageService, or path to the image
+
+        no_image_path : str, optional
+            Path to the no image image, by default app/static/images/no_image.jpg
+
+        Returns
+        -------
+        str
+            MIME type from the extension of the image, image/jpeg if unknown
+        """
+        # keys of the storage end with the extension of the stored image, no need to look it up
+        if CoverStorageService.is_key(image_path):
+            path = image_path
+        else:
+            path = image_path if os.path.exists(image_path) else no_image_path
+        return MIME_TYPES.get(os.path.splitext(path)[1].lower(), 'image/jpeg')
 
     @classmethod
     def decode(cls, base64_img) -> Image:
@@ -50,3 +176,6 @@ class ImageBase64Service():
 
         img = base64.b64decode(base64_img)
         return Image.open(io.BytesIO(img))
+
+
+Metrics.register('image_base64_cache', ImageBase64Service.metrics)
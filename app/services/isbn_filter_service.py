@@ -0,0 +1,155 @@
+import os
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from app.core.metrics import Metrics
+from app.models import BookModel
+
+# seconds between loading the isbns saved by other workers
+REFRESH_INTERVAL = float(os.getenv('ISBN_FILTER_REFRESH_INTERVAL', '5'))
+# seconds of books loaded again by each refresh, books are committed some time after they are created
+REFRESH_OVERLAP = float(os.getenv('ISBN_FILTER_REFRESH_OVERLAP', '60'))
+# above this number of new isbns the filter is rebuilt instead of inserting one by one
+REBUILD_THRESHOLD = 1024
+
+
+class IsbnFilterService:
+    """
+    In-memory set of saved isbns, consulted before any upstream work for an isbn.
+
+    The isbns are kept as a sorted array of int64, 8 bytes per book, searched by bisection.
+    The filter is loaded on startup and extended on insert and by a periodic refresh,
+    so isbns saved by other workers are missed until the next refresh.
+    A miss is final, such a duplicate is rejected by the unique index of isbn when the book is saved.
+    Until it is loaded, every isbn may be saved and is probed in the database.
+    """
+    _isbns = array('q')
+    _loaded_until: Optional[datetime] = None
+    _loaded = False
+    _refreshing = False
+    _refreshed_at = 0.0
+    lookups = 0
+    positives = 0
+    false_positives = 0
+
+    @classmethod
+    async def load_async(cls) -> None:
+        """Load isbns of all books, called on startup of the application"""
+        cls.clear()
+        await cls.refresh_async()
+        cls._loaded = True
+
+    @classmethod
+    def clear(cls) -> None:
+        """Unload the filter, every isbn is probed in the database until it is loaded again"""
+        cls._isbns = array('q')
+        cls._loaded_until = None
+        cls._loaded = False
+        cls._refreshed_at = 0.0
+        cls.lookups = 0
+        cls.positives = 0
+        cls.false_positives = 0
+
+    @classmethod
+    async def refresh_async(cls) -> None:
+        """Load isbns of the books saved since the last refresh
+
+        Books created up to REFRESH_OVERLAP seconds before the last refresh are loaded again,
+        so books committed after a refresh which missed them are not missed for good.
+        """
+        if cls._refreshing:
+            return
+        cls._refreshing = True
+        started = datetime.now()
+        since = None if cls._loaded_until is None else cls._loaded_until - timedelta(seconds=REFRESH_OVERLAP)
+        try:
+            isbns = await BookModel.fetch_isbns_since_async(created_at=since)
+        finally:
+            cls._refreshing = False
+        cls._loaded_until = started
+        cls._refreshed_at = time.monotonic()
+        keys = [int(isbn) for isbn in isbns if isbn and isbn.isdigit()]
+        if len(keys) > REBUILD_THRESHOLD:
+            cls._isbns = array('q', sorted(set(cls._isbns).union(keys)))
+        else:
+            for key in keys:
+                cls._insert(key)
+
+    @classmethod
+    def _insert(cls, key: int) -> None:
+        index = bisect_left(cls._isbns, key)
+        if index == len(cls._isbns) or cls._isbns[index] != key:
+            cls._isbns.insert(index, key)
+
+    @classmethod
+    def add(cls, isbn: str) -> None:
+        """Add the isbn of a saved book
+
+        Parameters
+        ----------
+        isbn : str
+            normalized ISBN-13
+        """
+        cls._insert(int(isbn))
+
+    @classmethod
+    def might_contain(cls, isbn: str) -> bool:
+        """Check if the isbn may be saved
+
+        Parameters
+        ----------
+        isbn : str
+            normalized ISBN-13
+
+        Returns
+        -------
+        bool
+            False if the isbn was not saved at the last refresh, True if not loaded yet
+        """
+        if not cls._loaded:
+            return True
+        key = int(isbn)
+        index = bisect_left(cls._isbns, key)
+        return index < len(cls._isbns) and cls._isbns[index] == key
+
+    @classmethod
+    async def is_saved_async(cls, isbn: str) -> bool:
+        """Check if the isbn is saved
+
+        Only isbns in the filter are probed in the database.
+
+        Parameters
+        ----------
+        isbn : str
+            normalized ISBN-13
+
+        Returns
+        -------
+        bool
+            True if the isbn is saved
+        """
+        if cls._loaded and time.monotonic() - cls._refreshed_at >= REFRESH_INTERVAL:
+            await cls.refresh_async()
+        cls.lookups += 1
+        if not cls.might_contain(isbn):
+            return False
+        cls.positives += 1
+        if await BookModel.exists_async(isbn=isbn):
+            return True
+        cls.false_positives += 1
+        return False
+
+    @classmethod
+    def metrics(cls) -> Dict[str, Any]:
+        return {'loaded': cls._loaded,
+                'size': len(cls._isbns),
+                'bytes': len(cls._isbns) * cls._isbns.itemsize,
+                'lookups': cls.lookups,
+                'positives': cls.positives,
+                'false_positives': cls.false_positives}
+
+
+Metrics.register('isbn_filter', IsbnFilterService.metrics)
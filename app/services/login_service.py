@@ -1,24 +1,32 @@
+import hashlib
 import os
+import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import List
+from typing import Any, Dict, List
 
 from fastapi import Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 
+from app.core.cache import LRUCache
+from app.core.metrics import Metrics
 from app.exceptions.exceptions import InvalidCredentialsException, NotEnoughPermissionsException
 
 SECRET_KEY = os.environ.get("TOKEN_SECRET")
 ALGORITHM = os.environ.get("TOKEN_ALGORITHM")
+# number of verified tokens kept in memory of each worker, until they expire
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', '4096'))
 
 http_bearer = HTTPBearer()
 
 
-@dataclass
+@dataclass(frozen=True)
 class TokenData:
     """Token data
 
+    Frozen, since verified tokens share the same object.
+
     Attributes
     ----------
     user_name : str
@@ -33,6 +41,9 @@ class TokenData:
 
 class LoginService:
 
+    # decoded tokens keyed by the hash of the token, only tokens with a valid signature are cached
+    _token_cache = LRUCache(maxsize=TOKEN_CACHE_SIZE)
+
     @classmethod
     def create_access_token(cls, data: dict) -> str:
         """Create access token
@@ -60,6 +71,8 @@ class LoginService:
                      token: HTTPAuthorizationCredentials = Depends(http_bearer)) -> TokenData:
         """Verify token
 
+        Verified tokens are cached until they expire, so the signature of a token is checked once per worker.
+
         Parameters
         ----------
         token : str
@@ -75,11 +88,34 @@ class LoginService:
         InvalidCredentialsException
             if token is invalid
         """
+        cache_key = hashlib.sha256(token.credentials.encode()).digest()
+        found, token_data = cls._token_cache.get(cache_key)
+        if found:
+            return token_data
+
         try:
             payload = jwt.decode(token.credentials, SECRET_KEY, algorithms=[ALGORITHM])
             user_name: str = payload.get("sub")
             if user_name is None:
                 raise InvalidCredentialsException()
-            return TokenData(user_name=user_name, role=payload.get("role"))
+            token_data = TokenData(user_name=user_name, role=payload.get("role"))
         except JWTError as e:
             raise InvalidCredentialsException() from e
+
+        # tokens without expiration are not cached
+        expires_at = payload.get("exp")
+        if isinstance(expires_at, (int, float)):
+            cls._token_cache.set(cache_key, token_data, ttl=expires_at - time.time())
+        return token_data
+
+    @classmethod
+    def clear(cls) -> None:
+        """Forget the verified tokens"""
+        cls._token_cache.clear()
+
+    @classmethod
+    def metrics(cls) -> Dict[str, Any]:
+        return cls._token_cache.stats()
+
+
+Metrics.register('token_cache', LoginService.metrics)
@@ -0,0 +1,221 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+import bcrypt
+
+from app.core.metrics import Metrics
+
+T = TypeVar('T')
+
+# threads hashing and verifying passwords, bcrypt releases the GIL so they run in parallel
+WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+# work factor of new hashes, calibrated on startup if not set
+ROUNDS = os.getenv('PASSWORD_HASH_ROUNDS')
+# seconds a hash should take on this hardware, and the range of the calibrated work factor
+TARGET_SECONDS = float(os.getenv('PASSWORD_HASH_TARGET_SECONDS', '0.25'))
+MIN_ROUNDS = int(os.getenv('PASSWORD_HASH_MIN_ROUNDS', '10'))
+MAX_ROUNDS = int(os.getenv('PASSWORD_HASH_MAX_ROUNDS', '16'))
+
+# work factor timed by the calibration, each round doubles the time
+CALIBRATION_ROUNDS = 8
+
+
+class PasswordService:
+    """Service for hashing and verifying passwords with bcrypt
+
+    bcrypt is slow by design, so it runs in a pool of threads of a fixed size
+    instead of blocking the event loop. Requests beyond the size of the pool wait in its queue.
+    """
+
+    rounds = int(ROUNDS) if ROUNDS else 12
+    _calibrated = ROUNDS is not None
+    _executor: Optional[ThreadPoolExecutor] = None
+    _pending = 0
+    max_pending = 0
+    wait_seconds_total = 0.0
+    hashes = 0
+    verifications = 0
+    rehashes = 0
+
+    @classmethod
+    def start(cls) -> None:
+        """Start the pool of threads, called on startup of the application"""
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='password')
+
+    @classmethod
+    def stop(cls) -> None:
+        """Stop the pool of threads, called on shutdown of the application"""
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=True)
+            cls._executor = None
+
+    @classmethod
+    def calibrate(cls, target_seconds: float = TARGET_SECONDS) -> int:
+        """Choose the work factor of new hashes, called on startup of the application
+
+        The largest work factor whose hash is estimated to take at most target_seconds is chosen,
+        within MIN_ROUNDS and MAX_ROUNDS. The work factor is not changed if PASSWORD_HASH_ROUNDS is set.
+
+        Parameters
+        ----------
+        target_seconds : float
+            seconds a hash should take
+
+        Returns
+        -------
+        int
+            work factor of new hashes
+        """
+        if cls._calibrated:
+            return cls.rounds
+        seconds = min(cls._time_hash(CALIBRATION_ROUNDS) for _ in range(3))
+        rounds = MIN_ROUNDS
+        while rounds < MAX_ROUNDS and seconds * 2 ** (rounds + 1 - CALIBRATION_ROUNDS) <= target_seconds:
+            rounds += 1
+        cls.rounds = rounds
+        cls._calibrated = True
+        return rounds
+
+    @staticmethod
+    def _time_hash(rounds: int) -> float:
+        started = time.perf_counter()
+        bcrypt.hashpw(b'calibration', bcrypt.gensalt(rounds=rounds))
+        return time.perf_counter() - started
+
+    @classmethod
+    def gensalt(cls) -> str:
+        return bcrypt.gensalt(rounds=cls.rounds).decode()
+
+    @classmethod
+    def hash(cls, password: str, salt: Optional[str] = None) -> str:
+        """Hash a password in the calling thread
+
+        Parameters
+        ----------
+        password : str
+            password
+        salt : Optional[str]
+            salt with the work factor, a new one if None
+
+        Returns
+        -------
+        str
+            hashed password
+        """
+        cls.hashes += 1
+        return bcrypt.hashpw(password.encode(), (salt or cls.gensalt()).encode()).decode()
+
+    @classmethod
+    def verify(cls, password: str, hashed_password: str) -> bool:
+        """Verify a password in the calling thread"""
+        cls.verifications += 1
+        return bcrypt.checkpw(password.encode(), hashed_password.encode())
+
+    @classmethod
+    async def hash_async(cls, password: str) -> str:
+        """Hash a password in the pool
+
+        Parameters
+        ----------
+        password : str
+            password
+
+        Returns
+        -------
+        str
+            hashed password with the current work factor
+        """
+        return await cls._run(cls.hash, password)
+
+    @classmethod
+    async def verify_async(cls, password: str, hashed_password: str) -> bool:
+        """Verify a password in the pool
+
+        Parameters
+        ----------
+        password : str
+            password
+        hashed_password : str
+            hashed password
+
+        Returns
+        -------
+        bool
+            True if the password matches the hash
+        """
+        return await cls._run(cls.verify, password, hashed_password)
+
+    @classmethod
+    def needs_rehash(cls, hashed_password: str) -> bool:
+        """Check if a hash has a lower work factor than new hashes
+
+        Parameters
+        ----------
+        hashed_password : str
+            hashed password such as $2b$12$...
+
+        Returns
+        -------
+        bool
+            True if the password should be hashed again
+        """
+        try:
+            return int(hashed_password.split('$')[2]) < cls.rounds
+        except (IndexError, ValueError):
+            return False
+
+    @classmethod
+    async def rehash_async(cls, password: str, hashed_password: str) -> Optional[str]:
+        """Hash a verified password again if its hash has a lower work factor than new hashes
+
+        Parameters
+        ----------
+        password : str
+            password which matches hashed_password
+        hashed_password : str
+            stored hashed password
+
+        Returns
+        -------
+        Optional[str]
+            new hashed password, None if the stored one is up to date
+        """
+        if not cls.needs_rehash(hashed_password):
+            return None
+        cls.rehashes += 1
+        return await cls.hash_async(password)
+
+    @classmethod
+    async def _run(cls, fn: Callable[..., T], *args) -> T:
+        cls.start()
+        cls._pending += 1
+        cls.max_pending = max(cls.max_pending, cls._pending)
+        submitted = time.perf_counter()
+
+        def timed():
+            return time.perf_counter(), fn(*args)
+
+        try:
+            started, result = await asyncio.get_running_loop().run_in_executor(cls._executor, timed)
+        finally:
+            cls._pending -= 1
+        cls.wait_seconds_total += started - submitted
+        return result
+
+    @classmethod
+    def metrics(cls) -> Dict[str, Any]:
+        return {'rounds': cls.rounds,
+                'workers': WORKERS,
+                'pending': cls._pending,
+                'max_pending': cls.max_pending,
+                'wait_seconds_total': round(cls.wait_seconds_total, 6),
+                'hashes': cls.hashes,
+                'verifications': cls.verifications,
+                'rehashes': cls.rehashes}
+
+
+Metrics.register('password_hash', PasswordService.metrics)
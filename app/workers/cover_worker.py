@@ -0,0 +1,123 @@
+import asyncio
+import os
+import time
+from logging import getLogger
+
+from app.models import AsyncEngine, AsyncReplicaEngine, BookModel, session_scope
+from app.services.book_cover_service import BookCoverService
+from app.services.cover_image_service import CoverImageService
+from app.services.cover_storage_service import (COVER_GC_BATCH_SIZE, COVER_GC_GRACE_SECONDS,
+                                                   CoverStorageService)
+from app.services.google_books_api_service import GoogleBooksApiService
+
+worker_logger = getLogger('app.cover_worker')
+
+# number of deferred covers claimed at a time, fetched one at a time
+BATCH_SIZE = int(os.getenv('COVER_WORKER_BATCH_SIZE', '10'))
+# seconds a claimed cover is left to the worker which claimed it, before other workers retry it
+LEASE_SECONDS = float(os.getenv('COVER_WORKER_LEASE_SECONDS', '600'))
+# seconds to wait when no cover is deferred, or fetching them failed
+POLL_INTERVAL = float(os.getenv('COVER_WORKER_POLL_INTERVAL', '60'))
+# seconds between collections of unreferenced cover images
+GC_INTERVAL = float(os.getenv('COVER_GC_INTERVAL', '3600'))
+
+
+async def run_once(batch_size: int = BATCH_SIZE, lease_seconds: float = LEASE_SECONDS) -> int:
+    """Fetch one batch of deferred covers
+
+    The books are claimed in a short transaction of their own, so any number of workers can run at the same time
+    without holding locks while the covers are downloaded. Each cover is saved in its own transaction,
+    which begins after the download. Covers which fail are retried once the claim expires.
+    Covers are fetched one at a time, leaving the rate limit of Google Books API to the requests.
+
+    Parameters
+    ----------
+    batch_size : int
+        maximum number of books
+    lease_seconds : float
+        seconds until other workers may claim the books again
+
+    Returns
+    -------
+    int
+        number of fetched covers
+    """
+    async with session_scope():
+        claimed = await BookModel.claim_deferred_covers_async(limit=batch_size, lease_seconds=lease_seconds)
+
+    fetched = 0
+    for isbn, cover_url in claimed:
+        try:
+            async with session_scope():
+                if await BookCoverService.fetch_deferred_async(isbn=isbn, cover_url=cover_url) is not None:
+                    fetched += 1
+        except Exception:
+            worker_logger.exception('failed to fetch the deferred cover of %s', isbn)
+    return fetched
+
+
+async def collect_garbage(grace_seconds: float = COVER_GC_GRACE_SECONDS) -> int:
+    """Delete cover images which are no longer referenced by any book
+
+    Images stored without a row, such as by a failed request, get a row first and are deleted by a later collection.
+
+    Parameters
+    ----------
+    grace_seconds : float
+        seconds an unreferenced image is kept
+
+    Returns
+    -------
+    int
+        number of deleted images
+    """
+    async with session_scope():
+        await CoverStorageService.track_untracked_async(grace_seconds=grace_seconds)
+    deleted = 0
+    while True:
+        async with session_scope():
+            collected = await CoverStorageService.delete_unreferenced_async(grace_seconds=grace_seconds,
+                                                                            batch_size=COVER_GC_BATCH_SIZE)
+        deleted += collected
+        if collected < COVER_GC_BATCH_SIZE:
+            return deleted
+
+
+async def run(batch_size: int = BATCH_SIZE, poll_interval: float = POLL_INTERVAL) -> None:
+    """Fetch deferred covers until cancelled
+
+    Parameters
+    ----------
+    batch_size : int
+        maximum number of books claimed at a time
+    poll_interval : float
+        seconds to wait when no cover is fetched
+    """
+    GoogleBooksApiService.start()
+    CoverImageService.start()
+    collected_at = 0.0
+    try:
+        while True:
+            if time.monotonic() - collected_at >= GC_INTERVAL:
+                collected_at = time.monotonic()
+                try:
+                    worker_logger.info('deleted %d unreferenced cover images', await collect_garbage())
+                except Exception:
+                    worker_logger.exception('failed to delete unreferenced cover images')
+            try:
+                fetched = await run_once(batch_size=batch_size)
+            except Exception:
+                worker_logger.exception('failed to fetch deferred covers')
+                fetched = 0
+            if fetched == 0:
+                await asyncio.sleep(poll_interval)
+    finally:
+        await GoogleBooksApiService.stop()
+        CoverImageService.stop()
+        await AsyncEngine.dispose()
+        if AsyncReplicaEngine is not None:
+            await AsyncReplicaEngine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
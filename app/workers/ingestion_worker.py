@@ -0,0 +1,90 @@
+import asyncio
+import os
+from datetime import datetime
+from logging import getLogger
+
+from app.models import AsyncEngine, AsyncReplicaEngine, IngestionJobItemModel, session_scope
+from app.services.book_ingestion_service import BookIngestionService
+from app.services.cover_image_service import CoverImageService
+from app.services.google_books_api_service import GoogleBooksApiService
+
+worker_logger = getLogger('app.worker')
+
+# number of job items ingested in one transaction
+BATCH_SIZE = int(os.getenv('INGESTION_WORKER_BATCH_SIZE', '20'))
+# seconds to wait when the queue is empty
+POLL_INTERVAL = float(os.getenv('INGESTION_WORKER_POLL_INTERVAL', '1'))
+
+
+async def run_once(batch_size: int = BATCH_SIZE) -> int:
+    """Ingest one batch of queued job items
+
+    The items are locked with SKIP LOCKED, so any number of workers can run at the same time.
+    Books and the results of the items are committed in the same transaction.
+    If ingestion raises, the items are marked as failed.
+
+    Parameters
+    ----------
+    batch_size : int
+        maximum number of items
+
+    Returns
+    -------
+    int
+        number of processed items, 0 if the queue is empty
+    """
+    item_ids = []
+    try:
+        async with session_scope():
+            items = await IngestionJobItemModel.claim_async(limit=batch_size)
+            item_ids = [item.id for item in items]
+            if not items:
+                return 0
+
+            isbns = list(dict.fromkeys(item.isbn for item in items))
+            results = {result.isbn: result for result in await BookIngestionService.ingest(isbns=isbns)}
+            for item in items:
+                item.status = results[item.isbn].status
+                item.detail = results[item.isbn].detail
+                item.updated_at = datetime.now()
+            return len(items)
+    except Exception as exc:
+        if not item_ids:
+            raise
+        worker_logger.exception('failed to ingest job items %s', item_ids)
+        async with session_scope():
+            await IngestionJobItemModel.fail_async(item_ids=item_ids, detail=str(exc) or type(exc).__name__)
+        return len(item_ids)
+
+
+async def run(batch_size: int = BATCH_SIZE, poll_interval: float = POLL_INTERVAL) -> None:
+    """Ingest queued job items until cancelled
+
+    Parameters
+    ----------
+    batch_size : int
+        maximum number of items in one transaction
+    poll_interval : float
+        seconds to wait when the queue is empty
+    """
+    GoogleBooksApiService.start()
+    CoverImageService.start()
+    try:
+        while True:
+            try:
+                processed = await run_once(batch_size=batch_size)
+            except Exception:
+                worker_logger.exception('failed to claim job items')
+                processed = 0
+            if processed == 0:
+                await asyncio.sleep(poll_interval)
+    finally:
+        await GoogleBooksApiService.stop()
+        CoverImageService.stop()
+        await AsyncEngine.dispose()
+        if AsyncReplicaEngine is not None:
+            await AsyncReplicaEngine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -2,6 +2,7 @@ import base64
 import os
 from contextlib import contextmanager
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from PIL import Image
@@ -9,8 +10,13 @@ from sqlalchemy.sql.ddl import CreateSchema, DropSchema
 from sqlalchemy_utils import database_exists
 from sqlalchemy_utils.functions.database import create_database
 
+from app.core.storage import LocalBlobStorage
 from app.main import app
-from app.models import BaseModel, Engine, session
+from app.models import AsyncEngine, AsyncReplicaEngine, BaseModel, Engine, async_session, session
+from app.services.book_metadata_cache_service import BookMetadataCacheService
+from app.services.cover_storage_service import CoverStorageService
+from app.services.google_books_api_service import GoogleBooksApiService
+from app.services.isbn_filter_service import IsbnFilterService
 from app.services.login_service import LoginService, TokenData
 
 
@@ -53,6 +59,8 @@ def setup_tables_at_function(request):
 
     BaseModel.metadata.drop_all(Engine)
     BaseModel.metadata.create_all(Engine)
+    # book ids restart with the tables
+    IsbnFilterService.clear()
 
     request.addfinalizer(drop_all_tables)
 
@@ -72,7 +80,9 @@ def setup_tables_at_class(request):
 
 @pytest.fixture()
 def app_client():
-    return TestClient(app)
+    # run lifespan so that pooled asyncpg connections are closed within the client's event loop
+    with TestClient(app) as client:
+        yield client
 
 
 @pytest.fixture()
@@ -82,6 +92,49 @@ def db_session(request):
     return session
 
 
+@pytest.fixture()
+def anyio_backend():
+    return 'asyncio'
+
+
+@pytest.fixture()
+async def async_db_session():
+    """async_db_session
+    AsyncSession for tests marked with pytest.mark.anyio
+    """
+    yield async_session
+    await async_session.remove()
+    await AsyncEngine.dispose()
+    if AsyncReplicaEngine is not None:
+        await AsyncReplicaEngine.dispose()
+
+
+@pytest.fixture()
+def cover_storage(tmpdir, monkeypatch):
+    """cover_storage
+    store cover images in a temp dir
+    """
+    storage = LocalBlobStorage(root=str(tmpdir.mkdir('covers')))
+    monkeypatch.setattr(CoverStorageService, 'storage', storage)
+    return storage
+
+
+@pytest.fixture()
+async def mock_google_books_api(async_db_session, cover_storage, monkeypatch):
+    """mock_google_books_api
+    replace the HTTP client of GoogleBooksApiService with one sending requests to the given handler
+    retries do not wait
+    """
+    def _mock(handler):
+        GoogleBooksApiService.start(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    monkeypatch.setattr('app.services.google_books_api_service.BACKOFF_BASE', 0)
+    BookMetadataCacheService.clear()
+    GoogleBooksApiService.circuit_breaker.reset()
+    yield _mock
+    await GoogleBooksApiService.stop()
+
+
 @pytest.fixture()
 def make_image(tmpdir):
     """make image and save to temp dir and return image path
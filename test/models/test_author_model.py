@@ -1,3 +1,4 @@
+import pytest
 from sqlalchemy import select
 
 from app.models import AuthorModel
@@ -99,3 +100,56 @@ class TestAuthorModel:
         # Assert
         assert authors is not None
         assert not len(authors)
+
+    @pytest.mark.anyio
+    async def test_fetch_by_names_async(self, db_session, async_db_session):
+        """Test for fetch_by_names_async method of AuthorModel"""
+        # Prepare
+        test_names = ['test_name1', 'test_name2']
+        for name in test_names:
+            AuthorModelFactory(name=name)
+        db_session.commit()
+
+        # Execute
+        authors = await AuthorModel.fetch_by_names_async(names=test_names)
+
+        # Assert
+        assert len(authors) == len(test_names)
+        for author in authors:
+            assert author.name in test_names
+
+    def test_upsert_many(self, db_session):
+        """Test for upsert_many method of AuthorModel
+        with saved and new names
+        """
+        # Prepare
+        saved_author = AuthorModelFactory(name='test_name1')
+        db_session.commit()
+
+        # Execute
+        author_ids = AuthorModel.upsert_many(names=['test_name2', 'test_name1', 'test_name2'])
+        db_session.commit()
+
+        # Assert
+        authors = db_session.execute(select(AuthorModel)).scalars().all()
+        assert author_ids == {author.name: author.id for author in authors}
+        assert author_ids['test_name1'] == saved_author.id
+        assert len(authors) == 2
+
+    @pytest.mark.anyio
+    async def test_upsert_many_async(self, db_session, async_db_session):
+        """Test for upsert_many_async method of AuthorModel
+        with saved and new names
+        """
+        # Prepare
+        saved_author = AuthorModelFactory(name='test_name1')
+        db_session.commit()
+
+        # Execute
+        author_ids = await AuthorModel.upsert_many_async(names=['test_name1', 'test_name2'])
+        await async_db_session.commit()
+
+        # Assert
+        authors = db_session.execute(select(AuthorModel)).scalars().all()
+        assert author_ids == {author.name: author.id for author in authors}
+        assert author_ids['test_name1'] == saved_author.id
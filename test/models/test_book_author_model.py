@@ -23,3 +23,21 @@ class TestBookAuthorModel:
         result = db_session.execute(stmt).scalars().first()
         assert result is not None
         assert result.book_id == book_model.id
+
+    def test_save_many(self, db_session):
+        """Test for save_many method of BookAuthorModel
+        """
+        # Prepare
+        book_model = BookModelFactory()
+        author_models = AuthorModelFactory.create_batch(2)
+        db_session.commit()
+        author_ids = [author_model.id for author_model in author_models]
+        BookAuthorModel.save(book_id=book_model.id, author_id=author_ids[0])
+
+        # Execute
+        BookAuthorModel.save_many(book_id=book_model.id, author_ids=author_ids + author_ids)
+        db_session.commit()
+
+        # Assert
+        stmt = select(BookAuthorModel.author_id).where(BookAuthorModel.book_id == book_model.id)
+        assert sorted(db_session.execute(stmt).scalars().all()) == sorted(author_ids)
@@ -1,48 +1,16 @@
 import datetime
 
 import pytest
-from sqlalchemy import select
+from sqlalchemy import func, select
 
 from app.exceptions.exceptions import DuplicateBookIsbnException
 from app.models import BookModel
 from app.models.factories import BookModelFactory
+from app.models.profiler import QueryProfile, current_profile
 
 
 class TestBookModel():
 
-    def test__is_duplicated_is_true(self, db_session):
-        """Test for _is_duplicated method of BookModel
-        with duplicated isbn
-        """
-        # Prepare
-        test_isbn = '9788576082675'
-        book_model = BookModelFactory(isbn=test_isbn)
-        db_session.commit()
-
-        # Execute
-        book = BookModel(title=book_model.title,
-                         isbn=book_model.isbn,
-                         cover_path=book_model.cover_path,
-                         published_at=book_model.published_at)
-
-        # Assert
-        assert book._is_duplicated() is True
-
-    def test__is_duplicated_is_false(self):
-        """Test for _is_duplicated method of BookModel
-        with non-duplicated isbn
-        """
-        # Prepare
-
-        # Execute
-        book = BookModel(title='test_title',
-                         isbn='9788576082675',
-                         cover_path='test_cover_path',
-                         published_at='2020-01-01')
-
-        # Assert
-        assert book._is_duplicated() is False
-
     def test_save_google_books_api_successfully(self, db_session):
         """Test for save_google_books_api method of BookModel
         with successful case
@@ -95,3 +63,87 @@ class TestBookModel():
         # Assert
         with pytest.raises(DuplicateBookIsbnException):
             book_model.save_google_books_api()
+
+    def test_save_google_books_api_with_duplicated_isbn_executes_one_statement(self, db_session):
+        """Test for save_google_books_api method of BookModel
+        the duplication is detected by the INSERT itself
+        """
+        # Prepare
+        test_isbn = '9788576082675'
+        BookModelFactory(isbn=test_isbn)
+        db_session.commit()
+        profile = QueryProfile()
+        token = current_profile.set(profile)
+
+        # Execute
+        with pytest.raises(DuplicateBookIsbnException):
+            BookModel(title='test_title',
+                      isbn=test_isbn,
+                      cover_path='test_cover_path',
+                      published_at='2020-01-01').save_google_books_api()
+        current_profile.reset(token)
+
+        # Assert
+        assert profile.statement_count == 1
+        assert list(profile.shapes)[0].startswith('INSERT INTO')
+
+    @pytest.mark.anyio
+    async def test_save_google_books_api_async_successfully(self, db_session, async_db_session):
+        """Test for save_google_books_api_async method of BookModel
+        with successful case
+        """
+        # Prepare
+        test_isbn = '9788576082675'
+
+        # Execute
+        book_model = BookModel(title='test_title',
+                               isbn=test_isbn,
+                               cover_path='test_cover_path',
+                               published_at=datetime.date(2020, 1, 1))
+        saved_book_model = await book_model.save_google_books_api_async()
+        await async_db_session.commit()
+
+        # Assert
+        assert saved_book_model.id is not None
+        stmt = select(BookModel).where(BookModel.isbn == test_isbn)
+        result = db_session.execute(stmt).scalars().first()
+        assert result is not None
+        assert result.title == 'test_title'
+
+    @pytest.mark.anyio
+    async def test_save_google_books_api_async_with_duplicated_isbn(self, db_session, async_db_session):
+        """Test for save_google_books_api_async method of BookModel
+        with duplicated isbn
+        """
+        # Prepare
+        test_isbn = '9788576082675'
+        BookModelFactory(isbn=test_isbn)
+        db_session.commit()
+
+        # Execute
+        book_model = BookModel(title='test_title',
+                               isbn=test_isbn,
+                               cover_path='test_cover_path',
+                               published_at=datetime.date(2020, 1, 1))
+
+        # Assert
+        with pytest.raises(DuplicateBookIsbnException):
+            await book_model.save_google_books_api_async()
+
+    @pytest.mark.anyio
+    async def test_lock_isbns_async(self, db_session, async_db_session):
+        """Test for lock_isbns_async method of BookModel
+        the lock is held until the end of the transaction
+        """
+        # Prepare
+        test_isbn = '9788576082675'
+        try_lock = select(func.pg_try_advisory_xact_lock(int(test_isbn)))
+
+        # Execute
+        await BookModel.lock_isbns_async(isbns=[test_isbn, '9784774193687'])
+
+        # Assert
+        assert db_session.execute(try_lock).scalar() is False
+        db_session.rollback()
+        await async_db_session.commit()
+        assert db_session.execute(try_lock).scalar() is True
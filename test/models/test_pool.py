@@ -0,0 +1,39 @@
+from sqlalchemy import text
+
+from app.models import Engine
+from app.models.pool import pool_status
+
+
+class TestPool:
+
+    def test_pool_status_counts_checkouts(self):
+        """Test for pool_status
+        checkouts and checked out connections are reported
+        """
+        # Prepare
+        checkouts = pool_status(Engine)['checkouts']
+
+        # Execute
+        with Engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+            status_in_use = pool_status(Engine)
+
+        # Assert
+        assert status_in_use['checked_out'] == 1
+        assert status_in_use['checkouts'] == checkouts + 1
+        assert pool_status(Engine)['checked_out'] == 0
+
+    def test_pool_status_survives_dispose(self):
+        """Test for pool_status
+        wait statistics are kept when the pool is recreated
+        """
+        # Prepare
+        with Engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+        checkouts = pool_status(Engine)['checkouts']
+
+        # Execute
+        Engine.dispose()
+
+        # Assert
+        assert pool_status(Engine)['checkouts'] == checkouts
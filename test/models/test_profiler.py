@@ -0,0 +1,73 @@
+import pytest
+
+from app.models import AuthorModel
+from app.models.profiler import N_PLUS_ONE_THRESHOLD, QueryProfile, QueryProfiler, current_profile
+
+
+@pytest.fixture()
+def query_profile():
+    profile = QueryProfile()
+    token = current_profile.set(profile)
+    yield profile
+    current_profile.reset(token)
+
+
+class TestQueryProfile:
+
+    def test_record_counts_statements(self, query_profile):
+        """Test for QueryProfile
+        statements executed while the profile is active are recorded
+        """
+        # Execute
+        AuthorModel.fetch_by_names(names=['test_name'])
+        AuthorModel(name='test_name')._is_duplicated()
+
+        # Assert
+        assert query_profile.statement_count == 2
+        assert query_profile.total_seconds > 0
+        assert len(query_profile.slowest) == 2
+        assert not query_profile.n_plus_one
+
+    def test_record_detects_n_plus_one(self, query_profile):
+        """Test for QueryProfile
+        repeated statement is reported with the call site
+        """
+        # Execute
+        for i in range(N_PLUS_ONE_THRESHOLD):
+            AuthorModel(name=f'test_name_{i}')._is_duplicated()
+
+        # Assert
+        assert len(query_profile.n_plus_one) == 1
+        call_site = list(query_profile.n_plus_one.values())[0]
+        assert 'app/models/author_model.py' in call_site
+        assert 'in _is_duplicated' in call_site
+
+    @pytest.mark.anyio
+    async def test_record_detects_n_plus_one_async(self, query_profile, async_db_session):
+        """Test for QueryProfile
+        call site of AsyncSession statements includes the awaiting coroutines
+        """
+        # Execute
+        for i in range(N_PLUS_ONE_THRESHOLD):
+            await AuthorModel.fetch_by_names_async(names=[f'test_name_{i}'])
+
+        # Assert
+        call_site = list(query_profile.n_plus_one.values())[0]
+        assert 'in fetch_by_names_async' in call_site
+
+    def test_query_profiler_collect(self):
+        """Test for QueryProfiler
+        profiles are aggregated per route
+        """
+        # Prepare
+        profile = QueryProfile()
+        for i in range(N_PLUS_ONE_THRESHOLD):
+            profile.record('SELECT 1', 0.001)
+
+        # Execute
+        QueryProfiler.collect('/test-route', profile)
+
+        # Assert
+        metrics = QueryProfiler.metrics()
+        assert metrics['routes']['/test-route']['statements'] >= N_PLUS_ONE_THRESHOLD
+        assert 'SELECT 1' in [offender['statement'] for offender in metrics['n_plus_one']]
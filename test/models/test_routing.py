@@ -0,0 +1,103 @@
+import pytest
+from sqlalchemy import create_engine, select, update
+
+from app.models import AuthorModel, Engine
+from app.models.routing import RoutingSession
+
+
+@pytest.fixture()
+def replica_engine():
+    # stand-in for the replica, pointing to the same database
+    replica = create_engine(Engine.url)
+    yield replica
+    replica.dispose()
+
+
+class TestRoutingSession:
+
+    def test_get_bind_read_goes_to_replica(self, replica_engine):
+        """Test for get_bind method of RoutingSession
+        with read-only statement
+        """
+        # Prepare
+        with RoutingSession(primary=Engine, replica=replica_engine) as routing_session:
+
+            # Execute
+            bind = routing_session.get_bind(clause=select(AuthorModel))
+
+        # Assert
+        assert bind is replica_engine
+
+    def test_get_bind_without_replica(self):
+        """Test for get_bind method of RoutingSession
+        without replica engine
+        """
+        # Prepare
+        with RoutingSession(primary=Engine) as routing_session:
+
+            # Execute
+            bind = routing_session.get_bind(clause=select(AuthorModel))
+
+        # Assert
+        assert bind is Engine
+
+    def test_get_bind_locking_read_goes_to_primary(self, replica_engine):
+        """Test for get_bind method of RoutingSession
+        with SELECT ... FOR UPDATE
+        """
+        # Prepare
+        with RoutingSession(primary=Engine, replica=replica_engine) as routing_session:
+
+            # Execute
+            bind = routing_session.get_bind(clause=select(AuthorModel).with_for_update())
+
+        # Assert
+        assert bind is Engine
+
+    def test_get_bind_use_primary(self, replica_engine):
+        """Test for get_bind method of RoutingSession
+        with use_primary execution option
+        """
+        # Prepare
+        with RoutingSession(primary=Engine, replica=replica_engine) as routing_session:
+
+            # Execute
+            bind = routing_session.get_bind(clause=select(AuthorModel).execution_options(use_primary=True))
+
+        # Assert
+        assert bind is Engine
+
+    def test_get_bind_sticks_to_primary_after_write(self, replica_engine):
+        """Test for get_bind method of RoutingSession
+        reads go to primary after flush until the transaction ends
+        """
+        # Prepare
+        with RoutingSession(primary=Engine, replica=replica_engine) as routing_session:
+            routing_session.add(AuthorModel(name='test_name'))
+
+            # Execute
+            routing_session.flush()
+            bind_in_transaction = routing_session.get_bind(clause=select(AuthorModel))
+            result = routing_session.execute(select(AuthorModel).where(AuthorModel.name == 'test_name'))
+            author = result.scalars().one_or_none()
+            routing_session.rollback()
+            bind_after_transaction = routing_session.get_bind(clause=select(AuthorModel))
+
+        # Assert
+        assert bind_in_transaction is Engine
+        assert author is not None
+        assert bind_after_transaction is replica_engine
+
+    def test_get_bind_dml_goes_to_primary(self, replica_engine):
+        """Test for get_bind method of RoutingSession
+        with DML statement
+        """
+        # Prepare
+        with RoutingSession(primary=Engine, replica=replica_engine) as routing_session:
+
+            # Execute
+            bind = routing_session.get_bind(clause=update(AuthorModel).values(name='test_name'))
+
+            # Assert
+            assert bind is Engine
+            assert routing_session.has_written is True
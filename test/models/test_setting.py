@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from app.models import AuthorModel, async_session, session, session_scope
+from app.models.factories import AuthorModelFactory
+
+
+class TestSessionScope:
+
+    @pytest.mark.anyio
+    async def test_session_scope_isolates_concurrent_scopes(self, async_db_session):
+        """Test for session_scope
+        concurrent scopes in one thread get their own sessions
+        """
+        # Prepare
+        sessions = []
+
+        async def _open_scope():
+            async with session_scope():
+                sessions.append((session(), async_session()))
+                await asyncio.sleep(0)
+
+        # Execute
+        await asyncio.gather(_open_scope(), _open_scope())
+
+        # Assert
+        assert sessions[0][0] is not sessions[1][0]
+        assert sessions[0][1] is not sessions[1][1]
+
+    @pytest.mark.anyio
+    async def test_session_scope_commits(self, db_session, async_db_session):
+        """Test for session_scope
+        changes are committed when the block exits normally
+        """
+        # Execute
+        async with session_scope():
+            await AuthorModel.upsert_many_async(names=['test_name'])
+
+        # Assert
+        stmt = select(AuthorModel).where(AuthorModel.name == 'test_name')
+        assert db_session.execute(stmt).scalars().one_or_none() is not None
+
+    @pytest.mark.anyio
+    async def test_session_scope_rolls_back(self, db_session, async_db_session):
+        """Test for session_scope
+        changes are rolled back when the block raises
+        """
+        # Execute
+        with pytest.raises(RuntimeError):
+            async with session_scope():
+                await AuthorModel.upsert_many_async(names=['test_name'])
+                AuthorModelFactory(name='test_name_2')
+                raise RuntimeError()
+
+        # Assert
+        stmt = select(AuthorModel).where(AuthorModel.name.in_(['test_name', 'test_name_2']))
+        assert not db_session.execute(stmt).scalars().all()
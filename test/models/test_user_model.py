@@ -4,8 +4,9 @@ from sqlalchemy import select
 
 from app.exceptions.exceptions import DuplicateUserException, InvalidUserEmailFormatException, UserNotFoundException
 from app.exceptions.message import ExceptionMessage
-from app.models import UserModel
+from app.models import UserAuthentication, UserModel
 from app.models.factories import UserModelFactory
+from app.services.password_service import PasswordService
 
 
 class TestUserModel():
@@ -269,6 +270,135 @@ class TestUserModel():
         assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
         assert exc_info.value.message == ExceptionMessage.USER_NOT_FOUND
 
+    @pytest.mark.anyio
+    async def test_authenticate_async_is_valid(self, db_session, async_db_session):
+        """Test authenticate_async method of UserModel
+        check if user is valid
+        """
+        # Prepare
+        test_user_email = 'sample@sample.com'
+        test_password = 'test_password'
+        UserModelFactory(email=test_user_email,
+                         password=test_password)
+        db_session.commit()
+
+        # Execute
+        is_valid = await UserModel.authenticate_async(test_password, test_user_email)
+
+        # Assert
+        assert is_valid is True
+
+    @pytest.mark.anyio
+    async def test_authenticate_async_rehashes_outdated_hash(self, db_session, async_db_session, monkeypatch):
+        """Test authenticate_async method of UserModel
+        check if a hash with a lower work factor is replaced
+        """
+        # Prepare
+        test_user_email = 'sample@sample.com'
+        test_password = 'test_password'
+        monkeypatch.setattr(PasswordService, 'rounds', 4)
+        UserModelFactory(email=test_user_email,
+                         password=test_password)
+        db_session.commit()
+        monkeypatch.setattr(PasswordService, 'rounds', 5)
+
+        # Execute
+        is_valid = await UserModel.authenticate_async(test_password, test_user_email)
+        await async_db_session.commit()
+
+        # Assert
+        assert is_valid is True
+        db_session.expire_all()
+        user = db_session.execute(select(UserModel).where(UserModel.email == test_user_email)).scalars().one()
+        assert user.password.startswith('$2b$05$')
+        assert UserModel.authenticate(test_password, test_user_email) is True
+
+    @pytest.mark.anyio
+    async def test_authenticate_async_user_not_found(self, async_db_session):
+        """Test authenticate_async method of UserModel
+        check if user is not found
+        """
+        # Prepare
+        test_user_email = 'sample@sample.com'
+
+        # Execute
+        with pytest.raises(UserNotFoundException) as exc_info:
+            await UserModel.authenticate_async('test_password', test_user_email)
+
+        # Assert
+        assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.anyio
+    async def test_authenticate_user_async(self, db_session, async_db_session):
+        """Test authenticate_user_async method of UserModel
+        check if user is fetched and authenticated
+        """
+        # Prepare
+        test_password = 'test_password'
+        test_user_model = UserModelFactory(password=test_password, is_verified=True)
+        db_session.commit()
+
+        # Execute
+        user = await UserModel.authenticate_user_async(test_password, test_user_model.email)
+        invalid_user = await UserModel.authenticate_user_async('invalid_password', test_user_model.email)
+
+        # Assert
+        assert user == UserAuthentication(id=test_user_model.id,
+                                          name=test_user_model.name,
+                                          role=test_user_model.role,
+                                          is_verified=True,
+                                          is_authenticated=True)
+        assert invalid_user.is_authenticated is False
+
+    @pytest.mark.anyio
+    async def test_authenticate_user_async_not_verified(self, db_session, async_db_session, mocker):
+        """Test authenticate_user_async method of UserModel
+        check if the password of a user who is not verified is not checked
+        """
+        # Prepare
+        test_password = 'test_password'
+        test_user_model = UserModelFactory(password=test_password, is_verified=False)
+        db_session.commit()
+        verify_async_spy = mocker.spy(PasswordService, 'verify_async')
+
+        # Execute
+        user = await UserModel.authenticate_user_async(test_password, test_user_model.email)
+
+        # Assert
+        assert (user.is_verified, user.is_authenticated) == (False, False)
+        verify_async_spy.assert_not_called()
+
+    @pytest.mark.anyio
+    async def test_authenticate_user_async_user_not_found(self, async_db_session):
+        """Test authenticate_user_async method of UserModel
+        check if user is not found
+        """
+        # Execute
+        with pytest.raises(UserNotFoundException) as exc_info:
+            await UserModel.authenticate_user_async('test_password', 'sample@sample.com')
+
+        # Assert
+        assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.anyio
+    async def test_fetch_user_by_email_async(self, db_session, async_db_session):
+        """Test fetch_user_by_email_async method of UserModel
+        check if user is fetched
+        """
+        # Prepare
+        test_user_model = UserModelFactory()
+        db_session.commit()
+
+        # Execute
+        user = await UserModel.fetch_user_by_email_async(test_user_model.email)
+
+        # Assert
+        assert user.id == test_user_model.id
+        assert user.name == test_user_model.name
+        assert user.email == test_user_model.email
+        assert user.role == test_user_model.role
+        assert user.is_verified == test_user_model.is_verified
+
     def test_exist_verification_token_exist(self, db_session):
         """Test exist_verification_token method of UserModel
         check if verification token exist
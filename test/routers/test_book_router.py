@@ -8,11 +8,21 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.security import AppRoles, AppRoutePermissions
-from app.models import AuthorModel, BookAuthorModel, BookModel
+from app.exceptions.exceptions import GoogleBooksApiException
+from app.exceptions.message import ExceptionMessage
+from app.models import (
+    AuthorModel,
+    BookAuthorModel,
+    BookModel,
+    IngestionJobItemModel,
+    IngestionJobModel,
+    IngestionJobStatus,
+)
 from app.routers.setting import AppRoutes
 from app.schemas.api import GoogleBookSchema
-from app.schemas.requests import BooksGoogleBooksApiSaveIn
-from app.schemas.responses import GoogleBooksApiSaveOut
+from app.schemas.requests import BooksGoogleBooksApiBatchSaveIn, BooksGoogleBooksApiSaveIn
+from app.schemas.responses import BookIngestionStatus, GoogleBooksApiSaveOut
+from app.services.isbn_filter_service import IsbnFilterService
 
 TEST_URL = f"{AppRoutes.Books.PREFIX}"
 TEST_PERMISSIONS = AppRoutePermissions.Books
@@ -39,8 +49,10 @@ def test_save_google_books_success(app_client: TestClient,
                                                    cover_url="https://via.placeholder.com/150"))
         mocker.patch('app.services.google_books_api_service.GoogleBooksApiService.save_cover_image',
                      return_value=f"app/static/images/{test_isbn}.jpg")
-        mocker.patch('app.services.image_service.ImageBase64Service.encode',
+        mocker.patch('app.services.image_service.ImageBase64Service.encode_async',
                      return_value=b'dummy_base64_image_data')
+        mocker.patch('app.services.image_service.ImageBase64Service.mime_type',
+                     return_value='image/jpeg')
         # Execute
         response = app_client.post(f"{TEST_URL}{AppRoutes.Books.POST_GOOGLE_BOOKS_URL}",
                                    json=books_google_books_api_save_in.model_dump())
@@ -73,3 +85,348 @@ def test_save_google_books_success(app_client: TestClient,
     for book_author_model in book_author_models:
         assert book_author_model.book_id == book_model.id
         assert book_author_model.author_id in [author_model.id for author_model in author_models]
+
+
+def test_save_google_books_with_saved_isbn(app_client: TestClient,
+                                           db_session: Session,
+                                           mocker,
+                                           override_verify_token_dependency):
+    """
+    Test save google books with an isbn which is already saved
+    """
+    # Prepare
+    test_isbn = "9784774193684"
+    db_session.add(BookModel(title="saved_title", isbn=test_isbn,
+                             cover_path="app/static/images/no_image.jpg", published_at="2020-01-01"))
+    db_session.commit()
+    # loaded by the filter on startup
+    IsbnFilterService.add(isbn=test_isbn)
+
+    with override_verify_token_dependency(AppRoles.ADMIN):
+        # Mock
+        fetch_book_data_mock = mocker.patch(
+            'app.services.google_books_api_service.GoogleBooksApiService.fetch_book_data')
+        # Execute
+        response = app_client.post(f"{TEST_URL}{AppRoutes.Books.POST_GOOGLE_BOOKS_URL}",
+                                   json=BooksGoogleBooksApiSaveIn(isbn=test_isbn).model_dump())
+
+    # Assert
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.json() == {'detail': ExceptionMessage.DUPLICATE_BOOK_ISBN}
+    fetch_book_data_mock.assert_not_called()
+
+
+def test_save_google_books_with_isbn_saved_since_refresh(app_client: TestClient,
+                                                         db_session: Session,
+                                                         mocker,
+                                                         override_verify_token_dependency):
+    """
+    Test save google books with an isbn saved by another worker since the last refresh of the filter
+    """
+    # Prepare
+    test_isbn = "9784774193684"
+    db_session.add(BookModel(title="saved_title", isbn=test_isbn,
+                             cover_path="app/static/images/no_image.jpg", published_at="2020-01-01"))
+    db_session.commit()
+
+    with override_verify_token_dependency(AppRoles.ADMIN):
+        # Mock
+        exists_async_spy = mocker.spy(BookModel, 'exists_async')
+        mocker.patch('app.services.google_books_api_service.GoogleBooksApiService.fetch_book_data',
+                     return_value=GoogleBookSchema(title="test_title",
+                                                   authors=["test_author 1"],
+                                                   published_at="2021-01-01",
+                                                   cover_url="https://via.placeholder.com/150"))
+        mocker.patch('app.services.google_books_api_service.GoogleBooksApiService.save_cover_image',
+                     return_value=f"app/static/images/{test_isbn}.jpg")
+        mocker.patch('app.services.cover_image_service.CoverImageService.render_async', return_value={})
+        # Execute
+        response = app_client.post(f"{TEST_URL}{AppRoutes.Books.POST_GOOGLE_BOOKS_URL}",
+                                   json=BooksGoogleBooksApiSaveIn(isbn=test_isbn).model_dump())
+
+    # Assert
+    # the miss of the filter is final, the unique index of isbn rejects the book
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.json() == {'detail': ExceptionMessage.DUPLICATE_BOOK_ISBN}
+    exists_async_spy.assert_not_called()
+    assert IsbnFilterService.might_contain(isbn=test_isbn) is True
+
+
+def test_save_google_books_batch(app_client: TestClient,
+                                 db_session: Session,
+                                 mocker,
+                                 override_verify_token_dependency):
+    """
+    Test save google books in batch
+    """
+    # Prepare
+    duplicate_isbn = "9784774193684"
+    created_isbn = "9788576082675"
+    not_found_isbn = "9784297100339"
+    error_isbn = "9784873119328"
+    db_session.add(BookModel(title="saved_title", isbn=duplicate_isbn,
+                             cover_path="app/static/images/no_image.jpg", published_at="2020-01-01"))
+    db_session.add(AuthorModel(name="test_author 1"))
+    db_session.commit()
+
+    def fetch_book_data(isbn):
+        if isbn == not_found_isbn:
+            raise GoogleBooksApiException(message=ExceptionMessage.GOOGLE_BOOKS_API_INVALID_RESPONSE)
+        if isbn == error_isbn:
+            raise GoogleBooksApiException(message=ExceptionMessage.GOOGLE_BOOKS_API_HTTP_ERROR)
+        return GoogleBookSchema(title="test_title",
+                                authors=["test_author 1", "test_author 2"],
+                                published_at="2021-01-01",
+                                cover_url="https://via.placeholder.com/150")
+
+    with override_verify_token_dependency(AppRoles.ADMIN):
+        # Mock
+        mocker.patch('app.services.google_books_api_service.GoogleBooksApiService.fetch_book_data',
+                     side_effect=fetch_book_data)
+        mocker.patch('app.services.google_books_api_service.GoogleBooksApiService.save_cover_image',
+                     side_effect=lambda google_book_schema, isbn: f"app/static/images/{isbn}.jpg")
+        # Execute
+        response = app_client.post(
+            f"{TEST_URL}{AppRoutes.Books.POST_GOOGLE_BOOKS_BATCH_URL}",
+            json=BooksGoogleBooksApiBatchSaveIn(isbns=[created_isbn, duplicate_isbn,
+                                                       not_found_isbn, error_isbn]).model_dump())
+
+    # Assert
+    # Check response
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()['results']
+    assert [(result['isbn'], result['status']) for result in results] == [
+        (created_isbn, BookIngestionStatus.CREATED),
+        (duplicate_isbn, BookIngestionStatus.DUPLICATE),
+        (not_found_isbn, BookIngestionStatus.NOT_FOUND),
+        (error_isbn, BookIngestionStatus.UPSTREAM_ERROR),
+    ]
+    assert results[0]['title'] == "test_title"
+
+    # Check database
+    db_session.expire_all()
+    stmt = select(BookModel).where(BookModel.isbn == created_isbn)
+    book_model: BookModel = db_session.execute(stmt).scalars().one()
+    stmt = select(AuthorModel).where(AuthorModel.name.in_(["test_author 1", "test_author 2"]))
+    author_models: List[AuthorModel] = db_session.execute(stmt).scalars().all()
+    stmt = select(BookAuthorModel).where(BookAuthorModel.book_id == book_model.id)
+    book_author_models: List[BookAuthorModel] = db_session.execute(stmt).scalars().all()
+
+    assert book_model.published_at == datetime.date(2021, 1, 1)
+    assert book_model.cover_path == f"app/static/images/{created_isbn}.jpg"
+    assert len(author_models) == 2
+    assert {book_author_model.author_id for book_author_model in book_author_models} == \
+        {author_model.id for author_model in author_models}
+    assert len(db_session.execute(select(BookModel)).scalars().all()) == 2
+
+
+def test_create_ingestion_job(app_client: TestClient,
+                              db_session: Session,
+                              override_verify_token_dependency):
+    """
+    Test create ingestion job
+    """
+    # Prepare
+    isbns = ["9788576082675", "9784774193687"]
+
+    with override_verify_token_dependency(AppRoles.ADMIN):
+        # Execute
+        response = app_client.post(f"{TEST_URL}{AppRoutes.Books.POST_JOBS_URL}",
+                                   json=BooksGoogleBooksApiBatchSaveIn(isbns=isbns).model_dump())
+
+    # Assert
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job = response.json()
+    assert job['status'] == IngestionJobStatus.QUEUED
+    assert job['total'] == 2
+    assert job['counts'] == {BookIngestionStatus.QUEUED: 2}
+
+    stmt = select(IngestionJobItemModel).where(IngestionJobItemModel.job_id == job['job_id'])
+    items: List[IngestionJobItemModel] = db_session.execute(stmt).scalars().all()
+    assert sorted(item.isbn for item in items) == sorted(isbns)
+    assert all(item.status == BookIngestionStatus.QUEUED for item in items)
+
+
+def test_get_ingestion_job(app_client: TestClient,
+                           db_session: Session,
+                           override_verify_token_dependency):
+    """
+    Test get ingestion job in progress
+    """
+    # Prepare
+    job = IngestionJobModel(total=2)
+    db_session.add(job)
+    db_session.flush()
+    db_session.add(IngestionJobItemModel(job_id=job.id, isbn="9788576082675", status=BookIngestionStatus.CREATED))
+    db_session.add(IngestionJobItemModel(job_id=job.id, isbn="9784774193687"))
+    db_session.commit()
+
+    with override_verify_token_dependency(AppRoles.ADMIN):
+        # Execute
+        response = app_client.get(f"{TEST_URL}{AppRoutes.Books.GET_JOB_URL.format(job_id=job.id)}")
+        not_found_response = app_client.get(f"{TEST_URL}{AppRoutes.Books.GET_JOB_URL.format(job_id=job.id + 1)}")
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {'job_id': job.id,
+                               'status': IngestionJobStatus.RUNNING,
+                               'total': 2,
+                               'counts': {BookIngestionStatus.CREATED: 1, BookIngestionStatus.QUEUED: 1},
+                               'items': [{'isbn': "9788576082675", 'status': BookIngestionStatus.CREATED,
+                                          'detail': None},
+                                         {'isbn': "9784774193687", 'status': BookIngestionStatus.QUEUED,
+                                          'detail': None}]}
+    assert not_found_response.status_code == status.HTTP_404_NOT_FOUND
+    assert not_found_response.json() == {'detail': ExceptionMessage.INGESTION_JOB_NOT_FOUND}
+
+
+def test_get_book_cover(app_client: TestClient,
+                        db_session: Session,
+                        cover_storage):
+    """
+    Test get book cover with rendition size and ETag
+    """
+    # Prepare
+    test_isbn = "9784774193684"
+    cover_path = cover_storage.put(b'cover', 'jpg')
+    webp_path = cover_storage.put(b'cover 64 webp', 'webp')
+    jpeg_path = cover_storage.put(b'cover 64 jpeg', 'jpg')
+    db_session.add(BookModel(title="saved_title", isbn=test_isbn, cover_path=cover_path, published_at="2020-01-01",
+                             cover_renditions={'64': {'webp': webp_path, 'jpeg': jpeg_path}}))
+    db_session.commit()
+    cover_url = f"{TEST_URL}{AppRoutes.Books.GET_COVER_URL.format(isbn=test_isbn)}"
+
+    # Execute
+    response = app_client.get(cover_url)
+    rendition_response = app_client.get(cover_url, params={'size': 48}, headers={'Accept': 'image/webp,*/*'})
+    not_modified_response = app_client.get(cover_url, headers={'If-None-Match': response.headers['ETag']})
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == b'cover'
+    assert response.headers['Content-Type'] == 'image/jpeg'
+    assert response.headers['ETag'] == f'"{os.path.basename(cover_path).split(".")[0]}"'
+    assert response.headers['Cache-Control'] == 'public, max-age=604800'
+    assert rendition_response.content == b'cover 64 webp'
+    assert rendition_response.headers['Content-Type'] == 'image/webp'
+    assert not_modified_response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not_modified_response.content == b''
+
+
+def test_get_book_cover_without_cover(app_client: TestClient,
+                                      db_session: Session,
+                                      cover_storage):
+    """
+    Test get book cover of a book without cover and of an unknown book
+    """
+    # Prepare
+    test_isbn = "9784774193684"
+    db_session.add(BookModel(title="saved_title", isbn=test_isbn,
+                             cover_path="00/00/missing.jpg", published_at="2020-01-01"))
+    db_session.commit()
+
+    # Execute
+    response = app_client.get(f"{TEST_URL}{AppRoutes.Books.GET_COVER_URL.format(isbn=test_isbn)}")
+    not_found_response = app_client.get(f"{TEST_URL}{AppRoutes.Books.GET_COVER_URL.format(isbn='9788576082675')}")
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    with open("app/static/images/no_image.jpg", 'rb') as f:
+        assert response.content == f.read()
+    assert response.headers['Cache-Control'] == 'public, max-age=0'
+    assert not_found_response.status_code == status.HTTP_404_NOT_FOUND
+    assert not_found_response.json() == {'detail': ExceptionMessage.BOOK_NOT_FOUND}
+
+
+def test_save_google_books_with_cover_url(app_client: TestClient,
+                                          mocker,
+                                          override_verify_token_dependency):
+    """
+    Test save google books returning the cover image URL instead of base64
+    """
+    # Prepare
+    test_isbn = "9784774193684"
+    with override_verify_token_dependency(AppRoles.ADMIN):
+        # Mock
+        mocker.patch('app.services.google_books_api_service.GoogleBooksApiService.fetch_book_data',
+                     return_value=GoogleBookSchema(title="test_title",
+                                                   authors=["test_author"],
+                                                   published_at="2021-01-01",
+                                                   cover_url="https://via.placeholder.com/150"))
+        mocker.patch('app.services.google_books_api_service.GoogleBooksApiService.save_cover_image',
+                     return_value="00/00/missing.jpg")
+        encode_mock = mocker.patch('app.services.image_service.ImageBase64Service.encode_async')
+        # Execute
+        response = app_client.post(f"{TEST_URL}{AppRoutes.Books.POST_GOOGLE_BOOKS_URL}",
+                                   params={'cover': 'url'},
+                                   json=BooksGoogleBooksApiSaveIn(isbn=test_isbn).model_dump())
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['cover_image_base64'] is None
+    assert response.json()['cover_image_url'] == f"{TEST_URL}{AppRoutes.Books.GET_COVER_URL.format(isbn=test_isbn)}"
+    encode_mock.assert_not_called()
+
+
+def test_save_google_books_with_lazy_cover(app_client: TestClient,
+                                           db_session: Session,
+                                           mocker,
+                                           override_verify_token_dependency):
+    """
+    Test save google books recording only the URL of the cover image
+    """
+    # Prepare
+    test_isbn = "9784774193684"
+    mocker.patch('app.services.book_cover_service.COVER_IMAGE_LAZY', True)
+    with override_verify_token_dependency(AppRoles.ADMIN):
+        # Mock
+        mocker.patch('app.services.google_books_api_service.GoogleBooksApiService.fetch_book_data',
+                     return_value=GoogleBookSchema(title="test_title",
+                                                   authors=["test_author"],
+                                                   published_at="2021-01-01",
+                                                   cover_url="https://via.placeholder.com/150"))
+        save_cover_image_mock = mocker.patch(
+            'app.services.google_books_api_service.GoogleBooksApiService.save_cover_image')
+        # Execute
+        response = app_client.post(f"{TEST_URL}{AppRoutes.Books.POST_GOOGLE_BOOKS_URL}",
+                                   params={'cover': 'url'},
+                                   json=BooksGoogleBooksApiSaveIn(isbn=test_isbn).model_dump())
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['cover_image_url'] == f"{TEST_URL}{AppRoutes.Books.GET_COVER_URL.format(isbn=test_isbn)}"
+    save_cover_image_mock.assert_not_called()
+    book_model = db_session.execute(select(BookModel).where(BookModel.isbn == test_isbn)).scalars().one()
+    assert book_model.cover_path is None
+    assert book_model.cover_url == "https://via.placeholder.com/150"
+
+
+def test_get_book_cover_fetches_lazy_cover(app_client: TestClient,
+                                           db_session: Session,
+                                           mocker,
+                                           cover_storage):
+    """
+    Test get book cover fetching the cover image on first access
+    """
+    # Prepare
+    test_isbn = "9784774193684"
+    cover_path = cover_storage.put(b'cover', 'jpg')
+    db_session.add(BookModel(title="saved_title", isbn=test_isbn, cover_path=None, published_at="2020-01-01",
+                             cover_url="https://via.placeholder.com/150"))
+    db_session.commit()
+    save_cover_url_mock = mocker.patch('app.services.google_books_api_service.GoogleBooksApiService.save_cover_url',
+                                       return_value=cover_path)
+    mocker.patch('app.services.cover_image_service.CoverImageService.render_async', return_value={})
+    cover_url = f"{TEST_URL}{AppRoutes.Books.GET_COVER_URL.format(isbn=test_isbn)}"
+
+    # Execute
+    response = app_client.get(cover_url)
+    second_response = app_client.get(cover_url)
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == second_response.content == b'cover'
+    save_cover_url_mock.assert_called_once_with(cover_url="https://via.placeholder.com/150", isbn=test_isbn)
+    db_session.expire_all()
+    book_model = db_session.execute(select(BookModel).where(BookModel.isbn == test_isbn)).scalars().one()
+    assert book_model.cover_path == cover_path
@@ -2,6 +2,7 @@ from fastapi import status
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from app import middlewares
 from app.models.factories import UserModelFactory
 from app.routers.setting import AppRoutes
 from app.schemas.exceptions import (
@@ -94,3 +95,25 @@ def test_login_user_not_found(app_client: TestClient):
     # Assert
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert response.json() == UserNotFoundExceptionOut().model_dump()
+
+
+def test_login_debug_query_headers(app_client: TestClient, db_session: Session, mocker):
+    """
+    Test login returns query profile headers in debug mode
+    """
+    # Prepare
+    mocker.patch.object(middlewares, 'DEBUG', True)
+    test_user_password = "password"
+    test_user_model = UserModelFactory(password=test_user_password)
+    db_session.commit()
+    user_login_in = UserLoginIn(email=test_user_model.email, password=test_user_password)
+
+    # Execute
+    response = app_client.post(f"{TEST_URL}{AppRoutes.Login.POST_TOKEN_URL}",
+                               json=user_login_in.model_dump())
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["X-DB-Statement-Count"] == "1"
+    assert float(response.headers["X-DB-Time-Ms"]) > 0
+    assert response.headers["X-DB-N-Plus-One"] == "0"
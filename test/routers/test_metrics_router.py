@@ -0,0 +1,56 @@
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from app.core.security import AppRoles
+from app.middlewares import UNMATCHED_ROUTE
+from app.routers.setting import AppRoutes
+from app.schemas.exceptions import NotEnoughPermissionsExceptionOut
+
+TEST_URL = f"{AppRoutes.Metrics.PREFIX}{AppRoutes.Metrics.GET_URL}"
+
+
+def test_get_metrics_success(app_client: TestClient, override_verify_token_dependency):
+    """
+    Test get metrics
+    """
+    # Execute
+    with override_verify_token_dependency(AppRoles.ADMIN):
+        response = app_client.get(TEST_URL)
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    db_pool = response.json()["metrics"]["db_pool"]
+    for engine_name in ["primary", "primary_async"]:
+        assert set(db_pool[engine_name]) == {"size", "checked_out", "idle", "overflow", "max_overflow",
+                                             "checkouts", "timeouts", "wait_seconds_total", "wait_seconds_max"}
+
+
+def test_get_metrics_groups_unmatched_paths(app_client: TestClient, override_verify_token_dependency):
+    """
+    Test get metrics after requests to paths without route
+    """
+    # Prepare
+    app_client.get("/unknown/1")
+    app_client.get("/unknown/2")
+
+    # Execute
+    with override_verify_token_dependency(AppRoles.ADMIN):
+        response = app_client.get(TEST_URL)
+
+    # Assert
+    routes = response.json()["metrics"]["sql"]["routes"]
+    assert routes[UNMATCHED_ROUTE]["requests"] >= 2
+    assert not any(route.startswith("/unknown") for route in routes)
+
+
+def test_get_metrics_not_enough_permissions(app_client: TestClient, override_verify_token_dependency):
+    """
+    Test get metrics with user role
+    """
+    # Execute
+    with override_verify_token_dependency(AppRoles.USER):
+        response = app_client.get(TEST_URL)
+
+    # Assert
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert response.json() == NotEnoughPermissionsExceptionOut().model_dump()
@@ -2,7 +2,7 @@ import pytest
 
 from app.exceptions.exceptions import BookIsbnInvalidFormatException
 from app.exceptions.message import ExceptionMessage
-from app.schemas.requests import BooksGoogleBooksApiSaveIn
+from app.schemas.requests import BooksGoogleBooksApiBatchSaveIn, BooksGoogleBooksApiSaveIn
 from app.schemas.requests.book import isbn10_to_isbn13
 
 
@@ -63,3 +63,26 @@ def test_isbn_format_validation_with_invalid_isbn_length():
 
     # Assert
     assert exc_info.value.message == ExceptionMessage.BOOK_ISBN_DIGITS
+
+
+def test_batch_isbns_are_normalized_and_deduplicated():
+    # Prepare
+    isbns = ["4-7741-9368-2", "9784774193687", "978-85-7608-267-5"]
+
+    # Execute
+    result = BooksGoogleBooksApiBatchSaveIn(isbns=isbns)
+
+    # Assert
+    assert result.isbns == ["9784774193687", "9788576082675"]
+
+
+def test_batch_isbns_with_invalid_isbn():
+    # Prepare
+    isbns = ["9788576082675", "978-85-333-0225s"]
+
+    # Execute
+    with pytest.raises(BookIsbnInvalidFormatException) as exc_info:
+        BooksGoogleBooksApiBatchSaveIn(isbns=isbns)
+
+    # Assert
+    assert exc_info.value.message == ExceptionMessage.BOOK_ISBN_FORMAT
@@ -0,0 +1,139 @@
+import time
+
+import httpx
+import pytest
+
+from app.core.cache import LRUCache
+from app.exceptions.exceptions import GoogleBooksApiException
+from app.exceptions.message import ExceptionMessage
+from app.models import BookMetadataModel
+from app.services.book_metadata_cache_service import BookMetadataCacheService
+from app.services.google_books_api_service import GoogleBooksApiService
+
+VOLUME_INFO = {'title': 'Clean Code',
+               'authors': ['Robert C.Martin'],
+               'publishedDate': '2017-12-01'}
+
+
+def test_lru_cache_evicts_least_recently_used():
+    # Prepare
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1, ttl=60)
+    cache.set('b', 2, ttl=60)
+    cache.get('a')
+
+    # Execute
+    cache.set('c', 3, ttl=60)
+
+    # Assert
+    assert cache.get('a') == (True, 1)
+    assert cache.get('b') == (False, None)
+    assert cache.get('c') == (True, 3)
+    assert cache.stats() == {'size': 2, 'maxsize': 2, 'hits': 3, 'misses': 1, 'evictions': 1, 'hit_ratio': 0.75}
+
+
+def test_lru_cache_evicts_beyond_maxbytes():
+    # Prepare
+    cache = LRUCache(maxsize=10, maxbytes=10)
+    cache.set('a', b'aaaa', ttl=60, nbytes=4)
+    cache.set('b', b'bbbb', ttl=60, nbytes=4)
+
+    # Execute
+    cache.set('c', b'cccc', ttl=60, nbytes=4)
+    cache.set('d', b'd' * 11, ttl=60, nbytes=11)
+
+    # Assert
+    assert cache.get('a') == (False, None)
+    assert cache.get('c') == (True, b'cccc')
+    assert cache.get('d') == (False, None)
+    assert cache.stats()['bytes'] == 8
+
+
+def test_lru_cache_expires_entries(mocker):
+    # Prepare
+    cache = LRUCache(maxsize=2)
+    cache.set('a', None, ttl=10)
+    now = time.monotonic()
+
+    # Execute
+    mocker.patch('app.core.cache.time.monotonic', return_value=now + 11)
+    result = cache.get('a')
+
+    # Assert
+    assert result == (False, None)
+    assert len(cache) == 0
+
+
+@pytest.mark.anyio
+async def test_fetch_book_data_is_cached(mock_google_books_api):
+    # Prepare
+    isbn = '9784048930598'
+    requests = []
+
+    def handler(request: httpx.Request):
+        requests.append(request)
+        return httpx.Response(200, json={'items': [{'volumeInfo': VOLUME_INFO}]})
+    mock_google_books_api(handler)
+
+    # Execute
+    first = await GoogleBooksApiService.fetch_book_data(isbn)
+    second = await GoogleBooksApiService.fetch_book_data(isbn)
+    BookMetadataCacheService.memory.clear()
+    third = await GoogleBooksApiService.fetch_book_data(isbn)
+
+    # Assert
+    assert len(requests) == 1
+    assert first == second == third
+    assert (await BookMetadataModel.fetch_async(isbn)).volume_info == VOLUME_INFO
+    assert BookMetadataCacheService.metrics()['persistent'] == {'hits': 1, 'misses': 1}
+
+
+@pytest.mark.anyio
+async def test_fetch_book_data_caches_unknown_isbn(mock_google_books_api):
+    # Prepare
+    isbn = '9784048930599'
+    requests = []
+
+    def handler(request: httpx.Request):
+        requests.append(request)
+        return httpx.Response(200, json={'kind': 'books#volumes', 'totalItems': 0})
+    mock_google_books_api(handler)
+
+    # Execute
+    for _ in range(2):
+        with pytest.raises(GoogleBooksApiException) as exc_info:
+            await GoogleBooksApiService.fetch_book_data(isbn)
+
+    # Assert
+    assert len(requests) == 1
+    assert exc_info.value.message == ExceptionMessage.GOOGLE_BOOKS_API_INVALID_RESPONSE
+    book_metadata = await BookMetadataModel.fetch_async(isbn)
+    assert book_metadata is not None
+    assert book_metadata.volume_info is None
+
+
+@pytest.mark.anyio
+async def test_fetch_book_data_does_not_cache_http_error(mock_google_books_api):
+    # Prepare
+    isbn = '9784048930599'
+    mock_google_books_api(lambda request: httpx.Response(503))
+
+    # Execute
+    with pytest.raises(GoogleBooksApiException):
+        await GoogleBooksApiService.fetch_book_data(isbn)
+
+    # Assert
+    assert await BookMetadataModel.fetch_async(isbn) is None
+
+
+@pytest.mark.anyio
+async def test_expired_entry_is_not_used(mock_google_books_api):
+    # Prepare
+    isbn = '9784048930598'
+    await BookMetadataModel.save_async(isbn=isbn, volume_info=VOLUME_INFO, ttl=-1)
+
+    # Execute
+    result = await BookMetadataCacheService.get(isbn)
+
+    # Assert
+    assert result == (False, None)
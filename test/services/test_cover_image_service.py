@@ -0,0 +1,43 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from app.services.cover_image_service import CoverImageService, render_renditions
+
+
+def test_render_renditions():
+    # Prepare
+    image = BytesIO()
+    Image.new('RGBA', (200, 100)).save(image, format='PNG')
+
+    # Execute
+    renditions = render_renditions(image.getvalue(), sizes=[64, 128, 256], formats=['WEBP', 'JPEG'])
+
+    # Assert
+    assert sorted(renditions['64']) == ['jpeg', 'webp']
+    assert Image.open(BytesIO(renditions['64']['jpeg'])).size == (64, 32)
+    assert Image.open(BytesIO(renditions['128']['webp'])).size == (128, 64)
+    # images are not scaled up
+    assert Image.open(BytesIO(renditions['256']['webp'])).size == (200, 100)
+
+
+@pytest.mark.anyio
+async def test_render_async_in_process_pool(async_db_session, cover_storage):
+    # Prepare
+    image = BytesIO()
+    Image.new('RGB', (100, 100)).save(image, format='JPEG')
+    image_path = cover_storage.put(image.getvalue(), 'jpg')
+
+    # Execute
+    try:
+        renditions = await CoverImageService.render_async(image_path=image_path)
+        missing_renditions = await CoverImageService.render_async(image_path='00/00/missing.jpg')
+    finally:
+        CoverImageService.stop()
+
+    # Assert
+    assert sorted(renditions, key=int) == ['64', '128', '256']
+    assert renditions['64']['webp'].endswith('.webp')
+    assert Image.open(BytesIO(cover_storage.read(renditions['64']['webp']))).format == 'WEBP'
+    assert missing_renditions == {}
@@ -0,0 +1,139 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.storage import S3BlobStorage, blob_key
+from app.models import CoverBlobModel
+from app.services.cover_storage_service import CoverStorageService
+
+
+class NotFound(Exception):
+
+    response = {'Error': {'Code': 'NoSuchKey'}}
+
+
+class FakeBody:
+
+    def __init__(self, content):
+        self.content = content
+
+    def read(self):
+        return self.content
+
+
+class FakeS3Client:
+    """In-memory stand-in of the boto3 S3 client"""
+
+    def __init__(self):
+        self.objects = {}
+        self.modified = {}
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise NotFound()
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise NotFound()
+        return {'Body': FakeBody(self.objects[(Bucket, Key)])}
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[(Bucket, Key)] = Body
+        self.modified[(Bucket, Key)] = datetime.now(timezone.utc)
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def get_paginator(self, operation_name):
+        return self
+
+    def paginate(self, Bucket):
+        yield {'Contents': [{'Key': key, 'LastModified': self.modified[(bucket, key)]}
+                            for bucket, key in self.objects if bucket == Bucket]}
+
+
+def test_local_storage_dedupes_by_content(cover_storage):
+    # Execute
+    key = cover_storage.put(b'image', 'jpg')
+    same_key = cover_storage.put(b'image', 'jpg')
+
+    # Assert
+    assert key == same_key == blob_key(b'image', 'jpg')
+    assert key.split('/')[:2] == [key.split('/')[2][:2], key.split('/')[2][2:4]]
+    assert cover_storage.read(key) == b'image'
+    assert len(os.listdir(os.path.dirname(cover_storage.path(key)))) == 1
+    with pytest.raises(FileNotFoundError):
+        cover_storage.read('../../etc/passwd')
+
+
+def test_s3_storage():
+    # Prepare
+    client = FakeS3Client()
+    storage = S3BlobStorage(bucket='covers', client=client)
+
+    # Execute
+    key = storage.put(b'image', 'jpg')
+    storage.put(b'image', 'jpg')
+
+    # Assert
+    assert storage.read(key) == b'image'
+    assert list(client.objects) == [('covers', key)]
+    assert list(storage.keys(modified_before=datetime.now().timestamp() + 1)) == [key]
+    assert list(storage.keys(modified_before=datetime.now().timestamp() - 60)) == []
+    storage.delete(key)
+    assert storage.exists(key) is False
+    with pytest.raises(FileNotFoundError):
+        storage.read(key)
+
+
+@pytest.mark.anyio
+async def test_delete_unreferenced_async_deletes_unreferenced_images(async_db_session, cover_storage):
+    # Prepare
+    shared_key = await CoverStorageService.save_async(content=b'placeholder', extension='jpg')
+    # stored by a request which failed to save its book
+    key = await CoverStorageService.save_async(content=b'image', extension='jpg')
+    await CoverStorageService.acquire_async(keys=[shared_key])
+    await async_db_session.commit()
+
+    # Execute
+    deleted = await CoverStorageService.delete_unreferenced_async(grace_seconds=-60)
+    await async_db_session.commit()
+
+    # Assert
+    assert deleted == 1
+    assert cover_storage.exists(shared_key) is True
+    assert cover_storage.exists(key) is False
+    assert (await async_db_session.get(CoverBlobModel, shared_key)).refcount == 1
+    assert await async_db_session.get(CoverBlobModel, key) is None
+
+
+@pytest.mark.anyio
+async def test_delete_unreferenced_async_keeps_images_within_grace_period(async_db_session, cover_storage):
+    # Prepare
+    key = await CoverStorageService.save_async(content=b'image', extension='jpg')
+
+    # Execute
+    deleted = await CoverStorageService.delete_unreferenced_async()
+    await async_db_session.commit()
+
+    # Assert
+    assert deleted == 0
+    assert cover_storage.exists(key) is True
+
+
+@pytest.mark.anyio
+async def test_track_untracked_async_collects_images_without_row(async_db_session, cover_storage):
+    # Prepare
+    key = cover_storage.put(b'image', 'jpg')
+
+    # Execute
+    tracked = await CoverStorageService.track_untracked_async(grace_seconds=-60)
+    await async_db_session.commit()
+    deleted = await CoverStorageService.delete_unreferenced_async(grace_seconds=-60)
+    await async_db_session.commit()
+
+    # Assert
+    assert tracked == 1
+    assert deleted == 1
+    assert cover_storage.exists(key) is False
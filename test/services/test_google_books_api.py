@@ -1,18 +1,23 @@
+import asyncio
 import os
+from io import BytesIO
 
+import httpx
 import pytest
 from fastapi import status
-from requests.exceptions import HTTPError, RequestException
+from PIL import Image
 
+from app.core.storage import blob_key
 from app.exceptions.exceptions import GoogleBooksApiException
 from app.exceptions.message import ExceptionMessage
 from app.schemas.api import GoogleBookSchema
 from app.services.google_books_api_service import GoogleBooksApiService
 
 
+@pytest.mark.anyio
 class TestGoogleBooksApiService:
 
-    def test_get_book_by_isbn(self):
+    async def test_get_book_by_isbn(self, mock_google_books_api):
         """Test for fetch_book_data method of GoogleBooksApiService
         """
 
@@ -21,7 +26,7 @@ class TestGoogleBooksApiService:
 
         # Execute
         google_books_api_service = GoogleBooksApiService()
-        book = google_books_api_service.fetch_book_data(isbn)
+        book = await google_books_api_service.fetch_book_data(isbn)
 
         # Assert
         assert book.title == 'Clean Code アジャイルソフトウェア達人の技'
@@ -29,67 +34,92 @@ class TestGoogleBooksApiService:
         assert book.published_at == '2017-12-01'
         assert book.cover_url == 'http://books.google.com/books/content?id=bk4atAEACAAJ&printsec=frontcover&img=1&zoom=1&source=gbs_api'
 
-    def test_get_book_by_isbn_with_invalid_response(self, mocker):
+    async def test_get_book_by_isbn_with_mock_transport(self, mock_google_books_api):
+        """Test for fetch_book_data method of GoogleBooksApiService
+        with mocked response
+        """
+
+        # Prepare
+        isbn = '9784048930598'
+        requested_urls = []
+
+        def handler(request: httpx.Request):
+            requested_urls.append(str(request.url))
+            return httpx.Response(200, json={'items': [{'volumeInfo': {
+                'title': 'Clean Code',
+                'authors': ['Robert C.Martin'],
+                'publishedDate': '2017-12-01',
+                'imageLinks': {'thumbnail': 'http://books.google.com/books/content?id=bk4atAEACAAJ'}}}]})
+        mock_google_books_api(handler)
+
+        # Execute
+        book = await GoogleBooksApiService.fetch_book_data(isbn)
+
+        # Assert
+        assert requested_urls == [f'https://www.googleapis.com/books/v1/volumes?q=isbn:{isbn}']
+        assert book.title == 'Clean Code'
+        assert book.authors == ['Robert C.Martin']
+        assert book.published_at == '2017-12-01'
+        assert book.cover_url == 'http://books.google.com/books/content?id=bk4atAEACAAJ'
+
+    async def test_get_book_by_isbn_with_invalid_response(self, mock_google_books_api):
         """Test for fetch_book_data method of GoogleBooksApiService
         with invalid response
         """
 
         # Prepare
         isbn = '9784048930599'
-        mocker.patch('app.services.google_books_api_service.requests.get')
-        requests_get_mock = mocker.patch('app.services.google_books_api_service.requests.get')
-        requests_get_mock.return_value.json.return_value = {'items': []}
+        mock_google_books_api(lambda request: httpx.Response(200, json={'items': []}))
 
         # Execute
         google_books_api_service = GoogleBooksApiService()
         with pytest.raises(GoogleBooksApiException) as exc_info:
-            _ = google_books_api_service.fetch_book_data(isbn)
+            _ = await google_books_api_service.fetch_book_data(isbn)
 
         # Assert
         assert exc_info.value.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
         assert exc_info.value.message == ExceptionMessage.GOOGLE_BOOKS_API_INVALID_RESPONSE
 
-    def test_get_book_by_isbn_with_http_error(self, mocker):
+    async def test_get_book_by_isbn_with_http_error(self, mock_google_books_api):
         """Test for fetch_book_data method of GoogleBooksApiService
         with HTTP error
         """
 
         # Prepare
         isbn = '9784048930599'
-        mocker.patch('app.services.google_books_api_service.requests.get')
-        requests_get_mock = mocker.patch('app.services.google_books_api_service.requests.get')
-        requests_get_mock.side_effect = HTTPError()
+        mock_google_books_api(lambda request: httpx.Response(503))
 
         # Execute
         google_books_api_service = GoogleBooksApiService()
         with pytest.raises(GoogleBooksApiException) as exc_info:
-            _ = google_books_api_service.fetch_book_data(isbn)
+            _ = await google_books_api_service.fetch_book_data(isbn)
 
         # Assert
         assert exc_info.value.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
         assert exc_info.value.message == ExceptionMessage.GOOGLE_BOOKS_API_HTTP_ERROR
 
-    def test_get_book_by_isbn_with_unexpected_error(self, mocker):
+    async def test_get_book_by_isbn_with_unexpected_error(self, mock_google_books_api):
         """Test for fetch_book_data method of GoogleBooksApiService
         with unexpected error
         """
 
         # Prepare
         isbn = '9784048930599'
-        mocker.patch('app.services.google_books_api_service.requests.get')
-        requests_get_mock = mocker.patch('app.services.google_books_api_service.requests.get')
-        requests_get_mock.side_effect = Exception()
+
+        def handler(request: httpx.Request):
+            raise httpx.ConnectTimeout('timed out', request=request)
+        mock_google_books_api(handler)
 
         # Execute
         google_books_api_service = GoogleBooksApiService()
         with pytest.raises(GoogleBooksApiException) as exc_info:
-            _ = google_books_api_service.fetch_book_data(isbn)
+            _ = await google_books_api_service.fetch_book_data(isbn)
 
         # Assert
         assert exc_info.value.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
         assert exc_info.value.message == ExceptionMessage.GOOGLE_BOOKS_API_UNEXPECTED_ERROR
 
-    def test_save_cover_image(self):
+    async def test_save_cover_image(self, mock_google_books_api, cover_storage):
         """Test for save_cover_image method of GoogleBooksApiService
         """
 
@@ -102,15 +132,35 @@ class TestGoogleBooksApiService:
 
         # Execute
         google_books_api_service = GoogleBooksApiService()
-        cover_image_path = google_books_api_service.save_cover_image(google_book_schema, isbn)
+        cover_image_path = await google_books_api_service.save_cover_image(google_book_schema, isbn)
 
         # Assert
-        assert cover_image_path == 'app/static/images/9784048930598.jpg'
+        assert cover_image_path.endswith('.jpg')
+        assert cover_storage.exists(cover_image_path)
+
+    async def test_save_cover_image_with_mock_transport(self, mock_google_books_api, cover_storage):
+        """Test for save_cover_image method of GoogleBooksApiService
+        with mocked response
+        """
 
-        # Clean up
-        os.remove(cover_image_path)
+        # Prepare
+        isbn = '9784048930598'
+        google_book_schema = GoogleBookSchema(title='Clean Code',
+                                              authors=['ロバート・C. マーチン'],
+                                              published_at='2017-12-01',
+                                              cover_url='http://books.google.com/books/content?id=bk4atAEACAAJ')
+        image = BytesIO()
+        Image.new('RGB', (10, 10)).save(image, format='JPEG')
+        mock_google_books_api(lambda request: httpx.Response(200, content=image.getvalue()))
 
-    def test_save_cover_image_with_request_exception(self, mocker):
+        # Execute
+        cover_image_path = await GoogleBooksApiService.save_cover_image(google_book_schema, isbn)
+
+        # Assert
+        assert cover_image_path == blob_key(image.getvalue(), 'jpg')
+        assert Image.open(cover_storage.path(cover_image_path)).size == (10, 10)
+
+    async def test_save_cover_image_with_request_exception(self, mock_google_books_api):
         """Test for save_cover_image method of GoogleBooksApiService
         with request exception
         """
@@ -120,21 +170,22 @@ class TestGoogleBooksApiService:
         google_book_schema = GoogleBookSchema(title='Clean Code',
                                               authors=['ロバート・C. マーチン'],
                                               published_at='2017-12-01',
-                                              cover_url='')
-        mocker.patch('app.services.google_books_api_service.requests.get')
-        requests_get_mock = mocker.patch('app.services.google_books_api_service.requests.get')
-        requests_get_mock.side_effect = RequestException()
+                                              cover_url='http://books.google.com/books/content?id=bk4atAEACAAJ')
+
+        def handler(request: httpx.Request):
+            raise httpx.ReadTimeout('timed out', request=request)
+        mock_google_books_api(handler)
 
         # Execute
         google_books_api_service = GoogleBooksApiService()
         with pytest.raises(GoogleBooksApiException) as exc_info:
-            _ = google_books_api_service.save_cover_image(google_book_schema, isbn)
+            _ = await google_books_api_service.save_cover_image(google_book_schema, isbn)
 
         # Assert
         assert exc_info.value.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
         assert exc_info.value.message == ExceptionMessage.GOOGLE_BOOKS_API_IMAGE_DOWNLOAD_ERROR
 
-    def test_save_cover_image_with_file_not_found(self, mocker):
+    async def test_save_cover_image_with_file_not_found(self, mock_google_books_api):
         """Test for save_cover_image method of GoogleBooksApiService
         with file not found
         """
@@ -144,16 +195,142 @@ class TestGoogleBooksApiService:
         google_book_schema = GoogleBookSchema(title='Clean Code',
                                               authors=['ロバート・C. マーチン'],
                                               published_at='2017-12-01',
-                                              cover_url='')
-        mocker.patch('app.services.google_books_api_service.requests.get')
-        requests_get_mock = mocker.patch('app.services.google_books_api_service.requests.get')
-        requests_get_mock.return_value.content = b'sfas'
+                                              cover_url='http://books.google.com/books/content?id=bk4atAEACAAJ')
+        mock_google_books_api(lambda request: httpx.Response(200, content=b'sfas'))
 
         # Execute
         google_books_api_service = GoogleBooksApiService()
         with pytest.raises(GoogleBooksApiException) as exc_info:
-            _ = google_books_api_service.save_cover_image(google_book_schema, isbn)
+            _ = await google_books_api_service.save_cover_image(google_book_schema, isbn)
 
         # Assert
         assert exc_info.value.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
         assert exc_info.value.message == ExceptionMessage.GOOGLE_BOOKS_API_IMAGE_DOWNLOAD_ERROR
+
+    @pytest.mark.parametrize('image_format, mode, extension, stored_format', [
+        ('PNG', 'RGBA', '.png', 'PNG'),
+        ('WEBP', 'RGB', '.webp', 'WEBP'),
+        ('GIF', 'P', '.png', 'PNG'),
+    ])
+    async def test_save_cover_image_keeps_original_format(self, mock_google_books_api, cover_storage,
+                                                          image_format, mode, extension, stored_format):
+        """Test for save_cover_image method of GoogleBooksApiService
+        which stores JPEG, PNG and WebP as downloaded and transcodes other formats
+        """
+
+        # Prepare
+        isbn = '9784048930598'
+        google_book_schema = GoogleBookSchema(title='Clean Code',
+                                              authors=['ロバート・C. マーチン'],
+                                              published_at='2017-12-01',
+                                              cover_url='http://books.google.com/books/content?id=bk4atAEACAAJ')
+        image = BytesIO()
+        Image.new(mode, (10, 10)).save(image, format=image_format)
+        mock_google_books_api(lambda request: httpx.Response(200, content=image.getvalue()))
+
+        # Execute
+        saved_path = await GoogleBooksApiService.save_cover_image(google_book_schema, isbn)
+
+        # Assert
+        assert saved_path.endswith(extension)
+        assert Image.open(cover_storage.path(saved_path)).format == stored_format
+        if image_format == stored_format:
+            assert cover_storage.read(saved_path) == image.getvalue()
+
+    @pytest.mark.parametrize('headers, content, message', [
+        ({'Content-Type': 'text/html'}, b'<html></html>', ExceptionMessage.GOOGLE_BOOKS_API_IMAGE_DOWNLOAD_ERROR),
+        ({'Content-Length': str(10 * 1024 * 1024)}, b'', ExceptionMessage.GOOGLE_BOOKS_API_IMAGE_TOO_LARGE),
+        ({}, b'0' * (3 * 1024 * 1024), ExceptionMessage.GOOGLE_BOOKS_API_IMAGE_TOO_LARGE),
+    ])
+    async def test_save_cover_image_with_rejected_response(self, mock_google_books_api, cover_storage,
+                                                           headers, content, message):
+        """Test for save_cover_image method of GoogleBooksApiService
+        with a response which is not an image or is too large
+        """
+
+        # Prepare
+        isbn = '9784048930598'
+        google_book_schema = GoogleBookSchema(title='Clean Code',
+                                              authors=['ロバート・C. マーチン'],
+                                              published_at='2017-12-01',
+                                              cover_url='http://books.google.com/books/content?id=bk4atAEACAAJ')
+        mock_google_books_api(lambda request: httpx.Response(200, headers=headers, content=content))
+
+        # Execute
+        with pytest.raises(GoogleBooksApiException) as exc_info:
+            _ = await GoogleBooksApiService.save_cover_image(google_book_schema, isbn)
+
+        # Assert
+        assert exc_info.value.message == message
+        assert os.listdir(cover_storage.root) == []
+
+    async def test_save_cover_image_with_too_many_pixels(self, mock_google_books_api, cover_storage, mocker):
+        """Test for save_cover_image method of GoogleBooksApiService
+        with an image whose dimensions exceed the limit
+        """
+
+        # Prepare
+        isbn = '9784048930598'
+        google_book_schema = GoogleBookSchema(title='Clean Code',
+                                              authors=['ロバート・C. マーチン'],
+                                              published_at='2017-12-01',
+                                              cover_url='http://books.google.com/books/content?id=bk4atAEACAAJ')
+        image = BytesIO()
+        Image.new('RGB', (20, 20)).save(image, format='PNG')
+        mock_google_books_api(lambda request: httpx.Response(200, headers={'Content-Type': 'image/png'},
+                                                             content=image.getvalue()))
+        mocker.patch('app.services.google_books_api_service.COVER_IMAGE_MAX_PIXELS', 100)
+
+        # Execute
+        with pytest.raises(GoogleBooksApiException) as exc_info:
+            _ = await GoogleBooksApiService.save_cover_image(google_book_schema, isbn)
+
+        # Assert
+        assert exc_info.value.message == ExceptionMessage.GOOGLE_BOOKS_API_IMAGE_TOO_LARGE
+        assert os.listdir(cover_storage.root) == []
+
+    async def test_client_is_shared_and_closed_on_stop(self):
+        """Test for start and stop of GoogleBooksApiService
+        """
+
+        # Prepare
+        GoogleBooksApiService.start()
+        client = GoogleBooksApiService.client()
+
+        # Execute
+        await GoogleBooksApiService.stop()
+
+        # Assert
+        assert client.timeout.connect < client.timeout.read
+        assert client.is_closed
+        assert GoogleBooksApiService._client is None
+
+    async def test_concurrent_fetch_book_data_share_one_request(self, mock_google_books_api):
+        """Test for fetch_book_data method of GoogleBooksApiService
+        with concurrent calls for the same isbn
+        """
+
+        # Prepare
+        isbn = '9784048930598'
+        requested_urls = []
+        release = asyncio.Event()
+
+        async def handler(request: httpx.Request):
+            requested_urls.append(str(request.url))
+            await release.wait()
+            return httpx.Response(200, json={'items': [{'volumeInfo': {
+                'title': 'Clean Code',
+                'authors': ['Robert C.Martin'],
+                'publishedDate': '2017-12-01'}}]})
+        mock_google_books_api(handler)
+
+        # Execute
+        calls = [asyncio.ensure_future(GoogleBooksApiService.fetch_book_data(isbn)) for _ in range(3)]
+        await asyncio.sleep(0.1)
+        release.set()
+        books = await asyncio.gather(*calls)
+
+        # Assert
+        assert len(requested_urls) == 1
+        assert books[0] == books[1] == books[2]
+        assert GoogleBooksApiService.metrics()['book_data']['in_flight'] == 0
@@ -0,0 +1,169 @@
+import time
+
+import httpx
+import pytest
+from fastapi import status
+
+from app.core.resilience import CircuitBreaker, CircuitState, TokenBucket, parse_retry_after
+from app.exceptions.exceptions import GoogleBooksApiException
+from app.exceptions.message import ExceptionMessage
+from app.services.google_books_api_service import RETRIES, GoogleBooksApiService
+
+ISBN = '9784048930598'
+VOLUMES = {'items': [{'volumeInfo': {'title': 'Clean Code',
+                                     'authors': ['Robert C.Martin'],
+                                     'publishedDate': '2017-12-01'}}]}
+
+
+def test_token_bucket_waits_beyond_burst(mocker):
+    # Prepare
+    mocker.patch('app.core.resilience.time.monotonic', return_value=100.0)
+    bucket = TokenBucket(rate=2, capacity=2)
+
+    # Execute
+    waits = [bucket._reserve() for _ in range(4)]
+
+    # Assert
+    assert waits == [0.0, 0.0, 0.5, 1.0]
+    assert bucket.stats()['waits'] == 2
+
+
+def test_circuit_breaker_opens_and_half_opens(mocker):
+    # Prepare
+    now = time.monotonic()
+    monotonic_mock = mocker.patch('app.core.resilience.time.monotonic', return_value=now)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    # Execute
+    breaker.record_failure()
+    breaker.record_failure()
+
+    # Assert
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.allow() is False
+    monotonic_mock.return_value = now + 31
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow() is True
+    # only one trial call is allowed
+    assert breaker.allow() is False
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.stats() == {'state': CircuitState.CLOSED, 'consecutive_failures': 0, 'opened': 1, 'rejected': 2}
+
+
+def test_parse_retry_after():
+    # Assert
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+
+@pytest.mark.anyio
+async def test_fetch_book_data_retries_throttled_request(mock_google_books_api, mocker):
+    # Prepare
+    responses = [httpx.Response(429, headers={'Retry-After': '2'}),
+                 httpx.Response(503),
+                 httpx.Response(200, json=VOLUMES)]
+    mock_google_books_api(lambda request: responses.pop(0))
+    sleep_mock = mocker.patch('app.services.google_books_api_service.asyncio.sleep')
+
+    # Execute
+    book = await GoogleBooksApiService.fetch_book_data(ISBN)
+
+    # Assert
+    assert book.title == 'Clean Code'
+    assert sleep_mock.call_args_list[0].args == (2.0,)
+    assert sleep_mock.call_count == 2
+    assert GoogleBooksApiService.circuit_breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.anyio
+async def test_fetch_book_data_gives_up_after_retries(mock_google_books_api):
+    # Prepare
+    requests = []
+
+    def handler(request: httpx.Request):
+        requests.append(request)
+        return httpx.Response(500)
+    mock_google_books_api(handler)
+
+    # Execute
+    with pytest.raises(GoogleBooksApiException) as exc_info:
+        await GoogleBooksApiService.fetch_book_data(ISBN)
+
+    # Assert
+    assert len(requests) == RETRIES + 1
+    assert exc_info.value.message == ExceptionMessage.GOOGLE_BOOKS_API_HTTP_ERROR
+
+
+@pytest.mark.anyio
+async def test_fetch_book_data_with_invalid_json(mock_google_books_api):
+    # Prepare
+    mock_google_books_api(lambda request: httpx.Response(200, content=b'<html>Service Unavailable</html>'))
+
+    # Execute
+    with pytest.raises(GoogleBooksApiException) as exc_info:
+        await GoogleBooksApiService.fetch_book_data(ISBN)
+
+    # Assert
+    assert exc_info.value.message == ExceptionMessage.GOOGLE_BOOKS_API_UNEXPECTED_ERROR
+
+
+@pytest.mark.anyio
+async def test_fetch_book_data_fails_fast_while_circuit_is_open(mock_google_books_api):
+    # Prepare
+    requests = []
+
+    def handler(request: httpx.Request):
+        requests.append(request)
+        return httpx.Response(200, json=VOLUMES)
+    mock_google_books_api(handler)
+    for _ in range(GoogleBooksApiService.circuit_breaker.failure_threshold):
+        GoogleBooksApiService.circuit_breaker.record_failure()
+
+    # Execute
+    with pytest.raises(GoogleBooksApiException) as exc_info:
+        await GoogleBooksApiService.fetch_book_data(ISBN)
+
+    # Assert
+    assert requests == []
+    assert exc_info.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert exc_info.value.message == ExceptionMessage.GOOGLE_BOOKS_API_UNAVAILABLE
+    assert GoogleBooksApiService.upstream_metrics()['circuit_breaker']['rejected'] == 1
+
+
+@pytest.mark.anyio
+async def test_save_cover_url_skips_placeholder_of_books_without_cover(mock_google_books_api):
+    # Prepare
+    requests = []
+    mock_google_books_api(lambda request: requests.append(request))
+
+    # Execute
+    cover_path = await GoogleBooksApiService.save_cover_url(cover_url='app/static/images/no_image.jpg', isbn=ISBN)
+
+    # Assert
+    assert cover_path is None
+    assert requests == []
+    assert GoogleBooksApiService.circuit_breaker.stats()['consecutive_failures'] == 0
+
+
+@pytest.mark.anyio
+async def test_save_cover_url_does_not_retry_invalid_requests(mock_google_books_api, mocker):
+    # Prepare
+    requests = []
+
+    def handler(request: httpx.Request):
+        requests.append(request)
+        raise httpx.LocalProtocolError('invalid request')
+    mock_google_books_api(handler)
+    sleep_mock = mocker.patch('app.services.google_books_api_service.asyncio.sleep')
+
+    # Execute
+    with pytest.raises(GoogleBooksApiException):
+        await GoogleBooksApiService.save_cover_url(cover_url='https://books.google.com/books/content?id=1', isbn=ISBN)
+
+    # Assert
+    assert len(requests) == 1
+    sleep_mock.assert_not_called()
+    assert GoogleBooksApiService.circuit_breaker.stats()['consecutive_failures'] == 0
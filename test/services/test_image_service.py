@@ -1,5 +1,10 @@
+import base64
+import builtins
+
+import pytest
 from PIL import Image
 
+from app.services.cover_storage_service import CoverStorageService
 from app.services.image_service import ImageBase64Service
 
 
@@ -28,3 +33,86 @@ class TestImageService:
         decoded_image = ImageBase64Service.decode(encoded_image)
         # Assert
         assert isinstance(decoded_image, Image.Image)
+
+    def test_mime_type(self):
+        """
+        Test mime_type
+        """
+        # Execute
+        mime_type = ImageBase64Service.mime_type("app/static/images/no_image.jpg")
+        missing_mime_type = ImageBase64Service.mime_type("app/static/images/missing.webp",
+                                                         no_image_path="app/static/images/no_image.png")
+        # Assert
+        assert mime_type == 'image/jpeg'
+        assert missing_mime_type == 'image/png'
+
+    def test_mime_type_of_key_without_lookup(self, cover_storage, mocker):
+        """
+        Test mime_type takes the MIME type of an image in the storage from its key
+        """
+        # Prepare
+        exists_spy = mocker.spy(cover_storage, 'exists')
+
+        # Execute
+        mime_type = ImageBase64Service.mime_type("ab/cd/" + "ab" * 32 + ".webp")
+
+        # Assert
+        assert mime_type == 'image/webp'
+        exists_spy.assert_not_called()
+
+    def test_encode_caches_encoded_image(self, make_image, mocker):
+        """
+        Test encode reads a file again only when it is modified
+        """
+        # Prepare
+        test_image_path = make_image("cover.jpg")
+        open_spy = mocker.spy(builtins, 'open')
+        ImageBase64Service.encode(test_image_path)
+
+        # Execute
+        encoded_image = ImageBase64Service.encode(test_image_path)
+        reads = open_spy.call_count
+        Image.new('RGB', (50, 50)).save(test_image_path)
+        reads_before_modified = open_spy.call_count
+        modified_image = ImageBase64Service.encode(test_image_path)
+
+        # Assert
+        assert reads == 1
+        assert modified_image != encoded_image
+        assert open_spy.call_count == reads_before_modified + 1
+
+    def test_encode_missing_image(self):
+        """
+        Test encode returns the no image image loaded once
+        """
+        # Prepare
+        ImageBase64Service.load()
+        with open("app/static/images/no_image.jpg", 'rb') as f:
+            no_image = base64.b64encode(f.read())
+
+        # Execute
+        encoded_image = ImageBase64Service.encode("00/00/missing.jpg")
+
+        # Assert
+        assert encoded_image == no_image
+
+    @pytest.mark.anyio
+    async def test_encode_async_reads_storage_without_blocking(self, cover_storage, mocker):
+        """
+        Test encode_async reads images of the storage with read_async and caches them
+        """
+        # Prepare
+        key = cover_storage.put(b'image', 'jpg')
+        read_spy = mocker.spy(cover_storage, 'read')
+        read_async_spy = mocker.spy(CoverStorageService, 'read_async')
+
+        # Execute
+        encoded_image = await ImageBase64Service.encode_async(key)
+        cached_image = await ImageBase64Service.encode_async(key)
+        missing_image = await ImageBase64Service.encode_async("00/00/" + "0" * 64 + ".jpg")
+
+        # Assert
+        assert encoded_image == cached_image == base64.b64encode(b'image')
+        assert read_async_spy.call_count == 2
+        assert read_spy.call_count == 2
+        assert missing_image == ImageBase64Service.encode("app/static/images/no_image.jpg")
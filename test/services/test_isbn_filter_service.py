@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import BookModel
+from app.services.isbn_filter_service import IsbnFilterService
+
+
+def add_book(db_session, isbn, book_id=None, created_at=None):
+    book = BookModel(title="saved_title", isbn=isbn,
+                     cover_path="app/static/images/no_image.jpg", published_at="2020-01-01", created_at=created_at)
+    book.id = book_id
+    db_session.add(book)
+    db_session.commit()
+
+
+@pytest.mark.anyio
+async def test_is_saved_async_probes_only_isbns_in_filter(db_session, async_db_session, mocker):
+    # Prepare
+    add_book(db_session, "9784774193684")
+    await IsbnFilterService.load_async()
+    exists_async_spy = mocker.spy(BookModel, 'exists_async')
+
+    # Execute
+    saved = await IsbnFilterService.is_saved_async(isbn="9784774193684")
+    not_saved = await IsbnFilterService.is_saved_async(isbn="9788576082675")
+
+    # Assert
+    assert (saved, not_saved) == (True, False)
+    assert exists_async_spy.call_count == 1
+    assert IsbnFilterService.metrics()['size'] == 1
+
+
+@pytest.mark.anyio
+async def test_is_saved_async_refreshes_isbns_saved_by_other_workers(db_session, async_db_session, mocker):
+    # Prepare
+    await IsbnFilterService.load_async()
+    add_book(db_session, "9784774193684")
+    assert await IsbnFilterService.is_saved_async(isbn="9784774193684") is False
+    mocker.patch('app.services.isbn_filter_service.REFRESH_INTERVAL', 0)
+
+    # Execute
+    saved = await IsbnFilterService.is_saved_async(isbn="9784774193684")
+
+    # Assert
+    assert saved is True
+
+
+@pytest.mark.anyio
+async def test_refresh_async_loads_books_committed_after_later_books(db_session, async_db_session):
+    # Prepare
+    await IsbnFilterService.load_async()
+    add_book(db_session, "9788576082675", book_id=2)
+    await IsbnFilterService.refresh_async()
+    # its id and creation time are older than the book found by the refresh, but it is committed after it
+    add_book(db_session, "9784774193684", book_id=1, created_at=datetime.now() - timedelta(seconds=10))
+
+    # Execute
+    await IsbnFilterService.refresh_async()
+
+    # Assert
+    assert IsbnFilterService.might_contain(isbn="9784774193684") is True
+    assert IsbnFilterService.metrics()['size'] == 2
+
+
+@pytest.mark.anyio
+async def test_is_saved_async_confirms_positives_in_database(async_db_session):
+    # Prepare
+    await IsbnFilterService.load_async()
+    # added by a transaction which was rolled back
+    IsbnFilterService.add(isbn="9784774193684")
+
+    # Execute
+    saved = await IsbnFilterService.is_saved_async(isbn="9784774193684")
+
+    # Assert
+    assert saved is False
+    assert IsbnFilterService.metrics()['false_positives'] == 1
+
+
+def test_might_contain_before_load():
+    # Execute
+    might_contain = IsbnFilterService.might_contain(isbn="9784774193684")
+
+    # Assert
+    assert might_contain is True
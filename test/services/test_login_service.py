@@ -1,5 +1,8 @@
+import time
+
 import pytest
 from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
 
 from app.core.security import AppRoles
 from app.exceptions.exceptions import InvalidCredentialsException
@@ -52,3 +55,41 @@ class TestLoginService():
         # Execute
         with pytest.raises(InvalidCredentialsException):
             LoginService.verify_token(test_access_token)
+
+    def test_verify_token_caches_verified_token(self, mocker):
+        """
+        Test verify token decodes a token once until it expires
+        """
+        # Prepare
+        LoginService.clear()
+        test_access_token = LoginService.create_access_token({"sub": "test_user_name", "role": AppRoles.USER})
+        test_token = HTTPAuthorizationCredentials(scheme="Bearer", credentials=test_access_token)
+        decode_spy = mocker.spy(jwt, 'decode')
+
+        # Execute
+        first = LoginService.verify_token(test_token)
+        second = LoginService.verify_token(test_token)
+
+        # Assert
+        assert first == second == TokenData(user_name="test_user_name", role=AppRoles.USER)
+        assert decode_spy.call_count == 1
+        assert LoginService.metrics()['hits'] == 1
+
+    def test_verify_token_decodes_token_again_after_expiration(self, mocker):
+        """
+        Test verify token decodes a cached token again after it expires
+        """
+        # Prepare
+        LoginService.clear()
+        test_access_token = LoginService.create_access_token({"sub": "test_user_name", "role": AppRoles.USER})
+        test_token = HTTPAuthorizationCredentials(scheme="Bearer", credentials=test_access_token)
+        LoginService.verify_token(test_token)
+        mocker.patch('app.core.cache.time.monotonic', return_value=time.monotonic() + 24 * 60 * 60)
+        decode_spy = mocker.spy(jwt, 'decode')
+
+        # Execute
+        LoginService.verify_token(test_token)
+
+        # Assert
+        assert decode_spy.call_count == 1
+        assert LoginService.metrics()['misses'] == 2
@@ -0,0 +1,49 @@
+import bcrypt
+import pytest
+
+from app.services.password_service import PasswordService
+
+
+def test_calibrate_picks_largest_rounds_within_target(monkeypatch, mocker):
+    # Prepare
+    monkeypatch.setattr(PasswordService, 'rounds', PasswordService.rounds)
+    monkeypatch.setattr(PasswordService, '_calibrated', False)
+    # 8 rounds take 10ms, so 12 rounds take 160ms and 13 rounds 320ms
+    mocker.patch.object(PasswordService, '_time_hash', return_value=0.01)
+
+    # Execute
+    rounds = PasswordService.calibrate(target_seconds=0.25)
+
+    # Assert
+    assert rounds == PasswordService.rounds == 12
+    assert PasswordService.calibrate(target_seconds=10) == 12
+
+
+@pytest.mark.anyio
+async def test_hash_async_and_verify_async(monkeypatch):
+    # Prepare
+    monkeypatch.setattr(PasswordService, 'rounds', 4)
+    verifications = PasswordService.verifications
+
+    # Execute
+    hashed_password = await PasswordService.hash_async('test_password')
+    is_valid = await PasswordService.verify_async('test_password', hashed_password)
+    is_invalid = await PasswordService.verify_async('invalid_password', hashed_password)
+
+    # Assert
+    assert hashed_password.startswith('$2b$04$')
+    assert (is_valid, is_invalid) == (True, False)
+    assert PasswordService.verifications == verifications + 2
+    assert PasswordService.metrics()['pending'] == 0
+
+
+def test_needs_rehash(monkeypatch):
+    # Prepare
+    monkeypatch.setattr(PasswordService, 'rounds', 5)
+
+    # Execute
+    outdated = PasswordService.needs_rehash(bcrypt.hashpw(b'test_password', bcrypt.gensalt(rounds=4)).decode())
+    current = PasswordService.needs_rehash(bcrypt.hashpw(b'test_password', bcrypt.gensalt(rounds=5)).decode())
+
+    # Assert
+    assert (outdated, current) == (True, False)
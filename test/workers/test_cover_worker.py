@@ -0,0 +1,126 @@
+import httpx
+import pytest
+from sqlalchemy import select
+
+from app.exceptions.exceptions import GoogleBooksApiException
+from app.exceptions.message import ExceptionMessage
+from app.models import BookModel, CoverBlobModel
+from app.workers import cover_worker
+
+
+def add_book(db_session, isbn, cover_url):
+    db_session.add(BookModel(title="saved_title", isbn=isbn, cover_path=None, published_at="2020-01-01",
+                             cover_url=cover_url))
+    db_session.commit()
+
+
+@pytest.mark.anyio
+async def test_run_once_fetches_deferred_covers(db_session, async_db_session, mocker, cover_storage):
+    # Prepare
+    add_book(db_session, "9788576082675", "https://via.placeholder.com/150")
+    add_book(db_session, "9784774193687", None)
+    cover_path = cover_storage.put(b'cover', 'jpg')
+    save_cover_url_mock = mocker.patch('app.services.google_books_api_service.GoogleBooksApiService.save_cover_url',
+                                       return_value=cover_path)
+    mocker.patch('app.services.cover_image_service.CoverImageService.render_async', return_value={})
+
+    # Execute
+    first = await cover_worker.run_once()
+    second = await cover_worker.run_once()
+
+    # Assert
+    assert (first, second) == (1, 0)
+    save_cover_url_mock.assert_called_once_with(cover_url="https://via.placeholder.com/150", isbn="9788576082675")
+    db_session.expire_all()
+    book = db_session.execute(select(BookModel).where(BookModel.isbn == "9788576082675")).scalars().one()
+    assert book.cover_path == cover_path
+    assert db_session.get(CoverBlobModel, cover_path).refcount == 1
+
+
+@pytest.mark.anyio
+async def test_run_once_stops_fetching_covers_which_fail(db_session, async_db_session, mocker):
+    # Prepare
+    add_book(db_session, "9788576082675", "https://via.placeholder.com/150")
+    add_book(db_session, "9784774193687", "https://via.placeholder.com/300")
+    mocker.patch('app.services.google_books_api_service.GoogleBooksApiService.save_cover_url',
+                 side_effect=[GoogleBooksApiException(message=ExceptionMessage.GOOGLE_BOOKS_API_IMAGE_TOO_LARGE),
+                              GoogleBooksApiException(status_code=503,
+                                                      message=ExceptionMessage.GOOGLE_BOOKS_API_UNAVAILABLE)])
+
+    # Execute
+    fetched = await cover_worker.run_once()
+
+    # Assert
+    assert fetched == 0
+    db_session.expire_all()
+    books = db_session.execute(select(BookModel).order_by(BookModel.id)).scalars().all()
+    assert [book.cover_url for book in books] == [None, "https://via.placeholder.com/300"]
+    assert [book.cover_path for book in books] == [None, None]
+
+
+@pytest.mark.anyio
+async def test_run_once_downloads_covers_without_locking_books(db_session, async_db_session, mocker):
+    # Prepare
+    add_book(db_session, "9788576082675", "https://via.placeholder.com/150")
+
+    def save_cover_url(cover_url, isbn):
+        # the claim is committed and the book is not locked while downloading
+        book = db_session.execute(select(BookModel).where(BookModel.isbn == isbn)
+                                  .with_for_update(nowait=True)).scalars().one()
+        claimed_at.append(book.cover_claimed_at)
+        db_session.commit()
+        raise GoogleBooksApiException(status_code=503, message=ExceptionMessage.GOOGLE_BOOKS_API_UNAVAILABLE)
+
+    claimed_at = []
+    save_cover_url_mock = mocker.patch('app.services.google_books_api_service.GoogleBooksApiService.save_cover_url',
+                                       side_effect=save_cover_url)
+
+    # Execute
+    first = await cover_worker.run_once()
+    leased = await cover_worker.run_once()
+    expired = await cover_worker.run_once(lease_seconds=0)
+
+    # Assert
+    assert (first, leased, expired) == (0, 0, 0)
+    assert save_cover_url_mock.call_count == 2
+    assert claimed_at[0] is not None and claimed_at[1] > claimed_at[0]
+
+
+@pytest.mark.parametrize('response, cover_url', [
+    (httpx.Response(404), None),
+    (httpx.Response(200, headers={'Content-Type': 'image/jpeg'}, content=b'not an image'), None),
+    (httpx.Response(429), "https://via.placeholder.com/150"),
+    (httpx.Response(502), "https://via.placeholder.com/150"),
+])
+@pytest.mark.anyio
+async def test_run_once_retries_covers_which_fail_transiently(db_session, mock_google_books_api, response, cover_url):
+    # Prepare
+    add_book(db_session, "9788576082675", "https://via.placeholder.com/150")
+    mock_google_books_api(lambda request: response)
+
+    # Execute
+    fetched = await cover_worker.run_once()
+
+    # Assert
+    assert fetched == 0
+    db_session.expire_all()
+    book = db_session.execute(select(BookModel)).scalars().one()
+    assert book.cover_url == cover_url
+
+
+@pytest.mark.anyio
+async def test_collect_garbage_deletes_unreferenced_covers(db_session, async_db_session, cover_storage):
+    # Prepare
+    orphan = cover_storage.put(b'orphan', 'jpg')
+    add_book(db_session, "9788576082675", None)
+    cover_path = cover_storage.put(b'cover', 'jpg')
+    db_session.add(CoverBlobModel(key=cover_path, refcount=1))
+    db_session.commit()
+
+    # Execute
+    deleted = await cover_worker.collect_garbage(grace_seconds=-60)
+
+    # Assert
+    assert deleted == 1
+    assert cover_storage.exists(orphan) is False
+    assert cover_storage.exists(cover_path) is True
@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import select
+
+from app.models import BookModel, IngestionJobItemModel, IngestionJobModel
+from app.schemas.api import GoogleBookSchema
+from app.schemas.responses import BookIngestionStatus
+from app.workers import ingestion_worker
+
+
+def enqueue(db_session, isbns):
+    job = IngestionJobModel(total=len(isbns))
+    db_session.add(job)
+    db_session.flush()
+    for isbn in isbns:
+        db_session.add(IngestionJobItemModel(job_id=job.id, isbn=isbn))
+    db_session.commit()
+    return job
+
+
+@pytest.mark.anyio
+async def test_run_once_ingests_queued_items(db_session, async_db_session, mocker):
+    # Prepare
+    job = enqueue(db_session, ["9788576082675", "9784774193687"])
+    mocker.patch('app.services.google_books_api_service.GoogleBooksApiService.fetch_book_data',
+                 return_value=GoogleBookSchema(title="test_title",
+                                               authors=["test_author"],
+                                               published_at="2021-01-01",
+                                               cover_url="https://via.placeholder.com/150"))
+    mocker.patch('app.services.google_books_api_service.GoogleBooksApiService.save_cover_image',
+                 return_value="app/static/images/no_image.jpg")
+    mocker.patch('app.services.cover_image_service.CoverImageService.render_async', return_value={})
+
+    # Execute
+    first = await ingestion_worker.run_once(batch_size=1)
+    second = await ingestion_worker.run_once(batch_size=1)
+    third = await ingestion_worker.run_once(batch_size=1)
+
+    # Assert
+    assert (first, second, third) == (1, 1, 0)
+    db_session.expire_all()
+    items = db_session.execute(select(IngestionJobItemModel).where(IngestionJobItemModel.job_id == job.id))\
+        .scalars().all()
+    assert [item.status for item in items] == [BookIngestionStatus.CREATED, BookIngestionStatus.CREATED]
+    assert len(db_session.execute(select(BookModel)).scalars().all()) == 2
+
+
+@pytest.mark.anyio
+async def test_run_once_skips_items_locked_by_other_worker(db_session, async_db_session):
+    # Prepare
+    enqueue(db_session, ["9788576082675"])
+    db_session.execute(select(IngestionJobItemModel).with_for_update()).scalars().all()
+
+    # Execute
+    processed = await ingestion_worker.run_once()
+
+    # Assert
+    assert processed == 0
+    db_session.rollback()
+
+
+@pytest.mark.anyio
+async def test_run_once_marks_items_failed(db_session, async_db_session, mocker):
+    # Prepare
+    enqueue(db_session, ["9788576082675"])
+    mocker.patch('app.services.book_ingestion_service.BookIngestionService.ingest',
+                 side_effect=RuntimeError('boom'))
+
+    # Execute
+    processed = await ingestion_worker.run_once()
+
+    # Assert
+    assert processed == 1
+    db_session.expire_all()
+    item = db_session.execute(select(IngestionJobItemModel)).scalars().one()
+    assert item.status == BookIngestionStatus.FAILED
+    assert item.detail == 'boom'